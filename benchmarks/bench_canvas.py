@@ -0,0 +1,196 @@
+# benchmarks/bench_canvas.py
+"""Custo de cada redesenho do tabuleiro: apagar e recriar tudo (draw_board antigo) x DesenhoTabuleiro incremental.
+
+Reproduz a sequência de atualizações de uma partida vista pela janela do
+jogador: para cada jogada, um clique que seleciona a peça (mostra a seleção e
+as dicas) e a atualização do tabuleiro depois da jogada (esconde as dicas).
+Mede tempo e chamadas ao canvas por atualização num canvas de mentira e, se
+houver display, num Canvas de verdade com a janela escondida.
+
+    python -m benchmarks.bench_canvas --jogadas 200 --tamanho 10
+"""
+import argparse
+import random
+import time
+
+from desenho import DesenhoTabuleiro
+from layouts import obter_layout
+from tabuleiro import criar_jogo
+
+CELL_SIZE = 40
+
+
+class CanvasStub:
+    """Canvas que só guarda as opções dos itens e conta as chamadas."""
+
+    def __init__(self):
+        self.itens = {}
+        self.chamadas = 0
+        self._proximo = 1
+
+    def _criar(self, tipo, coords, opcoes):
+        self.chamadas += 1
+        item = self._proximo
+        self._proximo += 1
+        self.itens[item] = (tipo, list(coords), dict(opcoes))
+        return item
+
+    def create_rectangle(self, *coords, **opcoes):
+        return self._criar("rectangle", coords, opcoes)
+
+    def create_oval(self, *coords, **opcoes):
+        return self._criar("oval", coords, opcoes)
+
+    def create_image(self, *coords, **opcoes):
+        return self._criar("image", coords, opcoes)
+
+    def itemconfigure(self, item, **opcoes):
+        self.chamadas += 1
+        self.itens[item][2].update(opcoes)
+
+    def coords(self, item, *coords):
+        self.chamadas += 1
+        self.itens[item][1][:] = coords
+
+    def delete(self, *itens):
+        self.chamadas += 1
+        if "all" in itens:
+            self.itens.clear()
+        for item in itens:
+            self.itens.pop(item, None)
+
+
+def desenhar_antigo(canvas, imagens, board, possible_moves, selected_piece, campo_p1, campo_p2):
+    """Cópia de HalmaClient.draw_board antes do desenho incremental (campos como listas)."""
+    n = len(board)
+    canvas.delete("all")
+    for r in range(n):
+        for c in range(n):
+            x1, y1 = c * CELL_SIZE, r * CELL_SIZE
+            fill_color = "#f2e396"
+            if (r, c) in campo_p1: fill_color = "#E0E8FF"
+            elif (r, c) in campo_p2: fill_color = "#FFE0E0"
+            canvas.create_rectangle(x1, y1, x1 + CELL_SIZE, y1 + CELL_SIZE, outline="black", fill=fill_color)
+    for r, c in possible_moves:
+        x1, y1 = c * CELL_SIZE, r * CELL_SIZE
+        canvas.create_oval(x1 + 15, y1 + 15, x1 + CELL_SIZE - 15, y1 + CELL_SIZE - 15, fill="#90EE90", outline="")
+    for r in range(n):
+        for c in range(n):
+            player = board[r][c]
+            if player != 0:
+                x_center = (c * CELL_SIZE) + (CELL_SIZE // 2)
+                y_center = (r * CELL_SIZE) + (CELL_SIZE // 2)
+                canvas.create_image(x_center, y_center, image=imagens[player])
+    if selected_piece:
+        r, c = selected_piece
+        x1, y1 = c * CELL_SIZE, r * CELL_SIZE
+        canvas.create_oval(x1 + 2, y1 + 2, x1 + CELL_SIZE - 2, y1 + CELL_SIZE - 2, outline="red", width=3)
+
+
+def atualizacoes(jogadas, tamanho, seed):
+    """Sequência (board, possible_moves, selected) de uma partida com jogadas legais aleatórias."""
+    rng = random.Random(seed)
+    jogo = criar_jogo("bits", tamanho)
+    sequencia = [([linha[:] for linha in jogo.get_board()], [], None)]
+    for _ in range(jogadas):
+        legais = jogo.all_legal_moves(jogo.current_turn)
+        if jogo.winner or not legais:
+            break
+        origem = rng.choice(sorted(legais))
+        destino = rng.choice(legais[origem])
+        board = [linha[:] for linha in jogo.get_board()]
+        sequencia.append((board, legais[origem], origem))
+        jogo.move_piece(jogo.current_turn, origem, destino)
+        sequencia.append(([linha[:] for linha in jogo.get_board()], [], None))
+    return sequencia
+
+
+def campos(tamanho):
+    layout = obter_layout(tamanho)
+    return list(layout.campos[1]), list(layout.campos[2])
+
+
+def medir(canvas, imagens, sequencia, tamanho, atualizar=lambda: None):
+    campo_p1, campo_p2 = campos(tamanho)
+    resultados = {}
+
+    chamadas = getattr(canvas, "chamadas", 0)
+    inicio = time.perf_counter()
+    for board, dicas, selecionada in sequencia:
+        desenhar_antigo(canvas, imagens, board, dicas, selecionada, campo_p1, campo_p2)
+        atualizar()
+    resultados["antigo"] = (time.perf_counter() - inicio, getattr(canvas, "chamadas", 0) - chamadas)
+    canvas.delete("all")
+
+    chamadas = getattr(canvas, "chamadas", 0)
+    inicio = time.perf_counter()
+    desenho = DesenhoTabuleiro(canvas, imagens, tamanho, CELL_SIZE, [campo_p1, campo_p2])
+    montagem = time.perf_counter() - inicio
+    for board, dicas, selecionada in sequencia:
+        desenho.desenhar(board, dicas, selecionada)
+        atualizar()
+    resultados["incremental"] = (time.perf_counter() - inicio - montagem, getattr(canvas, "chamadas", 0) - chamadas)
+    canvas.delete("all")
+    return resultados, montagem
+
+
+def imprimir(titulo, resultados, montagem, n, contar_chamadas=True):
+    print(f"\n{titulo} ({n} atualizações; montagem inicial do incremental: {montagem * 1000:.2f} ms)")
+    print(f"{'desenho':>12} {'ms/atualização':>15} {'chamadas/atualização':>21}")
+    for nome, (segundos, chamadas) in resultados.items():
+        print(f"{nome:>12} {segundos / n * 1000:>15.3f} {(f'{chamadas / n:.1f}' if contar_chamadas else '-'):>21}")
+
+
+def verificar(sequencia, tamanho):
+    """Confere que o desenho incremental termina cada atualização com o mesmo conteúdo visível do antigo."""
+    imagens = {1: "p1", 2: "p2"}
+    campo_p1, campo_p2 = campos(tamanho)
+    incremental = CanvasStub()
+    desenho = DesenhoTabuleiro(incremental, imagens, tamanho, CELL_SIZE, [campo_p1, campo_p2])
+    for board, dicas, selecionada in sequencia:
+        antigo = CanvasStub()
+        desenhar_antigo(antigo, imagens, board, dicas, selecionada, campo_p1, campo_p2)
+        desenho.desenhar(board, dicas, selecionada)
+        assert visivel(antigo) == visivel(incremental), "Desenho incremental diverge do antigo."
+
+
+def visivel(canvas):
+    conteudo = []
+    for tipo, coords, opcoes in canvas.itens.values():
+        if opcoes.get("state") != "hidden":
+            conteudo.append((tipo, tuple(coords), tuple(sorted((k, v) for k, v in opcoes.items() if k != "state"))))
+    return sorted(conteudo)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jogadas', type=int, default=200)
+    parser.add_argument('--tamanho', type=int, default=10, help='Lado do tabuleiro (padrão: 10).')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sequencia = atualizacoes(args.jogadas, args.tamanho, args.seed)
+    verificar(sequencia, args.tamanho)
+    print(f"Conteúdo visível igual nos dois desenhos em {len(sequencia)} atualizações.")
+
+    resultados, montagem = medir(CanvasStub(), {1: "p1", 2: "p2"}, sequencia, args.tamanho)
+    imprimir("Canvas de mentira", resultados, montagem, len(sequencia))
+
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:  # Sem display (ou sem Tk): fica só o canvas de mentira
+        print(f"\nCanvas do Tk não medido: {e}")
+        return
+    root.withdraw()
+    canvas = tk.Canvas(root, width=args.tamanho * CELL_SIZE, height=args.tamanho * CELL_SIZE)
+    canvas.pack()
+    imagens = {1: tk.PhotoImage(width=32, height=32), 2: tk.PhotoImage(width=32, height=32)}
+    # update_idletasks força o Tk a processar o redesenho dentro da medição
+    resultados, montagem = medir(canvas, imagens, sequencia, args.tamanho, root.update_idletasks)
+    imprimir("Canvas do Tk (janela escondida)", resultados, montagem, len(sequencia), contar_chamadas=False)
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_chat.py
+"""Chat em buffer circular: memória estável com milhões de mensagens, lacuna e limite de taxa.
+
+Empurra --mensagens mensagens numa Partida (sem o limitador) e mostra a
+memória alocada (tracemalloc) em vários pontos: ela deve ficar plana depois
+que o buffer enche. Depois confere a indicação de lacuna para um cliente
+atrasado, quantas mensagens um jogador inundando o chat consegue enviar, que
+remetentes sem assento são recusados e que o limitador não guarda um balde por
+remetente inventado.
+
+    python -m benchmarks.bench_chat --mensagens 2000000
+"""
+import argparse
+import time
+import tracemalloc
+
+from chat import LimitadorTaxa
+from partidas import Partida
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mensagens', type=int, default=1_000_000)
+    parser.add_argument('--pontos', type=int, default=8, help='Quantas medições de memória (padrão: 8).')
+    args = parser.parse_args()
+
+    partida = Partida(1)
+    partida.registrar_jogador()
+    partida.registrar_jogador()
+    partida.chat.limitador = None
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    passo = max(1, args.mensagens // args.pontos)
+    inicio = time.perf_counter()
+    print(f"{'mensagens':>12} {'memória':>12} {'pico':>12}")
+    for i in range(args.mensagens):
+        partida.enviar_chat(1 + i % 2, f"mensagem número {i} de um jogador muito falante")
+        if (i + 1) % passo == 0:
+            atual, pico = tracemalloc.get_traced_memory()
+            print(f"{i + 1:>12} {(atual - base) / 1024:>10.1f}KB {(pico - base) / 1024:>10.1f}KB")
+    duracao = time.perf_counter() - inicio
+    tracemalloc.stop()
+    print(f"{args.mensagens / duracao:.0f} mensagens/s (com tracemalloc ligado)\n")
+
+    resposta = partida.get_novas_mensagens_chat(-1)
+    print(f"Cliente que parou em -1: recebe {len(resposta['mensagens'])} mensagens, "
+          f"a partir da seq {resposta['mensagens'][0]['seq']}, lacuna_chat={resposta['lacuna_chat']}")
+    resposta = partida.get_novas_mensagens_chat(partida.chat.ultimo_seq - 3)
+    print(f"Cliente em dia: recebe {len(resposta['mensagens'])} mensagens, lacuna_chat={resposta['lacuna_chat']}\n")
+
+    limitador = LimitadorTaxa()
+    agora, aceitas = 0.0, 0
+    for _ in range(1000):  # 1000 tentativas em 10 s simulados
+        aceitas += limitador.permitir(1, agora)
+        agora += 0.01
+    print(f"Limite de taxa: {aceitas} de 1000 mensagens aceitas em 10 s "
+          f"(taxa {limitador.taxa}/s, rajada {limitador.rajada}).")
+
+    partida = Partida(2)
+    partida.registrar_jogador()
+    partida.registrar_jogador()
+    recusadas = sum(partida.enviar_chat(player_id, "oi") == -1 for player_id in range(3, 203))
+    assert recusadas == 200 and len(partida.chat.limitador) == 0
+    print(f"Remetentes sem assento: {recusadas} de 200 mensagens recusadas, nenhum balde criado.")
+    for chave in range(10_000):
+        limitador.permitir(chave, agora + chave)
+    assert len(limitador) <= limitador.limite
+    print(f"10000 chaves no limitador: {len(limitador)} baldes guardados (limite {limitador.limite}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_delta.py
+"""Compara tamanho e custo de serialização XML-RPC das respostas "completo", "delta" e "igual".
+
+Também confere que um `EspelhoEstado` alimentado só por deltas termina com o
+mesmo tabuleiro do servidor.
+
+    python -m benchmarks.bench_delta --repeticoes 5000
+"""
+import argparse
+import random
+import time
+import xmlrpc.client
+
+from benchmarks.comum import passo_aleatorio
+from partidas import Partida
+from sincronizacao import EspelhoEstado
+
+
+def custo(resposta, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        corpo = xmlrpc.client.dumps((resposta,), methodresponse=True, allow_none=True)
+    meio = time.perf_counter()
+    for _ in range(repeticoes):
+        xmlrpc.client.loads(corpo)
+    fim = time.perf_counter()
+    return len(corpo.encode()), (meio - inicio) / repeticoes, (fim - meio) / repeticoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5000)
+    parser.add_argument('--jogadas', type=int, default=200, help='Jogadas na verificação do espelho.')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    partida = Partida(1)
+    partida.registrar_jogador()
+    partida.registrar_jogador()
+    espelho = EspelhoEstado()
+    espelho.aplicar(partida.get_estado())
+    for _ in range(args.jogadas):
+        estado = partida.get_estado()
+        movimento = passo_aleatorio(estado["board"], estado["turn"], rng)
+        partida.fazer_jogada(estado["turn"], *movimento)
+        if rng.random() < 0.7:  # às vezes o cliente "perde" polls e recebe várias jogadas de uma vez
+            espelho.aplicar(partida.get_estado(espelho.estado_id))
+    espelho.aplicar(partida.get_estado(espelho.estado_id))
+    assert espelho.board == partida.get_estado()["board"], "espelho divergiu do servidor"
+    print(f"Espelho conferido após {args.jogadas} jogadas: tabuleiro idêntico ao do servidor.\n")
+
+    anterior = partida.estado_id - 1
+    respostas = {
+        "completo": partida.get_estado(),
+        "delta (1 jogada)": partida.get_estado(anterior),
+        "igual": partida.get_estado(partida.estado_id),
+    }
+    print(f"{'resposta':>18} {'bytes':>7} {'dumps':>10} {'loads':>10}")
+    for nome, resposta in respostas.items():
+        tamanho, t_dumps, t_loads = custo(resposta, args.repeticoes)
+        print(f"{nome:>18} {tamanho:>7} {t_dumps * 1e6:>8.1f}µs {t_loads * 1e6:>8.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_diario.py
+"""Custo do diário (--journal): latência de jogada com e sem diário e tempo de recuperação.
+
+1. Joga N partidas simultâneas em processo, sem diário e com diário, e
+   compara jogadas/s e p50/p99 da latência de `fazer_jogada`.
+2. Gera diários com --eventos eventos e mede quanto o servidor leva para
+   recuperar só reaplicando os segmentos e, depois, a partir do snapshot.
+
+    python -m benchmarks.bench_diario --partidas 50 --eventos 100000 300000
+"""
+import argparse
+import contextlib
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_partidas import rodada
+from benchmarks.comum import ms, passo_aleatorio, percentil
+from servidor import HalmaServerLogic
+
+
+def gerar_diario(diretorio, eventos):
+    """Preenche um diário com ~`eventos` eventos (partidas de 2 jogadores, jogadas e chat), sem snapshot."""
+    rng = random.Random(7)
+    logica = HalmaServerLogic(diretorio_diario=diretorio, snapshot_a_cada=10**12)
+    partidas = []
+    gerados = 0
+    while gerados < eventos:
+        if len(partidas) < 200:
+            partida_id = logica.criar_partida()
+            logica.registrar_jogador(partida_id)
+            logica.registrar_jogador(partida_id)
+            partidas.append(partida_id)
+            gerados += 3
+        partida_id = rng.choice(partidas)
+        estado = logica.get_estado_do_jogo(partida_id)
+        movimento = passo_aleatorio(estado["board"], estado["turn"], rng)
+        if movimento:
+            logica.fazer_jogada(partida_id, estado["turn"], *movimento)
+            gerados += 1
+        if rng.random() < 0.05:
+            logica.enviar_chat(partida_id, 1, "mensagem de chat")
+            gerados += 1
+    logica._fechar()
+
+
+def recuperar(diretorio):
+    inicio = time.perf_counter()
+    logica = HalmaServerLogic(diretorio_diario=diretorio)
+    duracao = time.perf_counter() - inicio
+    logica._fechar()
+    return duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--partidas', type=int, default=50)
+    parser.add_argument('--jogadas', type=int, default=40)
+    parser.add_argument('--eventos', type=int, nargs='+', default=[100000, 300000])
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="halma-diario-")
+    try:
+        print(f"{'diário':>7} {'jogadas/s':>10} {'p50':>12} {'p99':>12}")
+        for nome, diretorio in (("não", None), ("sim", os.path.join(base, "latencia"))):
+            with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                logicas = []
+                def criar():
+                    logicas.append(HalmaServerLogic(diretorio_diario=diretorio))
+                    return logicas[-1]
+                total, duracao, latencias = rodada(criar, args.partidas, args.jogadas)
+                logicas[-1]._fechar()
+            print(f"{nome:>7} {total / duracao:>10.0f} {ms(percentil(latencias, 50)):>12} {ms(percentil(latencias, 99)):>12}")
+
+        print(f"\n{'eventos':>8} {'bytes':>12} {'só segmentos':>14} {'com snapshot':>14}")
+        for eventos in args.eventos:
+            diretorio = os.path.join(base, f"recuperacao-{eventos}")
+            with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+                gerar_diario(diretorio, eventos)
+                tamanho = sum(os.path.getsize(os.path.join(diretorio, f)) for f in os.listdir(diretorio))
+                # A primeira recuperação reaplica tudo e grava um snapshot; a segunda parte dele
+                sem_snapshot = recuperar(diretorio)
+                com_snapshot = recuperar(diretorio)
+            print(f"{eventos:>8} {tamanho:>12} {sem_snapshot:>13.2f}s {com_snapshot:>13.2f}s")
+    finally:
+        shutil.rmtree(base)
+
+
+if __name__ == "__main__":
+    main()
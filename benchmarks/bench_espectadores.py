@@ -0,0 +1,142 @@
+# benchmarks/bench_espectadores.py
+"""CPU do servidor por espectador: `assistir` (resposta pré-serializada por estado) x `aguardar_mudanca` (montada por requisição).
+
+Uma partida avança uma jogada por rodada (com uma mensagem de chat de vez em
+quando) e, a cada rodada, todos os espectadores pedem o que mudou. As
+requisições passam pelo despacho real de cada transporte (_marshaled_dispatch
+do XML-RPC, despachar do binário) no próprio processo, sem sockets, então o
+tempo de CPU medido é só o do servidor: decodificar, montar e codificar.
+Antes, confere que o medidor "espectadores" conta só os long-polls em curso.
+
+    python -m benchmarks.bench_espectadores --espectadores 10 100 1000 --rodadas 20
+"""
+import argparse
+import contextlib
+import os
+import random
+import threading
+import time
+import xmlrpc.client
+
+import protocolo_binario
+from servidor import HalmaServerLogic, criar_servidor
+
+
+def preparar():
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        logica = HalmaServerLogic()
+        partida_id = logica.criar_partida()
+        logica.registrar_jogador(partida_id)
+        logica.registrar_jogador(partida_id)
+    servidor_xml = criar_servidor("127.0.0.1", 0)
+    servidor_xml.register_instance(logica)
+    servidor_bin = protocolo_binario.ServidorBinario(("127.0.0.1", 0), logica)
+    return logica, partida_id, servidor_xml, servidor_bin
+
+
+def jogar(logica, partida_id, rng, rodada):
+    partida = logica.partidas.obter(partida_id)
+    jogador = partida.jogo.current_turn
+    legais = logica.get_jogadas_legais(partida_id, jogador)
+    origem, destinos = rng.choice(legais)
+    logica.fazer_jogada(partida_id, jogador, origem, rng.choice(destinos))
+    if rodada % 5 == 0:
+        logica.enviar_chat(partida_id, jogador, f"rodada {rodada}")
+
+
+def medir(n, metodo, transporte, rodadas, seed):
+    """CPU (s) gasta pelo servidor respondendo `n` espectadores por `rodadas` rodadas."""
+    logica, partida_id, servidor_xml, servidor_bin = preparar()
+    partida = logica.partidas.obter(partida_id)
+    rng = random.Random(seed)
+    conhecidos = [(-1, -1)] * n
+    cpu = 0.0
+    bytes_enviados = 0
+    try:
+        for rodada in range(rodadas):
+            jogar(logica, partida_id, rng, rodada)
+            if transporte == "xmlrpc":
+                requisicoes = [xmlrpc.client.dumps((partida_id, e, c, 0), metodo).encode() for e, c in conhecidos]
+                despachar = servidor_xml._marshaled_dispatch
+            else:
+                requisicoes = [protocolo_binario.codificar([metodo, [partida_id, e, c, 0]]) for e, c in conhecidos]
+                despachar = servidor_bin.despachar
+            inicio = time.process_time()
+            for requisicao in requisicoes:
+                bytes_enviados += len(despachar(requisicao))
+            cpu += time.process_time() - inicio
+            # Todos os espectadores aplicaram a resposta e estão no estado atual
+            conhecidos = [(partida.estado_id, partida.chat.ultimo_seq)] * n
+    finally:
+        servidor_xml.server_close()
+        servidor_bin.server_close()
+    return cpu, bytes_enviados
+
+
+def verificar(rodadas, seed):
+    """As respostas de `assistir` e de `aguardar_mudanca` têm o mesmo conteúdo, nos dois transportes."""
+    logica, partida_id, servidor_xml, servidor_bin = preparar()
+    partida = logica.partidas.obter(partida_id)
+    rng = random.Random(seed)
+    conhecido = (-1, -1)
+    try:
+        for rodada in range(rodadas):
+            jogar(logica, partida_id, rng, rodada)
+            for base in (conhecido, (-1, -1)):
+                parametros = (partida_id,) + base + (0,)
+                respostas = []
+                for metodo in ("assistir", "aguardar_mudanca"):
+                    xml = servidor_xml._marshaled_dispatch(xmlrpc.client.dumps(parametros, metodo).encode())
+                    binario = servidor_bin.despachar(protocolo_binario.codificar([metodo, list(parametros)]))
+                    respostas.append(xmlrpc.client.loads(xml)[0][0])
+                    respostas.append(protocolo_binario.decodificar(binario)[1])
+                assert all(r == respostas[0] for r in respostas), "Resposta de espectador diverge."
+            conhecido = (partida.estado_id, partida.chat.ultimo_seq)
+    finally:
+        servidor_xml.server_close()
+        servidor_bin.server_close()
+
+
+def verificar_medidor(n):
+    """O medidor conta os `n` espectadores esperando no long-poll e volta a zero quando eles saem."""
+    logica, partida_id, servidor_xml, servidor_bin = preparar()
+    servidor_xml.server_close()
+    servidor_bin.server_close()
+    partida = logica.partidas.obter(partida_id)
+    conhecido = (partida.estado_id, partida.chat.ultimo_seq)
+    threads = [threading.Thread(target=logica.assistir, args=(partida_id,) + conhecido + (10,))
+               for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    prazo = time.monotonic() + 5
+    while logica.partidas.espectadores() < n and time.monotonic() < prazo:
+        time.sleep(0.01)
+    assert logica.partidas.espectadores() == n, "O medidor não conta os espectadores assistindo."
+    jogar(logica, partida_id, random.Random(0), 1)
+    for thread in threads:
+        thread.join()
+    assert logica.partidas.espectadores() == 0, "O medidor ainda conta espectadores que já saíram."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--espectadores', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--rodadas', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    verificar_medidor(20)
+    verificar(args.rodadas, args.seed)
+    print(f"Respostas de assistir iguais às de aguardar_mudanca em {args.rodadas} rodadas.\n")
+
+    print(f"{'espect.':>8} {'transporte':>10} {'método':>17} {'µs CPU/espectador/rodada':>25} {'bytes/resposta':>15}")
+    for n in args.espectadores:
+        for transporte in ("xmlrpc", "binario"):
+            for metodo in ("aguardar_mudanca", "assistir"):
+                cpu, enviados = medir(n, metodo, transporte, args.rodadas, args.seed)
+                respostas = n * args.rodadas
+                print(f"{n:>8} {transporte:>10} {metodo:>17} {cpu / respostas * 1e6:>25.1f} {enviados / respostas:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_ia.py
+"""Busca do bot (ia.py): nós por segundo e profundidade alcançada por prazo, em um processo x vários.
+
+As posições saem de partidas do próprio bot com prazo curto (abertura, meio de
+jogo e final), então são as mesmas em toda execução. Para cada prazo e número
+de processos, mede a profundidade completa alcançada e os nós visitados.
+
+Antes, confere que partidas do bot contra ele mesmo terminam (com vencedor em
+até --limite-jogadas jogadas) em cada layout de --layouts-fim, e que
+--simultaneas buscas no mesmo motor (bots de partidas diferentes) correm ao
+mesmo tempo, sem esperar uma pela outra.
+
+    python -m benchmarks.bench_ia --prazos 0.5 1 2 --processos 4
+"""
+import argparse
+import os
+import threading
+import time
+
+from ia import MotorIA
+from tabuleiro import criar_jogo
+
+
+def posicoes(motor, jogadas_ate=(0, 30, 60)):
+    """Tabuleiros (e jogador da vez) depois de N jogadas de bot contra bot."""
+    jogo = criar_jogo("bits")
+    resultado = []
+    for k in range(max(jogadas_ate) + 1):
+        if k in jogadas_ate:
+            resultado.append((k, [linha[:] for linha in jogo.get_board()], jogo.current_turn))
+        if jogo.winner:
+            break
+        origem, destino, _ = motor.escolher_jogada(jogo.get_board(), jogo.current_turn, 0.05)
+        jogo.move_piece(jogo.current_turn, origem, destino)
+    return resultado
+
+
+def jogar_ate_o_fim(motor, layout, tempo, limite):
+    """Bot contra bot no `layout`. Retorna (vencedor, jogadas); vencedor None se passou do limite."""
+    jogo = criar_jogo("bits", layout=layout)
+    for jogada in range(1, limite + 1):
+        origem, destino, _ = motor.escolher_jogada(jogo.get_board(), jogo.current_turn, tempo, layout)
+        if origem is None:
+            break
+        jogo.move_piece(jogo.current_turn, origem, destino)
+        if jogo.winner:
+            return jogo.winner, jogada
+    return None, jogada
+
+
+def buscas_simultaneas(motor, n, tempo):
+    """Tempo de relógio de `n` buscas de `tempo` segundos disparadas juntas no mesmo motor."""
+    board = criar_jogo().get_board()
+    threads = [threading.Thread(target=motor.escolher_jogada, args=(board, 1, tempo)) for _ in range(n)]
+    inicio = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.monotonic() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--prazos', type=float, nargs='+', default=[0.5, 1.0, 2.0])
+    parser.add_argument('--processos', type=int, default=os.cpu_count() or 2,
+                        help='Processos do modo paralelo (padrão: número de CPUs).')
+    parser.add_argument('--layouts-fim', nargs='*', default=["classico", "grande"],
+                        help='Layouts em que uma partida do bot contra ele mesmo precisa terminar.')
+    parser.add_argument('--tempo-fim', type=float, default=0.05, help='Segundos por jogada nessas partidas.')
+    parser.add_argument('--limite-jogadas', type=int, default=400)
+    parser.add_argument('--simultaneas', type=int, default=4, help='Buscas disparadas juntas na conferência.')
+    args = parser.parse_args()
+
+    sequencial = MotorIA(1)
+    motores = [(1, sequencial)]
+    if args.processos > 1:
+        motores.append((args.processos, MotorIA(args.processos)))
+    # Sobe os processos do pool antes de medir
+    for _, motor in motores:
+        motor.escolher_jogada(criar_jogo().get_board(), 1, 0.05)
+
+    try:
+        for layout in args.layouts_fim:
+            vencedor, jogadas = jogar_ate_o_fim(sequencial, layout, args.tempo_fim, args.limite_jogadas)
+            assert vencedor, f"{layout}: bot contra bot sem vencedor em {jogadas} jogadas."
+            print(f"{layout}: bot contra bot terminou em {jogadas} jogadas (vencedor: jogador {vencedor}).")
+
+        for processos, motor in motores:
+            duracao = buscas_simultaneas(motor, args.simultaneas, 0.2)
+            assert duracao < 0.2 * (args.simultaneas + 1) / 2, \
+                f"{args.simultaneas} buscas de 0.2s levaram {duracao:.2f}s: uma esperou a outra."
+            print(f"{args.simultaneas} buscas simultâneas de 0.2s com {processos} processo(s): {duracao:.2f}s.")
+
+        print(f"{'jogadas':>8} {'prazo':>6} {'proc':>5} {'prof':>5} {'nós':>9} {'nós/s':>9} {'jogada':>16}")
+        for k, board, jogador in posicoes(sequencial):
+            for prazo in args.prazos:
+                for processos, motor in motores:
+                    origem, destino, info = motor.escolher_jogada(board, jogador, prazo)
+                    print(f"{k:>8} {prazo:>6.1f} {processos:>5} {info['profundidade']:>5} {info['nos']:>9} "
+                          f"{info['nos'] / max(info['segundos'], 1e-9):>9.0f} {str(origem) + '->' + str(destino):>16}")
+    finally:
+        for _, motor in motores:
+            motor.fechar()
+
+
+if __name__ == "__main__":
+    main()
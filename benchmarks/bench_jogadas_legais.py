@@ -0,0 +1,103 @@
+# benchmarks/bench_jogadas_legais.py
+"""Gerador de jogadas legais (BFS) x a recursão que o cliente usava, em tabuleiros lotados de meio de jogo.
+
+As posições têm as 20 peças espalhadas no miolo do tabuleiro, onde as cadeias
+de pulos são mais longas. Para cada posição calcula as jogadas de todas as
+peças do jogador 1 com cada abordagem.
+
+    python -m benchmarks.bench_jogadas_legais --posicoes 200 --miolo 6
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_motores import posicionar
+from tabuleiro import MOTORES, criar_jogo
+
+
+def recursivo(board, r, c):
+    """Cópia de HalmaClient.calculate_possible_moves/_find_jumps_recursive antes do gerador no servidor."""
+    n = len(board)
+    moves = set()
+    for dr in [-1, 0, 1]:
+        for dc in [-1, 0, 1]:
+            if dr == 0 and dc == 0: continue
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < n and 0 <= nc < n and board[nr][nc] == 0:
+                moves.add((nr, nc))
+    _pulos_recursivo(board, (r, c), moves, set())
+    return moves
+
+
+def _pulos_recursivo(board, current_pos, all_moves, visited_path):
+    n = len(board)
+    r, c = current_pos
+    for dr in [-1, 0, 1]:
+        for dc in [-1, 0, 1]:
+            if dr == 0 and dc == 0: continue
+            jump_over_r, jump_over_c = r + dr, c + dc
+            dest_r, dest_c = r + 2*dr, c + 2*dc
+            if (0 <= dest_r < n and 0 <= dest_c < n and
+                    board[dest_r][dest_c] == 0 and
+                    board[jump_over_r][jump_over_c] != 0):
+                if (dest_r, dest_c) not in visited_path:
+                    all_moves.add((dest_r, dest_c))
+                    new_path = visited_path.copy()
+                    new_path.add((dest_r, dest_c))
+                    _pulos_recursivo(board, (dest_r, dest_c), all_moves, new_path)
+
+
+def posicao_lotada(rng, miolo, n=10):
+    inicio = (n - miolo) // 2
+    casas = [(r, c) for r in range(inicio, inicio + miolo) for c in range(inicio, inicio + miolo)]
+    escolhidas = rng.sample(casas, 20)
+    return escolhidas[:10], escolhidas[10:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posicoes', type=int, default=200)
+    parser.add_argument('--miolo', type=int, default=6, help='Lado da região central onde as peças ficam (padrão: 6).')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    posicoes = [posicao_lotada(rng, args.miolo) for _ in range(args.posicoes)]
+
+    inicio = time.perf_counter()
+    referencia = []
+    for p1, p2 in posicoes:
+        jogo = criar_jogo("lista")
+        posicionar(jogo, p1, p2)
+        referencia.append({(r, c): recursivo(jogo.board, r, c) for r, c in p1})
+    tempos = {"recursivo": time.perf_counter() - inicio}
+
+    divergentes = 0
+    for motor in MOTORES:
+        jogos = []
+        for p1, p2 in posicoes:
+            jogo = criar_jogo(motor)
+            posicionar(jogo, p1, p2)
+            jogos.append(jogo)
+        inicio = time.perf_counter()
+        resultados = [jogo.all_legal_moves(1) for jogo in jogos]
+        tempos[f"BFS {motor}"] = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        for jogo in jogos:
+            jogo.all_legal_moves(1)
+        tempos[f"BFS {motor} (cache)"] = time.perf_counter() - inicio
+        if motor == "lista":
+            # A recursão antiga tratava a origem como ocupada e podia pulá-la; o BFS não
+            divergentes = sum(
+                {o: set(d) for o, d in res.items()} != {o: d for o, d in ref.items() if d}
+                for res, ref in zip(resultados, referencia))
+
+    print(f"{args.posicoes} posições, 20 peças num miolo {args.miolo}x{args.miolo}; "
+          f"{divergentes} com resultado diferente da recursão (que deixava pular a própria origem).\n")
+    print(f"{'abordagem':>18} {'por posição':>14} {'vs recursivo':>13}")
+    for nome, tempo in tempos.items():
+        print(f"{nome:>18} {tempo / args.posicoes * 1e6:>12.1f}µs {tempos['recursivo'] / tempo:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
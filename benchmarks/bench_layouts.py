@@ -0,0 +1,177 @@
+# benchmarks/bench_layouts.py
+"""Validação de jogadas e verificação de vitória por layout (10x10 a 16x16, 2 a 4 jogadores).
+
+Para cada layout joga partidas aleatórias e guarda as posições por que passou.
+Em cada posição mede:
+- validação: as jogadas legais de todas as peças do jogador da vez, com o
+  cache vazio, na BFS antiga (que confere os limites do tabuleiro a cada passo)
+  e nos dois motores (que consultam as tabelas do layout);
+- vitória: a varredura das casas de destino de todos os jogadores, feita a cada
+  jogada antes dos layouts, contra o contador por campo do motor "lista" e a
+  comparação de máscaras do motor "bits" (check_win_condition(jogador)).
+Antes de medir, confere que a BFS antiga e os dois motores dão as mesmas
+jogadas e que a varredura e os motores concordam sobre o vencedor.
+
+    python -m benchmarks.bench_layouts --posicoes 300 --layouts classico classico-12 grande tres quatro
+"""
+import argparse
+import random
+import time
+from collections import deque
+
+from layouts import DIRECOES, obter_layout
+from tabuleiro import criar_jogo
+
+
+def jogadas_antigas(board, player, origem):
+    """Cópia de HalmaGame.legal_moves antes das tabelas do layout (sem o cache)."""
+    n = len(board)
+    r, c = origem
+    destinos = set()
+    for dr, dc in DIRECOES:
+        nr, nc = r + dr, c + dc
+        if 0 <= nr < n and 0 <= nc < n and board[nr][nc] == 0:
+            destinos.add((nr, nc))
+    visitados = {origem}
+    fila = deque([origem])
+    while fila:
+        cr, cc = fila.popleft()
+        for dr, dc in DIRECOES:
+            jr, jc = cr + 2 * dr, cc + 2 * dc
+            meio = (cr + dr, cc + dc)
+            if (0 <= jr < n and 0 <= jc < n and board[jr][jc] == 0 and (jr, jc) not in visitados
+                    and board[meio[0]][meio[1]] != 0 and meio != origem):
+                visitados.add((jr, jc))
+                fila.append((jr, jc))
+    visitados.discard(origem)
+    return sorted(destinos | visitados)
+
+
+def todas_antigas(board, player):
+    n = len(board)
+    todas = {}
+    for r in range(n):
+        for c in range(n):
+            if board[r][c] == player:
+                destinos = jogadas_antigas(board, player, (r, c))
+                if destinos:
+                    todas[(r, c)] = destinos
+    return todas
+
+
+def vencedor_por_varredura(board, destinos):
+    """Como o check_win_condition antigo: percorre as casas de destino de cada jogador."""
+    vencedor = None
+    for player in range(1, len(destinos)):
+        if all(board[r][c] == player for r, c in destinos[player]):
+            vencedor = player
+    return vencedor
+
+
+def distancia(casa, alvo):
+    return max(abs(casa[0] - alvo[0]), abs(casa[1] - alvo[1]))
+
+
+def posicoes(layout, quantidade, seed):
+    """(board, jogador da vez, último a jogar) de partidas aleatórias até juntar `quantidade` posições."""
+    rng = random.Random(seed)
+    resultado = []
+    while len(resultado) < quantidade:
+        jogo = criar_jogo("lista", layout=layout)
+        ultimo = 1
+        for _ in range(quantidade - len(resultado)):
+            resultado.append(([linha[:] for linha in jogo.board], jogo.current_turn, ultimo))
+            legais = jogo.all_legal_moves(jogo.current_turn)
+            if jogo.winner or not legais:
+                break
+            # Quase sempre a jogada que mais avança, para as partidas chegarem ao fim do jogo
+            alvo = layout.alvos[jogo.current_turn]
+            candidatas = [(distancia(d, alvo) - distancia(o, alvo), o, d) for o, ds in legais.items() for d in ds]
+            _, origem, destino = min(candidatas) if rng.random() < 0.8 else rng.choice(candidatas)
+            ultimo = jogo.current_turn
+            jogo.move_piece(ultimo, origem, destino)
+    return resultado
+
+
+def verificar(layout, amostra):
+    for board, vez, ultimo in amostra:
+        antigas = todas_antigas(board, vez)
+        vencedor = vencedor_por_varredura(board, layout.destinos)
+        for motor in ("lista", "bits"):
+            jogo = criar_jogo(motor, layout=layout)
+            jogo.restaurar(board, vez, None)
+            assert jogo.all_legal_moves(vez) == antigas, f"{layout.nome}/{motor}: jogadas divergem da BFS antiga."
+            jogo.check_win_condition()
+            assert jogo.winner == vencedor, f"{layout.nome}/{motor}: vencedor diverge da varredura."
+
+
+def medir_validacao(layout, amostra):
+    """µs por posição para listar as jogadas legais do jogador da vez: BFS antiga, lista e bits."""
+    inicio = time.perf_counter()
+    for board, vez, _ in amostra:
+        todas_antigas(board, vez)
+    tempos = {"antiga": time.perf_counter() - inicio}
+    for motor in ("lista", "bits"):
+        jogo = criar_jogo(motor, layout=layout)
+        gasto = 0.0
+        for board, vez, _ in amostra:
+            jogo.restaurar(board, vez, None)  # Também esvazia o cache de jogadas
+            inicio = time.perf_counter()
+            jogo.all_legal_moves(vez)
+            gasto += time.perf_counter() - inicio
+        tempos[motor] = gasto
+    return {nome: segundos / len(amostra) * 1e6 for nome, segundos in tempos.items()}
+
+
+def medir_vitoria(layout, amostra, repeticoes):
+    """µs por verificação depois de uma jogada: varredura antiga, contador (lista) e máscara (bits)."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for board, _, _ in amostra:
+            vencedor_por_varredura(board, layout.destinos)
+    tempos = {"varredura": time.perf_counter() - inicio}
+    for motor in ("lista", "bits"):
+        jogo = criar_jogo(motor, layout=layout)
+        gasto = 0.0
+        for board, vez, ultimo in amostra:
+            jogo.restaurar(board, vez, None)
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                jogo.check_win_condition(ultimo)
+            gasto += time.perf_counter() - inicio
+        tempos[motor] = gasto
+    return {nome: segundos / (len(amostra) * repeticoes) * 1e6 for nome, segundos in tempos.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--layouts', nargs='+', default=["classico", "classico-12", "grande", "tres", "quatro"])
+    parser.add_argument('--posicoes', type=int, default=300)
+    parser.add_argument('--repeticoes', type=int, default=20, help='Verificações de vitória por posição.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    layouts = [obter_layout(nome) for nome in args.layouts]
+    amostras = {}
+    for layout in layouts:
+        inicio = time.perf_counter()
+        amostras[layout.nome] = posicoes(layout, args.posicoes, args.seed)
+        verificar(layout, amostras[layout.nome])
+        # Layouts com o mesmo nome devolvem a mesma instância: tabelas calculadas uma única vez
+        assert obter_layout(layout.nome) is layout
+        print(f"{layout.nome}: {args.posicoes} posições conferidas em {time.perf_counter() - inicio:.1f}s.")
+
+    print(f"\n{'':>12} {'':>5} {'':>5} {'':>6} {'validação (µs/posição)':>28}   {'vitória (µs/verificação)':>30}")
+    print(f"{'layout':>12} {'lado':>5} {'jog.':>5} {'peças':>6} {'antiga':>8} {'lista':>9} {'bits':>9}"
+          f"   {'varredura':>10} {'contador':>9} {'máscara':>9}")
+    for layout in layouts:
+        amostra = amostras[layout.nome]
+        validacao = medir_validacao(layout, amostra)
+        vitoria = medir_vitoria(layout, amostra, args.repeticoes)
+        print(f"{layout.nome:>12} {layout.board_size:>5} {layout.jogadores:>5} {layout.pecas_por_jogador:>6}"
+              f" {validacao['antiga']:>8.1f} {validacao['lista']:>9.1f} {validacao['bits']:>9.1f}"
+              f"   {vitoria['varredura']:>10.2f} {vitoria['lista']:>9.2f} {vitoria['bits']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
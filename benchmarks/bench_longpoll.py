@@ -0,0 +1,108 @@
+# benchmarks/bench_longpoll.py
+"""Compara polling de 1 s com o long-poll `aguardar_mudanca`.
+
+Mede (1) a latência entre um jogador chamar `fazer_jogada` e o oponente
+receber o novo estado, em ms, e (2) o tempo de CPU gasto pelo processo
+servidor com --clientes clientes ociosos durante --ocioso segundos.
+
+    python -m benchmarks.bench_longpoll --jogadas 20 --clientes 100
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+import xmlrpc.client
+
+from benchmarks.bench_servidor import esperar_porta
+from benchmarks.comum import ms, passo_aleatorio, percentil
+
+
+def cpu_do_processo(pid):
+    """Segundos de CPU (usuário + sistema) de outro processo, lidos de /proc (só Linux)."""
+    with open(f"/proc/{pid}/stat") as f:
+        campos = f.read().rsplit(")", 1)[1].split()
+    return (int(campos[11]) + int(campos[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def observar(url, partida_id, modo, recebidos, parar):
+    proxy = xmlrpc.client.ServerProxy(url, allow_none=True)
+    ultimo = -1
+    while not parar.is_set():
+        try:
+            if modo == "longpoll":
+                estado = proxy.aguardar_mudanca(partida_id, ultimo, 1 << 30, 25)["estado"]
+            else:
+                estado = proxy.get_estado_do_jogo(partida_id)
+                proxy.get_novas_mensagens_chat(partida_id, 1 << 30)
+        except (OSError, xmlrpc.client.Error):
+            return  # Servidor encerrado no fim do benchmark
+        if estado["estado_id"] != ultimo:
+            ultimo = estado["estado_id"]
+            recebidos[ultimo] = time.perf_counter()
+        if modo == "polling":
+            time.sleep(1)
+
+
+def latencia_de_jogada(url, modo, jogadas):
+    proxy = xmlrpc.client.ServerProxy(url, allow_none=True)
+    partida_id = proxy.criar_partida()
+    jogadores = {1: proxy.registrar_jogador(partida_id)[1], 2: proxy.registrar_jogador(partida_id)[1]}
+    recebidos, parar = {}, threading.Event()
+    threading.Thread(target=observar, args=(url, partida_id, modo, recebidos, parar), daemon=True).start()
+    latencias = []
+    for _ in range(jogadas):
+        estado = proxy.get_estado_do_jogo(partida_id)
+        movimento = passo_aleatorio(estado["board"], estado["turn"])
+        enviado = time.perf_counter()
+        proxy.fazer_jogada(partida_id, jogadores[estado["turn"]], *movimento)
+        alvo = estado["estado_id"] + 1
+        while alvo not in recebidos:
+            time.sleep(0.0005)
+        latencias.append(recebidos[alvo] - enviado)
+        time.sleep(0.3)  # Espaça as jogadas para não alinhar com o ciclo do polling
+    parar.set()
+    return latencias
+
+
+def cpu_ocioso(url, pid, modo, clientes, segundos):
+    proxy = xmlrpc.client.ServerProxy(url, allow_none=True)
+    partidas = [proxy.criar_partida() for _ in range(max(1, clientes // 2))]
+    parar = threading.Event()
+    for i in range(clientes):
+        threading.Thread(target=observar, args=(url, partidas[i // 2], modo, {}, parar), daemon=True).start()
+    time.sleep(1)
+    antes = cpu_do_processo(pid)
+    time.sleep(segundos)
+    gasto = cpu_do_processo(pid) - antes
+    parar.set()
+    return gasto
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jogadas', type=int, default=20)
+    parser.add_argument('--clientes', type=int, default=100)
+    parser.add_argument('--ocioso', type=float, default=10.0)
+    parser.add_argument('--port', type=int, default=8750)
+    args = parser.parse_args()
+
+    servidor = subprocess.Popen([sys.executable, "servidor.py", "--port", str(args.port)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        esperar_porta(args.port)
+        url = f"http://127.0.0.1:{args.port}"
+        print(f"{'modo':>9} {'jogada→tela p50':>16} {'p99':>12} {'CPU ociosa':>16}")
+        for modo in ("polling", "longpoll"):
+            latencias = latencia_de_jogada(url, modo, args.jogadas)
+            cpu = cpu_ocioso(url, servidor.pid, modo, args.clientes, args.ocioso)
+            print(f"{modo:>9} {ms(percentil(latencias, 50)):>16} {ms(percentil(latencias, 99)):>12} "
+                  f"{cpu / args.ocioso * 100:>8.2f}% de 1 CPU")
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/bench_motores.py
+"""Paridade e micro-benchmark dos motores de tabuleiro ("lista" x "bits").
+
+Primeiro joga partidas aleatórias (com jogadas válidas e inválidas) nos dois
+motores ao mesmo tempo e confere, jogada a jogada, retorno, tabuleiro, turno,
+vencedor e jogadas legais; depois compara verificações de vitória em posições
+aleatórias.
+Em seguida mede jogadas/s e verificações de vitória/s de cada motor.
+
+    python -m benchmarks.bench_motores --partidas 200 --jogadas 300
+"""
+import argparse
+import random
+import time
+
+from tabuleiro import MOTORES, criar_jogo
+
+
+def proposta(board, player, rng):
+    """Uma jogada candidata: quase sempre de uma peça do jogador até 2 casas, às vezes qualquer coisa."""
+    n = len(board)
+    if rng.random() < 0.1:
+        return rng.choice((1, 2)), (rng.randrange(n), rng.randrange(n)), (rng.randrange(n), rng.randrange(n))
+    pecas = [(r, c) for r in range(n) for c in range(n) if board[r][c] == player]
+    r, c = rng.choice(pecas)
+    return player, (r, c), (r + rng.randint(-2, 2), c + rng.randint(-2, 2))
+
+
+def conferir_partidas(partidas, jogadas, seed):
+    rng = random.Random(seed)
+    validas = 0
+    for _ in range(partidas):
+        lista, bits = criar_jogo("lista"), criar_jogo("bits")
+        for _ in range(jogadas):
+            legais = lista.all_legal_moves(lista.current_turn)
+            assert legais == bits.all_legal_moves(bits.current_turn)
+            if rng.random() < 0.3:  # Cadeias de pulos longas raramente saem de `proposta`
+                origem = rng.choice(list(legais))
+                player, destino = lista.current_turn, rng.choice(legais[origem])
+            else:
+                player, origem, destino = proposta(lista.get_board(), lista.current_turn, rng)
+            resultado = lista.move_piece(player, origem, destino)
+            assert resultado == bits.move_piece(player, origem, destino), (origem, destino)
+            assert lista.get_board() == bits.get_board()
+            assert (lista.current_turn, lista.winner) == (bits.current_turn, bits.winner)
+            validas += resultado[0]
+    return validas
+
+
+def posicionar(jogo, casas_p1, casas_p2):
+    """Coloca as peças diretamente no motor, sem passar por move_piece."""
+    board = [[0] * jogo.board_size for _ in range(jogo.board_size)]
+    for r, c in casas_p1: board[r][c] = 1
+    for r, c in casas_p2: board[r][c] = 2
+    jogo.restaurar(board, 1, None)
+
+
+def posicao_aleatoria(rng, n=10):
+    casas = [(r, c) for r in range(n) for c in range(n)]
+    base = criar_jogo("lista")
+    campo_p1 = [(r, c) for r in range(n) for c in range(n) if base.board[r][c] == 1]
+    campo_p2 = [(r, c) for r in range(n) for c in range(n) if base.board[r][c] == 2]
+    # Metade das vezes enche o destino de um dos jogadores para exercitar a vitória
+    if rng.random() < 0.5:
+        p1 = campo_p2[:]
+        p2 = rng.sample([x for x in casas if x not in p1], 10)
+    else:
+        p2 = campo_p1[:] if rng.random() < 0.5 else rng.sample(casas, 10)
+        p1 = rng.sample([x for x in casas if x not in p2], 10)
+    return p1, p2
+
+
+def conferir_vitorias(posicoes, seed):
+    rng = random.Random(seed)
+    vitorias = 0
+    for _ in range(posicoes):
+        p1, p2 = posicao_aleatoria(rng)
+        lista, bits = criar_jogo("lista"), criar_jogo("bits")
+        posicionar(lista, p1, p2)
+        posicionar(bits, p1, p2)
+        lista.check_win_condition()
+        bits.check_win_condition()
+        assert lista.winner == bits.winner
+        vitorias += lista.winner is not None
+    return vitorias
+
+
+def gerar_sequencia(jogadas, seed):
+    """Jogadas válidas de uma partida aleatória, para repetir igual em todos os motores."""
+    rng = random.Random(seed)
+    jogo = criar_jogo("lista")
+    sequencia = []
+    while len(sequencia) < jogadas and not jogo.winner:
+        player, origem, destino = proposta(jogo.get_board(), jogo.current_turn, rng)
+        if jogo.move_piece(player, origem, destino)[0]:
+            sequencia.append((player, origem, destino))
+    return sequencia
+
+
+def medir(motor, sequencia, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        jogo = criar_jogo(motor)
+        for player, origem, destino in sequencia:
+            jogo.move_piece(player, origem, destino)
+    jogadas_s = len(sequencia) * repeticoes / (time.perf_counter() - inicio)
+
+    checks = len(sequencia) * repeticoes
+    inicio = time.perf_counter()
+    for _ in range(checks):
+        jogo.check_win_condition(1)  # Como depois de uma jogada do jogador 1
+    return jogadas_s, checks / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--partidas', type=int, default=200)
+    parser.add_argument('--jogadas', type=int, default=300)
+    parser.add_argument('--repeticoes', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    validas = conferir_partidas(args.partidas, args.jogadas, args.seed)
+    vitorias = conferir_vitorias(args.partidas * 10, args.seed)
+    print(f"Paridade OK: {args.partidas} partidas ({validas} jogadas válidas) e "
+          f"{args.partidas * 10} posições ({vitorias} com vencedor).\n")
+
+    sequencia = gerar_sequencia(args.jogadas, args.seed)
+    print(f"{'motor':>6} {'jogadas/s':>12} {'vitória/s':>12}")
+    for motor in MOTORES:
+        jogadas_s, checks_s = medir(motor, sequencia, args.repeticoes)
+        print(f"{motor:>6} {jogadas_s:>12.0f} {checks_s:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
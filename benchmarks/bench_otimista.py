@@ -0,0 +1,208 @@
+# benchmarks/bench_otimista.py
+"""Latência percebida de uma jogada no cliente: clique bloqueante x jogada otimista com fila de envio.
+
+Sem janela: o jogador 1 é uma SessaoJogador com um desenho de mentira, falando
+com a lógica do servidor em processo através de um proxy que espera --atraso
+ms de ida e volta (metade antes, metade depois) e passa cada resposta pelo
+XML-RPC. O oponente joga direto na lógica. Para cada atraso e cada modo mede:
+- tela: do clique até o desenho mostrar a peça no destino;
+- interface presa: quanto tempo o clique e o envio do chat ocuparam a thread da interface;
+- jogada+chat: do clique até as respostas de uma jogada e de uma mensagem de
+  chat enviada logo em seguida (bloqueante: duas idas e voltas; otimista: as
+  duas ações seguem juntas pela fila).
+A cada --recusa-a-cada jogadas o jogador tenta uma jogada que o servidor
+recusa, e o benchmark confere que ela aparece e some do tabuleiro. Depois de
+cada resposta, o tabuleiro mostrado precisa ser igual ao do servidor.
+
+    python -m benchmarks.bench_otimista --atraso 0 20 50 100 200 --jogadas 15
+"""
+import argparse
+import random
+import threading
+import time
+import xmlrpc.client
+
+from benchmarks.comum import ms, passo_aleatorio, percentil
+from servidor import HalmaServerLogic
+from sincronizacao import SessaoJogador
+
+
+class ServidorComAtraso:
+    """Proxy para a lógica em processo que imita a rede: espera e serializa como o XML-RPC."""
+
+    def __init__(self, logica, atraso):
+        self._logica = logica
+        self._meio = atraso / 2
+
+    def __getattr__(self, nome):
+        metodo = getattr(self._logica, nome)
+
+        def chamar(*args):
+            args = xmlrpc.client.loads(xmlrpc.client.dumps(args, allow_none=True))[0]
+            time.sleep(self._meio)
+            resultado = metodo(*args)
+            time.sleep(self._meio)
+            return xmlrpc.client.loads(xmlrpc.client.dumps((resultado,), methodresponse=True, allow_none=True))[0][0]
+        return chamar
+
+
+class SessaoComAtraso(SessaoJogador):
+    def __init__(self, logica, atraso):
+        super().__init__("sem-rede", 0)
+        self.logica, self.atraso = logica, atraso
+
+    def conectar(self):
+        return ServidorComAtraso(self.logica, self.atraso)
+
+
+class DesenhoFalso:
+    """Guarda o instante em que a peça aparece no destino esperado (`esperar`)."""
+
+    def __init__(self):
+        self.esperado = None
+        self.apareceu = None
+
+    def esperar(self, player, origem, destino):
+        self.esperado = (player, origem, destino)
+        self.apareceu = None
+
+    def desenhar(self, board):
+        if self.esperado and self.apareceu is None:
+            player, (from_r, from_c), (to_r, to_c) = self.esperado
+            if board[to_r][to_c] == player and board[from_r][from_c] == 0:
+                self.apareceu = time.perf_counter()
+
+
+class ClienteSemTela:
+    """O caminho do clique do jogador.py (on_canvas_click / send_chat_message) sem o Tkinter."""
+
+    def __init__(self, sessao, otimista):
+        self.sessao = sessao
+        self.otimista = otimista
+        self.desenho = DesenhoFalso()
+        self.board = sessao.espelho.board
+        self.respondido = threading.Event()
+        self.recusas = 0
+        sessao.ao_atualizar = self.processar_resposta
+
+    def processar_resposta(self, mudou, mensagens, lacuna):
+        if mudou:
+            self.board = self.sessao.tabuleiro()
+            self.desenho.desenhar(self.board)
+
+    def clicar(self, origem, destino, chat=None):
+        """Faz a jogada (e manda `chat` logo depois). Retorna quando a interface estaria livre de novo."""
+        self.respondido.clear()
+        if self.otimista:
+            faltam = [1 + (chat is not None)]
+
+            def concluir():
+                faltam[0] -= 1
+                if not faltam[0]:
+                    self.respondido.set()
+
+            def responder_jogada(resultados, erro):
+                if erro is None and not resultados[0][0]:
+                    self.recusas += 1
+                concluir()
+
+            self.sessao.jogar(origem, destino, responder_jogada)
+            with self.sessao.lock:
+                self.processar_resposta(True, [], False)
+            if chat is not None:
+                self.sessao.fila.enviar([["chat", chat]], lambda resultados, erro: concluir())
+        else:
+            [(sucesso, _)] = self.sessao.sincronizar(self.sessao.servidor, [["jogada", origem, destino]])
+            self.recusas += not sucesso
+            with self.sessao.lock:
+                self.processar_resposta(True, [], False)
+            if chat is not None:
+                self.sessao.sincronizar(self.sessao.servidor, [["chat", chat]])
+            self.respondido.set()
+
+
+def jogada_recusada(board, player):
+    """Uma peça do jogador para uma casa vazia longe demais: o servidor recusa, o cliente mostra antes."""
+    pecas = [(r, c) for r, linha in enumerate(board) for c, p in enumerate(linha) if p == player]
+    vazias = [(r, c) for r, linha in enumerate(board) for c, p in enumerate(linha) if p == 0]
+    origem = pecas[0]
+    destino = max(vazias, key=lambda casa: abs(casa[0] - origem[0]) + abs(casa[1] - origem[1]))
+    return origem, destino
+
+
+def rodada(atraso, otimista, args):
+    logica = HalmaServerLogic()
+    sessao = SessaoComAtraso(logica, atraso)
+    sessao.entrar()
+    _, oponente, _ = logica.registrar_jogador(sessao.partida_id)
+    cliente = ClienteSemTela(sessao, otimista)
+    sessao.sincronizar()
+    rng = random.Random(args.seed)
+    tela, presa, com_chat = [], [], []
+    tentativas_recusadas = 0
+    try:
+        for jogada in range(1, args.jogadas + 1):
+            if not sessao.minha_vez:
+                break
+            recusar = args.recusa_a_cada and jogada % args.recusa_a_cada == 0
+            if recusar:
+                origem, destino = jogada_recusada(sessao.espelho.board, sessao.player_id)
+                tentativas_recusadas += 1
+            else:
+                origem, destino = rng.choice([(o, d) for o, ds in sorted(sessao.jogadas_legais.items()) for d in ds])
+            cliente.desenho.esperar(sessao.player_id, origem, destino)
+            inicio = time.perf_counter()
+            cliente.clicar(origem, destino, chat=f"jogada {jogada}")
+            presa.append(time.perf_counter() - inicio)
+            if not cliente.respondido.wait(10):
+                raise RuntimeError("O servidor não respondeu à jogada.")
+            com_chat.append(time.perf_counter() - inicio)
+            if not recusar:
+                assert cliente.desenho.apareceu is not None, "A peça nunca apareceu no destino."
+                tela.append(cliente.desenho.apareceu - inicio)
+            elif otimista:
+                assert cliente.desenho.apareceu is not None, "A jogada recusada não chegou a aparecer."
+
+            with sessao.lock:
+                assert not sessao.pendentes
+                assert cliente.board == logica.partidas.obter(sessao.partida_id).jogo.get_board(), \
+                    "O tabuleiro mostrado diverge do servidor depois da resposta."
+            if recusar:
+                continue
+            estado = logica.get_estado_do_jogo(sessao.partida_id)
+            if estado["winner"]:
+                break
+            movimento = passo_aleatorio(estado["board"], oponente, rng)
+            if movimento is None:
+                break
+            logica.fazer_jogada(sessao.partida_id, oponente, *movimento)
+            sessao.sincronizar()
+        assert cliente.recusas == tentativas_recusadas, "Nem toda jogada recusada foi notada."
+    finally:
+        sessao.fila.fechar()
+        logica._fechar()
+    return tela, presa, com_chat, tentativas_recusadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--atraso', type=float, nargs='+', default=[0, 20, 50, 100, 200],
+                        help='Ida e volta simulada da rede, em ms.')
+    parser.add_argument('--jogadas', type=int, default=15)
+    parser.add_argument('--recusa-a-cada', type=int, default=5, help='0 desliga as jogadas recusadas.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'atraso':>7} {'modo':>11} {'tela p50':>12} {'tela p99':>12} {'presa p50':>12} "
+          f"{'jogada+chat p50':>16} {'recusadas':>10}")
+    for atraso in args.atraso:
+        for otimista in (False, True):
+            tela, presa, com_chat, recusadas = rodada(atraso / 1000, otimista, args)
+            print(f"{atraso:>5g}ms {'otimista' if otimista else 'bloqueante':>11} {ms(percentil(tela, 50)):>12} "
+                  f"{ms(percentil(tela, 99)):>12} {ms(percentil(presa, 50)):>12} "
+                  f"{ms(percentil(com_chat, 50)):>16} {recusadas:>10}")
+    print("\nDepois de cada resposta o tabuleiro mostrado era o do servidor; jogadas recusadas foram desfeitas.")
+
+
+if __name__ == "__main__":
+    main()
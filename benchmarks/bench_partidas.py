@@ -0,0 +1,78 @@
+# benchmarks/bench_partidas.py
+"""Joga N partidas simuladas ao mesmo tempo e mede jogadas/s e latência p99 por jogada.
+
+    python -m benchmarks.bench_partidas --partidas 1 10 100 500 --jogadas 40
+    python -m benchmarks.bench_partidas --url http://127.0.0.1:8000   # contra um servidor rodando
+"""
+import argparse
+import contextlib
+import os
+import random
+import threading
+import time
+import xmlrpc.client
+
+from benchmarks.comum import ms, passo_aleatorio, percentil
+from servidor import HalmaServerLogic
+
+
+def jogar_partida(logica, jogadas, latencias, seed):
+    rng = random.Random(seed)
+    partida_id = logica.criar_partida()
+    _, p1, _ = logica.registrar_jogador(partida_id)
+    _, p2, _ = logica.registrar_jogador(partida_id)
+    jogadores = {1: p1, 2: p2}
+    for _ in range(jogadas):
+        estado = logica.get_estado_do_jogo(partida_id)
+        if estado["winner"]:
+            break
+        movimento = passo_aleatorio(estado["board"], estado["turn"], rng)
+        if movimento is None:
+            break
+        inicio = time.perf_counter()
+        logica.fazer_jogada(partida_id, jogadores[estado["turn"]], *movimento)
+        latencias.append(time.perf_counter() - inicio)
+    logica.desistir(partida_id, p1)
+
+
+def rodada(criar_logica, n_partidas, jogadas):
+    logica = criar_logica()
+    latencias_por_thread = [[] for _ in range(n_partidas)]
+    threads = [
+        threading.Thread(target=jogar_partida,
+                         args=(logica() if callable(logica) else logica, jogadas, latencias_por_thread[i], i))
+        for i in range(n_partidas)
+    ]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+    latencias = [x for lista in latencias_por_thread for x in lista]
+    return len(latencias), duracao, latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--partidas', type=int, nargs='+', default=[1, 10, 100, 500])
+    parser.add_argument('--jogadas', type=int, default=40, help='Jogadas por partida (padrão: 40).')
+    parser.add_argument('--url', default=None, help='Usa um servidor XML-RPC real em vez da lógica em processo.')
+    args = parser.parse_args()
+
+    if args.url:
+        # Um proxy por thread: ServerProxy não é thread-safe
+        criar_logica = lambda: (lambda: xmlrpc.client.ServerProxy(args.url, allow_none=True))
+    else:
+        criar_logica = HalmaServerLogic
+
+    print(f"{'partidas':>8} {'jogadas':>8} {'jogadas/s':>10} {'p50':>12} {'p99':>12}")
+    for n in args.partidas:
+        # Os prints do servidor iriam para o terminal a cada jogada; descarta-os durante a medição
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            total, duracao, latencias = rodada(criar_logica, n, args.jogadas)
+        print(f"{n:>8} {total:>8} {total / duracao:>10.0f} {ms(percentil(latencias, 50)):>12} {ms(percentil(latencias, 99)):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_protocolo.py
+"""XML-RPC x protocolo binário: bytes no fio e tempo de codificar/decodificar por chamada.
+
+Mede requisição + resposta de chamadas típicas (estado completo, sync com
+delta, jogadas legais e chat) nos dois formatos e, com --ponta-a-ponta, também
+chamadas/s reais contra um servidor local com os dois transportes.
+
+    python -m benchmarks.bench_protocolo --repeticoes 3000 --ponta-a-ponta
+"""
+import argparse
+import contextlib
+import os
+import random
+import threading
+import time
+import xmlrpc.client
+
+import protocolo_binario
+from benchmarks.comum import passo_aleatorio
+from servidor import HalmaServerLogic, criar_servidor
+
+
+def preparar_logica():
+    rng = random.Random(3)
+    logica = HalmaServerLogic()
+    partida_id, p1, _ = logica.registrar_jogador()
+    _, p2, _ = logica.registrar_jogador(partida_id)
+    for _ in range(30):
+        estado = logica.get_estado_do_jogo(partida_id)
+        logica.fazer_jogada(partida_id, estado["turn"], *passo_aleatorio(estado["board"], estado["turn"], rng))
+    for i in range(5):
+        logica.enviar_chat(partida_id, p1, f"mensagem {i} do jogador")
+    return logica, partida_id, p1
+
+
+def chamadas(logica, partida_id, player_id):
+    estado_id = logica.get_estado_do_jogo(partida_id)["estado_id"]
+    turno = logica.get_estado_do_jogo(partida_id)["turn"]
+    return {
+        "get_estado_do_jogo": [partida_id],
+        "sync (delta)": [partida_id, player_id, estado_id - 1, 2, [], 0],
+        "get_jogadas_legais": [partida_id, turno],
+        "get_novas_mensagens_chat": [partida_id, -1],
+    }
+
+
+def custo_xmlrpc(metodo, parametros, resultado, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        requisicao = xmlrpc.client.dumps(tuple(parametros), metodo, allow_none=True).encode()
+        resposta = xmlrpc.client.dumps((resultado,), methodresponse=True, allow_none=True).encode()
+        xmlrpc.client.loads(requisicao)
+        xmlrpc.client.loads(resposta)
+    return len(requisicao) + len(resposta), (time.perf_counter() - inicio) / repeticoes
+
+
+def custo_binario(metodo, parametros, resultado, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        requisicao = protocolo_binario.codificar([metodo, parametros])
+        resposta = protocolo_binario.codificar([0, resultado])
+        protocolo_binario.decodificar(requisicao)
+        protocolo_binario.decodificar(resposta)
+    # +4 bytes por quadro de tamanho
+    return len(requisicao) + len(resposta) + 8, (time.perf_counter() - inicio) / repeticoes
+
+
+def ponta_a_ponta(logica, partida_id, chamadas_por_proxy, port):
+    servidor_xml = criar_servidor("127.0.0.1", port, workers=0)
+    servidor_xml.register_instance(logica)
+    threading.Thread(target=servidor_xml.serve_forever, daemon=True).start()
+    servidor_bin = protocolo_binario.iniciar_em_thread("127.0.0.1", port + 1, logica)
+    proxies = {
+        "xmlrpc": xmlrpc.client.ServerProxy(f"http://127.0.0.1:{port}", allow_none=True),
+        "binario": protocolo_binario.ClienteBinario("127.0.0.1", port + 1),
+    }
+    resultados = {}
+    for nome, proxy in proxies.items():
+        inicio = time.perf_counter()
+        for _ in range(chamadas_por_proxy):
+            proxy.get_estado_do_jogo(partida_id)
+        resultados[nome] = chamadas_por_proxy / (time.perf_counter() - inicio)
+    servidor_xml.shutdown()
+    servidor_bin.shutdown()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=3000)
+    parser.add_argument('--ponta-a-ponta', action='store_true')
+    parser.add_argument('--port', type=int, default=8850)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        logica, partida_id, player_id = preparar_logica()
+
+    print(f"{'chamada':>26} {'bytes xml':>10} {'bytes bin':>10} {'µs xml':>9} {'µs bin':>9}")
+    for metodo, parametros in chamadas(logica, partida_id, player_id).items():
+        nome = metodo.split()[0]
+        resultado = getattr(logica, nome)(*parametros)
+        bytes_xml, t_xml = custo_xmlrpc(nome, parametros, resultado, args.repeticoes)
+        bytes_bin, t_bin = custo_binario(nome, parametros, resultado, args.repeticoes)
+        print(f"{metodo:>26} {bytes_xml:>10} {bytes_bin:>10} {t_xml * 1e6:>9.1f} {t_bin * 1e6:>9.1f}")
+
+    if args.ponta_a_ponta:
+        print()
+        for nome, taxa in ponta_a_ponta(logica, partida_id, args.repeticoes, args.port).items():
+            print(f"{nome:>8}: {taxa:.0f} chamadas/s de get_estado_do_jogo (um cliente, conexão persistente)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_servidor.py
+"""Mede vazão e latência de cauda do servidor XML-RPC com centenas de clientes fazendo polling.
+
+Sobe `servidor.py` em um subprocesso para cada valor de --workers e dispara
+clientes que chamam `get_estado_do_jogo` a cada --intervalo segundos, como o
+`loop_de_atualizacao` do jogador. Com --travado, um cliente extra abre uma
+conexão e envia só metade da requisição, simulando um cliente lento.
+
+    python -m benchmarks.bench_servidor --clientes 200 --workers 1 0 16
+"""
+import argparse
+import socket
+import subprocess
+import sys
+import threading
+import time
+import xmlrpc.client
+
+from benchmarks.comum import ms, percentil
+
+
+def esperar_porta(port, prazo=10.0):
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Servidor não respondeu na porta {port}")
+
+
+def cliente_travado(port, parar):
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.sendall(b"POST /RPC2 HTTP/1.0\r\nContent-Length: 500\r\n\r\n<?xml")
+    parar.wait()
+    sock.close()
+
+
+def cliente_polling(url, partida_id, intervalo, parar, latencias, erros):
+    proxy = xmlrpc.client.ServerProxy(url, allow_none=True)
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        try:
+            proxy.get_estado_do_jogo(partida_id)
+            latencias.append(time.perf_counter() - inicio)
+        except Exception:
+            erros.append(1)
+        time.sleep(intervalo)
+
+
+def rodada(port, workers, clientes, intervalo, duracao, travado):
+    servidor = subprocess.Popen(
+        [sys.executable, "servidor.py", "--port", str(port), "--workers", str(workers)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        esperar_porta(port)
+        url = f"http://127.0.0.1:{port}"
+        setup = xmlrpc.client.ServerProxy(url, allow_none=True)
+        partidas = [setup.criar_partida() for _ in range(max(1, clientes // 2))]
+
+        parar = threading.Event()
+        if travado:
+            threading.Thread(target=cliente_travado, args=(port, parar), daemon=True).start()
+        latencias = [[] for _ in range(clientes)]
+        erros = []
+        threads = [
+            threading.Thread(target=cliente_polling,
+                             args=(url, partidas[i // 2], intervalo, parar, latencias[i], erros), daemon=True)
+            for i in range(clientes)
+        ]
+        for t in threads:
+            t.start()
+        time.sleep(duracao)
+        parar.set()
+        for t in threads:
+            t.join(timeout=30)
+        todas = [x for lista in latencias for x in lista]
+        return len(todas) / duracao, todas, len(erros)
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clientes', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 0, 16])
+    parser.add_argument('--intervalo', type=float, default=1.0, help='Segundos entre polls de cada cliente (padrão: 1).')
+    parser.add_argument('--duracao', type=float, default=10.0)
+    parser.add_argument('--travado', action='store_true', help='Inclui um cliente que trava no meio da requisição.')
+    parser.add_argument('--port', type=int, default=8700)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>8} {'p50':>12} {'p99':>12} {'máx':>12} {'erros':>6}")
+    for i, workers in enumerate(args.workers):
+        vazao, latencias, erros = rodada(args.port + i, workers, args.clientes, args.intervalo, args.duracao, args.travado)
+        print(f"{workers:>8} {vazao:>8.0f} {ms(percentil(latencias, 50)):>12} "
+              f"{ms(percentil(latencias, 99)):>12} {ms(max(latencias, default=0.0)):>12} {erros:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# benchmarks/bench_sessoes.py
+"""Custo de expirar sessões: heap com re-push preguiçoso (RegistroSessoes.varrer) x varrer todas as sessões a cada segundo.
+
+Simula, com relógio de mentira, `n` jogadores que fazem uma chamada a cada
+--intervalo segundos (o long-poll do cliente). No instante --queda uma fração
+deles cai de uma vez e para de chamar; os demais continuam até o fim. A cada
+segundo simulado mede a varredura do heap e uma varredura completa (só olhar o
+prazo de cada sessão, como um laço de 1 s faria), e confere que expiraram
+exatamente os jogadores que caíram, no prazo (último contato + timeout + carência).
+
+    python -m benchmarks.bench_sessoes --sessoes 1000 10000 100000 --queda-fracao 0.5
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sessoes import AUSENTE, RegistroSessoes
+
+
+def varredura_completa(registro, agora):
+    """O que um laço de 1 s faria: olhar o prazo de todas as sessões (sem alterar nada)."""
+    vencidas = 0
+    timeout = registro.timeout
+    for sessao in list(registro._por_token.values()):
+        if sessao.visto + timeout <= agora:
+            vencidas += 1
+    return vencidas
+
+
+def simular(n, args, rng):
+    registro = RegistroSessoes(args.timeout, args.carencia)
+    caem = set(rng.sample(range(n), int(n * args.queda_fracao)))
+    # Chamadas agendadas por segundo: {segundo: [(instante, jogador)]}; a primeira de cada
+    # jogador é o registro, espalhado pelo primeiro intervalo como a entrada de clientes reais
+    agenda = {}
+    for i in range(n):
+        t = rng.uniform(0, args.intervalo)
+        agenda.setdefault(int(t), []).append((t, i))
+    ultimo_contato = [None] * n
+    tokens = [None] * n
+
+    toques = 0
+    tempo_toques = 0.0
+    heap, completa = [], []
+    ausentes, expiradas = 0, {}
+    for segundo in range(1, args.duracao + 1):
+        for t, i in sorted(agenda.pop(segundo - 1, [])):
+            if i in caem and t >= args.queda:
+                continue  # Caiu: não chama mais
+            if ultimo_contato[i] is None:
+                tokens[i] = registro.abrir(i, 1, agora=t)
+            else:
+                inicio = time.perf_counter()
+                registro.tocar(tokens[i], i, 1, agora=t)
+                tempo_toques += time.perf_counter() - inicio
+                toques += 1
+            ultimo_contato[i] = t
+            proximo = t + args.intervalo
+            agenda.setdefault(int(proximo), []).append((proximo, i))
+
+        inicio = time.perf_counter()
+        eventos = registro.varrer(agora=float(segundo))
+        heap.append(time.perf_counter() - inicio)
+        for sessao, evento in eventos:
+            if evento == AUSENTE:
+                ausentes += 1
+            else:
+                expiradas[sessao.partida_id] = segundo
+
+        inicio = time.perf_counter()
+        varredura_completa(registro, float(segundo))
+        completa.append(time.perf_counter() - inicio)
+
+    assert set(expiradas) == caem, "Expiraram sessões diferentes das que caíram."
+    for i, segundo in expiradas.items():
+        prazo = ultimo_contato[i] + args.timeout + args.carencia
+        assert prazo <= segundo < prazo + 1, f"Sessão {i} expirou em {segundo}s; prazo era {prazo:.1f}s."
+    return {
+        "caidas": len(caem), "ausentes": ausentes, "toques": toques,
+        "toque_us": tempo_toques / max(1, toques) * 1e6,
+        "heap_media_us": sum(heap) / len(heap) * 1e6, "heap_max_us": max(heap) * 1e6,
+        "heap_mediana_us": statistics.median(heap) * 1e6,
+        "completa_media_us": sum(completa) / len(completa) * 1e6,
+        "completa_mediana_us": statistics.median(completa) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessoes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--queda-fracao', type=float, default=0.5, help='Fração dos jogadores que cai junto.')
+    parser.add_argument('--queda', type=float, default=40.0, help='Instante (s simulados) da queda.')
+    parser.add_argument('--intervalo', type=float, default=25.0, help='Segundos entre chamadas de um jogador.')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--carencia', type=float, default=30.0)
+    parser.add_argument('--duracao', type=int, default=180, help='Segundos simulados.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'':>8} {'':>7} {'':>9} {'varredura do heap (µs)':>30}   {'varredura completa (µs)':>24}")
+    print(f"{'sessões':>8} {'caídas':>7} {'µs/toque':>9} {'média':>9} {'mediana':>9} {'pior':>10}"
+          f"   {'média':>11} {'mediana':>12}")
+    for n in args.sessoes:
+        r = simular(n, args, random.Random(args.seed))
+        print(f"{n:>8} {r['caidas']:>7} {r['toque_us']:>9.2f} {r['heap_media_us']:>9.1f} "
+              f"{r['heap_mediana_us']:>9.1f} {r['heap_max_us']:>10.0f}"
+              f"   {r['completa_media_us']:>11.1f} {r['completa_mediana_us']:>12.1f}")
+    print(f"\nTodas as sessões que caíram (e só elas) expiraram entre último contato + {args.timeout:g}s "
+          f"+ {args.carencia:g}s e um segundo depois.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/bench_sync.py
+"""Requisições e conexões TCP por cliente: ciclo antigo (2 chamadas, conexão nova cada) x `sync` com keep-alive.
+
+Cada cliente simulado faz um ciclo por --intervalo segundos e, a cada
+--jogada-a-cada intervalos, também envia uma jogada (se for a vez dele) e
+uma mensagem de chat:
+- legado: get_estado_do_jogo + get_novas_mensagens_chat (+ fazer_jogada e
+  enviar_chat), fechando a conexão após cada chamada como acontecia com o
+  servidor HTTP/1.0;
+- sync: uma chamada `sync` por ciclo, com as ações embutidas, numa conexão
+  HTTP/1.1 persistente;
+- sync+longpoll: como sync, mas sem intervalo fixo: o cliente fica em
+  long-poll e só acorda quando algo muda ou quando chega a hora de agir.
+
+    python -m benchmarks.bench_sync --clientes 50 --duracao 20
+"""
+import argparse
+import subprocess
+import sys
+import threading
+import time
+import xmlrpc.client
+
+from benchmarks.bench_servidor import esperar_porta
+from benchmarks.comum import passo_aleatorio
+
+
+class TransporteContado(xmlrpc.client.Transport):
+    """Transport que conta requisições e conexões TCP novas; `fechar` imita o servidor HTTP/1.0."""
+
+    def __init__(self, fechar=False):
+        super().__init__()
+        self.fechar = fechar
+        self.requisicoes = 0
+        self.conexoes = 0
+
+    def make_connection(self, host):
+        if self._connection[1] is None or self._connection[0] != host:
+            self.conexoes += 1
+        return super().make_connection(host)
+
+    def request(self, *args, **kwargs):
+        self.requisicoes += 1
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            if self.fechar:
+                self.close()
+
+
+def cliente(url, modo, partida_id, player_id, token, intervalo, jogada_a_cada, parar, transportes):
+    transporte = TransporteContado(fechar=(modo == "legado"))
+    transportes.append(transporte)
+    proxy = xmlrpc.client.ServerProxy(url, transport=transporte, allow_none=True)
+    estado_id, chat_id, legais = -1, -1, []
+    pensar = intervalo * jogada_a_cada
+    proxima_acao = time.monotonic() + pensar
+    while not parar.is_set():
+        agir = time.monotonic() >= proxima_acao
+        if agir:
+            proxima_acao += pensar
+        if modo == "legado":
+            estado = proxy.get_estado_do_jogo(partida_id)
+            novas = proxy.get_novas_mensagens_chat(partida_id, chat_id)["mensagens"]
+            chat_id = novas[-1]["seq"] if novas else chat_id
+            if agir and estado["turn"] == player_id:
+                movimento = passo_aleatorio(estado["board"], player_id)
+                if movimento:
+                    proxy.fazer_jogada(partida_id, player_id, *movimento, token)
+                proxy.enviar_chat(partida_id, player_id, "oi", token)
+        else:
+            acoes = []
+            if agir and estado_id >= 0:
+                if legais:
+                    origem, destinos = legais[0]
+                    acoes.append(["jogada", origem, destinos[0]])
+                acoes.append(["chat", "oi"])
+            espera = max(0.0, proxima_acao - time.monotonic()) if modo == "sync+longpoll" else 0
+            resposta = proxy.sync(partida_id, player_id, estado_id, chat_id, acoes, espera, token)
+            if resposta["estado"]["tipo"] != "igual":
+                legais = resposta.get("jogadas_legais", [])
+            estado_id = resposta["estado"]["estado_id"]
+            if resposta["mensagens"]:
+                chat_id = resposta["mensagens"][-1]["seq"]
+        if modo != "sync+longpoll":
+            time.sleep(intervalo)
+
+
+def rodada(url, modo, clientes, intervalo, jogada_a_cada, duracao):
+    setup = xmlrpc.client.ServerProxy(url, allow_none=True)
+    parar, transportes, threads = threading.Event(), [], []
+    for _ in range(max(1, clientes // 2)):
+        partida_id = setup.criar_partida()
+        for _ in range(2):
+            _, player_id, token = setup.registrar_jogador(partida_id)
+            threads.append(threading.Thread(
+                target=cliente, daemon=True,
+                args=(url, modo, partida_id, player_id, token, intervalo, jogada_a_cada, parar, transportes)))
+    for t in threads:
+        t.start()
+    time.sleep(duracao)
+    parar.set()
+    for t in threads:
+        t.join(timeout=10)
+    requisicoes = sum(t.requisicoes for t in transportes)
+    conexoes = sum(t.conexoes for t in transportes)
+    n = len(transportes)
+    return requisicoes / duracao, requisicoes / duracao / n, conexoes / n * 60 / duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clientes', type=int, default=50)
+    parser.add_argument('--intervalo', type=float, default=1.0)
+    parser.add_argument('--jogada-a-cada', type=int, default=5, help='Intervalos entre ações do cliente (padrão: 5).')
+    parser.add_argument('--duracao', type=float, default=20.0)
+    parser.add_argument('--port', type=int, default=8800)
+    args = parser.parse_args()
+
+    servidor = subprocess.Popen([sys.executable, "servidor.py", "--port", str(args.port)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        esperar_porta(args.port)
+        url = f"http://127.0.0.1:{args.port}"
+        print(f"{'modo':>14} {'req/s total':>12} {'req/s/cliente':>14} {'conexões/cliente/min':>21}")
+        for modo in ("legado", "sync", "sync+longpoll"):
+            total, por_cliente, conexoes = rodada(url, modo, args.clientes, args.intervalo,
+                                                  args.jogada_a_cada, args.duracao)
+            print(f"{modo:>14} {total:>12.1f} {por_cliente:>14.2f} {conexoes:>21.1f}")
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+if __name__ == "__main__":
+    main()
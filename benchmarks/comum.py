@@ -0,0 +1,32 @@
+# benchmarks/comum.py
+"""Utilidades compartilhadas pelos scripts de benchmark (rode a partir da raiz: python -m benchmarks.<nome>)."""
+import random
+
+
+def percentil(valores, p):
+    """Percentil `p` (0-100) por vizinho mais próximo; 0.0 para lista vazia."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100.0 * len(ordenados))) - 1))
+    return ordenados[indice]
+
+
+def ms(segundos):
+    return f"{segundos * 1000:.3f} ms"
+
+
+def passo_aleatorio(board, player, rng=random):
+    """Escolhe um movimento simples (uma casa) válido para `player`, ou None."""
+    size = len(board)
+    candidatos = []
+    for r in range(size):
+        for c in range(size):
+            if board[r][c] != player:
+                continue
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    nr, nc = r + dr, c + dc
+                    if (dr or dc) and 0 <= nr < size and 0 <= nc < size and board[nr][nc] == 0:
+                        candidatos.append(((r, c), (nr, nc)))
+    return rng.choice(candidatos) if candidatos else None
@@ -0,0 +1,215 @@
+# carga.py
+"""
+Gerador de carga: milhares de jogadores simulados, sem interface, contra um servidor Halma.
+
+Cada jogador simulado faz a mesma sequência de chamadas da janela do jogador.py
+(registrar_jogador, long-poll via sync, jogadas, chat e desistência) com a
+SessaoJogador de sincronizacao.py. Os jogadores rodam em threads distribuídas
+por vários processos; cada chamada é cronometrada e, no fim, o relatório traz
+vazão, erros e histograma de latência por método.
+
+    python carga.py --port 8000 --jogadores 2000 --processos 4 --duracao 60
+"""
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+
+from metricas import FAIXAS_MS, Histograma
+from sincronizacao import SessaoJogador
+
+
+class Metricas:
+    """Chamadas, erros e latências por método, compartilhadas pelas threads de um processo."""
+
+    def __init__(self):
+        self.chamadas = {}
+        self.erros = {}
+        self.latencias = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, metodo, segundos, erro=False):
+        with self._lock:
+            self.chamadas[metodo] = self.chamadas.get(metodo, 0) + 1
+            if erro:
+                self.erros[metodo] = self.erros.get(metodo, 0) + 1
+            histograma = self.latencias.get(metodo)
+            if histograma is None:
+                histograma = self.latencias[metodo] = Histograma()
+            histograma.registrar(segundos)
+
+    def exportar(self):
+        with self._lock:
+            return {"chamadas": dict(self.chamadas), "erros": dict(self.erros),
+                    "latencias": {m: h.contagens for m, h in self.latencias.items()}}
+
+    def somar(self, dados):
+        for metodo, n in dados["chamadas"].items():
+            self.chamadas[metodo] = self.chamadas.get(metodo, 0) + n
+        for metodo, n in dados["erros"].items():
+            self.erros[metodo] = self.erros.get(metodo, 0) + n
+        for metodo, contagens in dados["latencias"].items():
+            self.latencias.setdefault(metodo, Histograma()).somar(Histograma(contagens))
+
+
+class ProxyMedido:
+    """
+    Envolve o proxy da sessão e cronometra cada chamada. Chamadas `sync` são
+    separadas pela ação que levam ("sync:jogada", "sync:chat", "sync:desistir")
+    ou, sem ações, como "sync:espera" (o long-poll).
+    """
+
+    def __init__(self, proxy, metricas):
+        self._proxy = proxy
+        self._metricas = metricas
+
+    def __getattr__(self, metodo):
+        funcao = getattr(self._proxy, metodo)
+
+        def medida(*parametros):
+            nome = metodo
+            if metodo == "sync":
+                acoes = parametros[4] if len(parametros) > 4 else ()
+                nome = f"sync:{acoes[0][0]}" if acoes else "sync:espera"
+            inicio = time.perf_counter()
+            try:
+                resultado = funcao(*parametros)
+            except Exception:
+                self._metricas.registrar(nome, time.perf_counter() - inicio, erro=True)
+                raise
+            self._metricas.registrar(nome, time.perf_counter() - inicio)
+            return resultado
+        return medida
+
+
+class JogadorSimulado:
+    """Entra numa partida, joga jogadas legais aleatórias com tempo de pensar e conversa no chat."""
+
+    def __init__(self, args, metricas, rng, fim):
+        self.args = args
+        self.metricas = metricas
+        self.rng = rng
+        self.fim = fim
+        self.partidas = 0
+
+    def rodar(self):
+        while time.monotonic() < self.fim:
+            try:
+                self.jogar_partida()
+            except Exception:
+                # A chamada que falhou já entrou nas métricas; começa de novo com outra conexão
+                time.sleep(1.0)
+
+    def _proximo_chat(self):
+        if self.args.chat_por_minuto <= 0:
+            return float("inf")
+        return time.monotonic() + self.rng.expovariate(self.args.chat_por_minuto / 60.0)
+
+    def jogar_partida(self):
+        args = self.args
+        sessao = SessaoJogador(args.host, args.port, args.protocol)
+        sessao.servidor = ProxyMedido(sessao.conectar(), self.metricas)
+        if not sessao.entrar():
+            return
+        self.partidas += 1
+        jogadas = 0
+        proximo_chat = self._proximo_chat()
+        while time.monotonic() < self.fim:
+            agora = time.monotonic()
+            if agora >= proximo_chat:
+                sessao.sincronizar(acoes=[["chat", f"mensagem {self.rng.randrange(10**6)}"]])
+                proximo_chat = self._proximo_chat()
+                continue
+            espelho = sessao.espelho
+            if espelho.winner:
+                return
+            if sessao.minha_vez and espelho.jogadores_conectados >= sessao.layout["jogadores"] and sessao.jogadas_legais:
+                time.sleep(self.rng.uniform(0, 2 * args.pensar))
+                if jogadas >= args.jogadas_por_partida:
+                    sessao.sincronizar(acoes=[["desistir"]])
+                    return
+                origem = self.rng.choice(list(sessao.jogadas_legais))
+                destino = self.rng.choice(sessao.jogadas_legais[origem])
+                sessao.sincronizar(acoes=[["jogada", origem, destino]])
+                jogadas += 1
+                continue
+            # Espera o oponente (ou o próximo chat) no servidor
+            espera = min(args.espera, max(0.0, proximo_chat - agora), self.fim - agora)
+            sessao.sincronizar(timeout=max(0.0, espera))
+
+
+def rodar_processo(indice, args, jogadores):
+    """Roda `jogadores` jogadores simulados em threads e devolve as métricas do processo."""
+    metricas = Metricas()
+    inicio = time.monotonic()
+    fim = inicio + args.rampa + args.duracao
+    threads = []
+    for i in range(jogadores):
+        jogador = JogadorSimulado(args, metricas, random.Random(args.seed * 1_000_003 + indice * 100_003 + i), fim)
+        # Espalha as entradas pela rampa para não registrar todos no mesmo instante
+        atraso = args.rampa * i / max(1, jogadores)
+        thread = threading.Thread(target=lambda j=jogador, a=atraso: (time.sleep(a), j.rodar()), daemon=True)
+        thread.start()
+        threads.append((thread, jogador))
+    partidas = 0
+    for thread, jogador in threads:
+        thread.join(max(0.0, fim - time.monotonic()) + args.espera + 5)
+        partidas += jogador.partidas
+    dados = metricas.exportar()
+    dados["partidas"] = partidas
+    return dados
+
+
+def relatorio(metricas, partidas, duracao):
+    print(f"{partidas} partida(s) iniciadas pelos jogadores simulados em {duracao:.0f}s.\n")
+    print(f"{'método':>14} {'chamadas':>9} {'por s':>8} {'erros':>7} {'% erro':>7} "
+          f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    for metodo in sorted(metricas.chamadas):
+        chamadas = metricas.chamadas[metodo]
+        erros = metricas.erros.get(metodo, 0)
+        histograma = metricas.latencias[metodo]
+        print(f"{metodo:>14} {chamadas:>9} {chamadas / duracao:>8.1f} {erros:>7} {100.0 * erros / chamadas:>6.2f}% "
+              f"{histograma.percentil(50):>8} {histograma.percentil(90):>8} {histograma.percentil(99):>8}")
+
+    print("\nHistograma de latência (chamadas por faixa, em ms):")
+    rotulos = [f"<={f}" for f in FAIXAS_MS] + [f">{FAIXAS_MS[-1]}"]
+    print(f"{'método':>14} " + " ".join(f"{r:>7}" for r in rotulos))
+    for metodo in sorted(metricas.latencias):
+        print(f"{metodo:>14} " + " ".join(f"{n:>7}" for n in metricas.latencias[metodo].contagens))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help='Endereço do servidor (padrão: 127.0.0.1).')
+    parser.add_argument('--port', type=int, default=8000, help='Porta do servidor (padrão: 8000).')
+    parser.add_argument('--protocol', choices=['xmlrpc', 'binario'], default='xmlrpc',
+                        help='Transporte, como no jogador.py (padrão: xmlrpc).')
+    parser.add_argument('--jogadores', type=int, default=100, help='Jogadores simulados no total (padrão: 100).')
+    parser.add_argument('--processos', type=int, default=1,
+                        help='Processos geradores; os jogadores são divididos entre eles (padrão: 1).')
+    parser.add_argument('--duracao', type=float, default=30.0, help='Segundos de carga depois da rampa (padrão: 30).')
+    parser.add_argument('--rampa', type=float, default=5.0,
+                        help='Segundos para todos os jogadores entrarem (padrão: 5).')
+    parser.add_argument('--pensar', type=float, default=1.0,
+                        help='Tempo médio de pensar antes de cada jogada, em segundos (padrão: 1).')
+    parser.add_argument('--chat-por-minuto', type=float, default=2.0,
+                        help='Mensagens de chat por minuto por jogador (padrão: 2).')
+    parser.add_argument('--jogadas-por-partida', type=int, default=60,
+                        help='Jogadas de cada jogador antes de desistir e entrar noutra partida (padrão: 60).')
+    parser.add_argument('--espera', type=int, default=25, help='Timeout do long-poll, em segundos (padrão: 25).')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    processos = max(1, min(args.processos, args.jogadores))
+    partes = [args.jogadores // processos + (1 if i < args.jogadores % processos else 0) for i in range(processos)]
+    inicio = time.monotonic()
+    if processos == 1:
+        resultados = [rodar_processo(0, args, partes[0])]
+    else:
+        with multiprocessing.Pool(processos) as pool:
+            resultados = pool.starmap(rodar_processo, [(i, args, n) for i, n in enumerate(partes)])
+    total = Metricas()
+    for dados in resultados:
+        total.somar(dados)
+    relatorio(total, sum(d["partidas"] for d in resultados), time.monotonic() - inicio)
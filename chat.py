@@ -0,0 +1,99 @@
+# chat.py
+import time
+
+# Mensagens maiores que isto são truncadas, para o buffer ter tamanho limitado em bytes também
+TAMANHO_MAXIMO = 500
+
+
+class LimitadorTaxa:
+    """
+    Balde de fichas por jogador: `taxa` mensagens por segundo, com rajadas de até `rajada`.
+    Com mais de `limite` baldes, os que já voltaram a encher são descartados (valem o
+    mesmo que um balde novo), então a memória não cresce com chaves que não voltam.
+    """
+
+    def __init__(self, taxa=2.0, rajada=5, limite=64):
+        self.taxa = taxa
+        self.rajada = rajada
+        self.limite = limite
+        self._baldes = {}
+
+    def __len__(self):
+        return len(self._baldes)
+
+    def permitir(self, chave, agora=None):
+        agora = time.monotonic() if agora is None else agora
+        if chave not in self._baldes and len(self._baldes) >= self.limite:
+            self._descartar_cheios(agora)
+        fichas, ultimo = self._baldes.get(chave, (self.rajada, agora))
+        fichas = min(self.rajada, fichas + (agora - ultimo) * self.taxa)
+        if fichas < 1:
+            self._baldes[chave] = (fichas, agora)
+            return False
+        self._baldes[chave] = (fichas - 1, agora)
+        return True
+
+    def _descartar_cheios(self, agora):
+        self._baldes = {chave: (fichas, ultimo) for chave, (fichas, ultimo) in self._baldes.items()
+                        if fichas + (agora - ultimo) * self.taxa < self.rajada}
+
+
+class RegistroChat:
+    """
+    Chat de uma partida num buffer circular de capacidade fixa.
+
+    Cada mensagem recebe um número de sequência monotônico (0, 1, 2...) e é
+    guardada como registro (seq, jogador, hora, texto). Quando o buffer enche,
+    as mais antigas são sobrescritas; quem pedir a partir de uma sequência que
+    já saiu do buffer recebe o que restou e a indicação de lacuna.
+    Não é thread-safe: a Partida chama sempre com o lock dela.
+    """
+
+    def __init__(self, capacidade=256, limitador=None):
+        self.capacidade = capacidade
+        self.limitador = limitador
+        self._buffer = [None] * capacidade
+        self._proximo = 0
+
+    def __len__(self):
+        return min(self._proximo, self.capacidade)
+
+    @property
+    def ultimo_seq(self):
+        """Sequência da mensagem mais recente (-1 se ainda não houve nenhuma)."""
+        return self._proximo - 1
+
+    def adicionar(self, player_id, texto, hora=None, limitar=True):
+        """Guarda uma mensagem. Retorna a sequência dela, ou -1 se o jogador excedeu o limite de taxa."""
+        if limitar and self.limitador is not None and not self.limitador.permitir(player_id):
+            return -1
+        seq = self._proximo
+        self._buffer[seq % self.capacidade] = (seq, player_id, time.time() if hora is None else hora,
+                                               texto[:TAMANHO_MAXIMO])
+        self._proximo += 1
+        return seq
+
+    def desde(self, ultimo_seq):
+        """
+        Retorna (mensagens, lacuna): os registros com sequência maior que `ultimo_seq`,
+        como dicts, e se alguma mensagem que o cliente não viu já foi descartada.
+        """
+        primeiro = max(0, self._proximo - self.capacidade)
+        lacuna = ultimo_seq + 1 < primeiro
+        mensagens = []
+        for seq in range(max(ultimo_seq + 1, primeiro), self._proximo):
+            _, player_id, hora, texto = self._buffer[seq % self.capacidade]
+            mensagens.append({"seq": seq, "jogador": player_id, "hora": hora, "texto": texto})
+        return mensagens, lacuna
+
+    def exportar(self):
+        """Registros retidos como listas [seq, jogador, hora, texto], em ordem (para snapshots)."""
+        primeiro = max(0, self._proximo - self.capacidade)
+        return [list(self._buffer[seq % self.capacidade]) for seq in range(primeiro, self._proximo)]
+
+    def carregar(self, registros, proximo):
+        """Inverso de `exportar`: a próxima mensagem recebe a sequência `proximo`."""
+        self._buffer = [None] * self.capacidade
+        for seq, player_id, hora, texto in registros[-self.capacidade:]:
+            self._buffer[seq % self.capacidade] = (seq, player_id, hora, texto)
+        self._proximo = proximo
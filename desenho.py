@@ -0,0 +1,78 @@
+# desenho.py
+"""
+Desenho incremental do tabuleiro num Canvas do Tkinter.
+
+As casas são desenhadas uma única vez. Cada casa tem um item de peça e um de
+dica (jogada possível) criados escondidos, e há um único contorno de seleção.
+A cada atualização só os itens das casas que mudaram desde o último desenho
+são reconfigurados (imagem, visível/escondido); o resto do canvas fica como está.
+"""
+
+COR_CASA = "#f2e396"
+# Cor do campo inicial de cada jogador, na ordem dos jogadores
+CORES_CAMPOS = ("#E0E8FF", "#FFE0E0", "#E0FFE0", "#FFF0D0")
+COR_DICA = "#90EE90"
+
+
+class DesenhoTabuleiro:
+    def __init__(self, canvas, imagens, board_size, cell_size, campos=()):
+        """
+        `imagens` mapeia o número do jogador para a imagem da peça dele;
+        `campos[p - 1]` são as casas do campo inicial do jogador p.
+        """
+        self.canvas = canvas
+        self.imagens = imagens
+        self.cell_size = cell_size
+        cor_da_casa = {tuple(casa): cor for campo, cor in zip(campos, CORES_CAMPOS) for casa in campo}
+        n = board_size
+
+        # A ordem de criação é a ordem de empilhamento: casas, dicas, peças e seleção por cima
+        for r in range(n):
+            for c in range(n):
+                x1, y1 = c * cell_size, r * cell_size
+                canvas.create_rectangle(x1, y1, x1 + cell_size, y1 + cell_size, outline="black",
+                                        fill=cor_da_casa.get((r, c), COR_CASA))
+        self._dicas = [[canvas.create_oval(c * cell_size + 15, r * cell_size + 15,
+                                           (c + 1) * cell_size - 15, (r + 1) * cell_size - 15,
+                                           fill=COR_DICA, outline="", state="hidden")
+                        for c in range(n)] for r in range(n)]
+        self._pecas = [[canvas.create_image(c * cell_size + cell_size // 2, r * cell_size + cell_size // 2,
+                                            state="hidden")
+                        for c in range(n)] for r in range(n)]
+        self._selecao = canvas.create_oval(0, 0, 0, 0, outline="red", width=3, state="hidden")
+
+        # O que está na tela agora, para comparar com o próximo desenho
+        self._board = [[0] * n for _ in range(n)]
+        self._dicas_visiveis = set()
+        self._selecionada = None
+
+    def desenhar(self, board, possible_moves=(), selected=None):
+        configurar = self.canvas.itemconfigure
+        for r, (linha, na_tela) in enumerate(zip(board, self._board)):
+            if linha == na_tela:
+                continue
+            for c, player in enumerate(linha):
+                if player != na_tela[c]:
+                    if player:
+                        configurar(self._pecas[r][c], image=self.imagens[player], state="normal")
+                    else:
+                        configurar(self._pecas[r][c], state="hidden")
+                    na_tela[c] = player
+
+        dicas = set(map(tuple, possible_moves))
+        for r, c in self._dicas_visiveis - dicas:
+            configurar(self._dicas[r][c], state="hidden")
+        for r, c in dicas - self._dicas_visiveis:
+            configurar(self._dicas[r][c], state="normal")
+        self._dicas_visiveis = dicas
+
+        selected = tuple(selected) if selected else None
+        if selected != self._selecionada:
+            if selected:
+                r, c = selected
+                x1, y1 = c * self.cell_size, r * self.cell_size
+                self.canvas.coords(self._selecao, x1 + 2, y1 + 2, x1 + self.cell_size - 2, y1 + self.cell_size - 2)
+                configurar(self._selecao, state="normal")
+            else:
+                configurar(self._selecao, state="hidden")
+            self._selecionada = selected
@@ -0,0 +1,207 @@
+# diario.py
+"""
+Diário (write-ahead log) das partidas, para recuperar o servidor depois de um reinício.
+
+Cada mudança de estado (partida criada/removida, jogador entrou, jogada,
+desistência, chat) vira um evento JSON numa linha de um segmento
+`diario-NNNNNN.log`. Quem gera o evento só o coloca numa fila em memória; uma
+thread escritora grava tudo o que acumulou e faz um único fsync por lote
+(group commit), então a jogada não espera pelo disco. Um crash pode perder no
+máximo o lote que estava sendo gravado.
+
+A cada `snapshot_a_cada` eventos a escritora abre um segmento novo, salva um
+snapshot completo `snapshot-NNNNNN.json` e apaga os segmentos anteriores; na
+partida do servidor basta carregar o snapshot e reaplicar os segmentos a
+partir dele. Cada evento de partida leva a versão da partida ("v"), e o
+snapshot guarda a versão de cada uma, então eventos que caíram no segmento
+novo antes do snapshot são reconhecidos e pulados na recuperação.
+
+Se o disco falhar (cheio, erro de E/S), a escritora registra o erro no log,
+devolve o lote à fila e tenta de novo a cada ESPERA_APOS_FALHA segundos num
+segmento novo (uma linha cortada só encerra a leitura do segmento dela). Enquanto
+isso `falha` guarda o erro e `pendentes` mostra quanto está esperando o disco.
+"""
+import json
+import logging
+import os
+import threading
+
+log = logging.getLogger("halma")
+
+PREFIXO_SEGMENTO = "diario-"
+PREFIXO_SNAPSHOT = "snapshot-"
+# Segundos entre tentativas de gravar depois de uma falha de disco
+ESPERA_APOS_FALHA = 1.0
+
+
+def _numero(nome, prefixo, sufixo):
+    if nome.startswith(prefixo) and nome.endswith(sufixo):
+        meio = nome[len(prefixo):-len(sufixo)]
+        if meio.isdigit():
+            return int(meio)
+    return None
+
+
+class Diario:
+    def __init__(self, diretorio, snapshot_a_cada=50000):
+        self.diretorio = diretorio
+        self.snapshot_a_cada = snapshot_a_cada
+        # Função que devolve o estado completo para o snapshot; definida por quem recupera
+        self.capturar = None
+        os.makedirs(diretorio, exist_ok=True)
+        segmentos = self._listar(PREFIXO_SEGMENTO, ".log")
+        snapshots = self._listar(PREFIXO_SNAPSHOT, ".json")
+        self._segmento = max(segmentos + snapshots, default=0) + 1
+        self._pendentes = []
+        self._desde_snapshot = 0
+        self._cond = threading.Condition()
+        self._fechando = False
+        self._arquivo = None
+        self._escritora = None
+        # Último erro de disco enquanto a escritora não consegue gravar (None quando está tudo em dia)
+        self.falha = None
+
+    @property
+    def pendentes(self):
+        """Eventos na fila, ainda não gravados."""
+        return len(self._pendentes)
+
+    # --- Recuperação ---
+
+    def carregar(self):
+        """
+        Lê o que está em disco. Retorna (snapshot ou None, eventos) onde os eventos
+        são os de todos os segmentos a partir do snapshot mais recente, em ordem.
+        """
+        snapshots = self._listar(PREFIXO_SNAPSHOT, ".json")
+        snapshot = None
+        inicio = 0
+        if snapshots:
+            inicio = max(snapshots)
+            with open(self._caminho(PREFIXO_SNAPSHOT, inicio, ".json"), encoding="utf-8") as f:
+                snapshot = json.load(f)
+        eventos = []
+        for numero in sorted(n for n in self._listar(PREFIXO_SEGMENTO, ".log") if n >= inicio):
+            with open(self._caminho(PREFIXO_SEGMENTO, numero, ".log"), encoding="utf-8") as f:
+                for linha in f:
+                    try:
+                        eventos.append(json.loads(linha))
+                    except json.JSONDecodeError:
+                        break  # Última linha cortada por um crash no meio da escrita
+        return snapshot, eventos
+
+    # --- Escrita ---
+
+    def iniciar(self, snapshot_inicial=False):
+        """
+        Abre um segmento novo e sobe a thread escritora. Com `snapshot_inicial`, grava
+        antes um snapshot, para o próximo reinício não precisar reaplicar os mesmos eventos.
+        """
+        self._arquivo = open(self._caminho(PREFIXO_SEGMENTO, self._segmento, ".log"), "a", encoding="utf-8")
+        if snapshot_inicial and self.capturar is not None:
+            self.snapshot()
+        self._escritora = threading.Thread(target=self._loop_escrita, name="diario", daemon=True)
+        self._escritora.start()
+
+    def registrar(self, evento):
+        """Enfileira um evento (dict serializável em JSON). Não bloqueia em disco."""
+        with self._cond:
+            self._pendentes.append(evento)
+            self._cond.notify()
+
+    def fechar(self):
+        """Grava o que estiver pendente e para a escritora."""
+        with self._cond:
+            self._fechando = True
+            self._cond.notify()
+        if self._escritora is not None:
+            self._escritora.join()
+
+    def _loop_escrita(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pendentes or self._fechando)
+                lote, self._pendentes = self._pendentes, []
+                fechando = self._fechando
+            try:
+                if self.falha is not None:
+                    self._trocar_segmento()
+                if lote:
+                    self._gravar(lote)
+                    lote = []  # Já no disco: uma falha no snapshot não o devolve à fila
+                if not fechando and self._desde_snapshot >= self.snapshot_a_cada and self.capturar is not None:
+                    self.snapshot()
+            except Exception as e:
+                if self._falhou(e, lote, fechando):
+                    continue
+            else:
+                if self.falha is not None:
+                    log.warning("Diário: voltou a gravar depois de: %s", self.falha)
+                    self.falha = None
+            if fechando:
+                try:
+                    self._arquivo.close()
+                except OSError:
+                    pass
+                return
+
+    def _falhou(self, erro, lote, fechando):
+        """Registra a falha e devolve o lote à fila. Retorna True se a escritora deve tentar de novo."""
+        if self.falha is None:
+            log.exception("Diário: falha ao gravar; nova tentativa a cada %gs.", ESPERA_APOS_FALHA)
+        self.falha = erro
+        if fechando:
+            log.error("Diário: encerrando com %d evento(s) não gravados.", len(lote) + len(self._pendentes))
+            return False
+        with self._cond:
+            self._pendentes[:0] = lote
+            self._cond.wait_for(lambda: self._fechando, ESPERA_APOS_FALHA)
+        return True
+
+    def _trocar_segmento(self):
+        # Depois de uma falha o segmento atual pode terminar numa linha cortada: segue num novo
+        try:
+            self._arquivo.close()
+        except OSError:
+            pass
+        self._segmento += 1
+        self._arquivo = open(self._caminho(PREFIXO_SEGMENTO, self._segmento, ".log"), "a", encoding="utf-8")
+
+    def _gravar(self, lote):
+        self._arquivo.write("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in lote))
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self._desde_snapshot += len(lote)
+
+    def snapshot(self):
+        """
+        Abre um segmento novo, salva o estado completo e apaga o que ficou para trás.
+        Chamado pela escritora (ou antes de iniciá-la); os eventos que chegam enquanto
+        isso continuam na fila.
+        """
+        self._arquivo.close()
+        self._segmento += 1
+        self._arquivo = open(self._caminho(PREFIXO_SEGMENTO, self._segmento, ".log"), "a", encoding="utf-8")
+
+        estado = self.capturar()
+        destino = self._caminho(PREFIXO_SNAPSHOT, self._segmento, ".json")
+        with open(destino + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(estado, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(destino + ".tmp", destino)
+        self._desde_snapshot = 0
+
+        for numero in self._listar(PREFIXO_SEGMENTO, ".log"):
+            if numero < self._segmento:
+                os.remove(self._caminho(PREFIXO_SEGMENTO, numero, ".log"))
+        for numero in self._listar(PREFIXO_SNAPSHOT, ".json"):
+            if numero < self._segmento:
+                os.remove(self._caminho(PREFIXO_SNAPSHOT, numero, ".json"))
+
+    def _caminho(self, prefixo, numero, sufixo):
+        return os.path.join(self.diretorio, f"{prefixo}{numero:06d}{sufixo}")
+
+    def _listar(self, prefixo, sufixo):
+        numeros = (_numero(nome, prefixo, sufixo) for nome in os.listdir(self.diretorio))
+        return [n for n in numeros if n is not None]
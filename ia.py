@@ -0,0 +1,336 @@
+# ia.py
+"""
+Oponente automático para partidas de dois jogadores.
+
+Busca alpha-beta (negamax) com aprofundamento iterativo sobre as máscaras de
+bits de tabuleiro_bits, limitada por tempo:
+- hash Zobrist da posição, atualizado a cada jogada com dois XORs;
+- tabela de transposição LRU de tamanho limitado (profundidade, valor, tipo do
+  limite, melhor jogada), reaproveitada entre as iterações;
+- ordenação de jogadas: a melhor jogada da tabela primeiro, depois as que mais
+  avançam rumo ao campo de destino;
+- avaliação: soma das distâncias de cada peça ao canto de destino, do
+  adversário menos a do jogador da vez. A distância é a de Manhattan (as casas a
+  Manhattan <= k do canto formam a escada do campo; com Chebyshev um quadrado
+  k x k valeria o mesmo que o campo e as partidas travavam), mais uma penalidade
+  para casas fora do campo de destino, para nenhuma casa de fora valer tanto
+  quanto uma de dentro.
+
+Funciona em qualquer layout de dois jogadores (layouts.py).
+
+Na raiz, as jogadas podem ser divididas entre processos (MotorIA com
+`processos` > 1): a cada profundidade cada processo avalia uma fatia das
+jogadas da raiz, e a profundidade só conta se todas as fatias terminaram
+dentro do prazo.
+"""
+import multiprocessing
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from layouts import LAYOUT_PADRAO, obter_layout
+from tabuleiro_bits import alcance_da_peca, tabelas
+
+VITORIA = 1_000_000
+# Segundos de busca por jogada em cada nível do bot
+TEMPO_POR_NIVEL = {1: 0.1, 2: 0.3, 3: 1.0, 4: 2.0, 5: 4.0}
+PROFUNDIDADE_MAXIMA = 32
+# Somada à distância das casas fora do campo de destino
+FORA_DO_CAMPO = 2
+
+_EXATO, _INFERIOR, _SUPERIOR = range(3)
+
+
+class TempoEsgotado(Exception):
+    """Interrompe a busca quando o prazo da jogada passa."""
+
+
+class TabelaTransposicao:
+    """Dicionário hash Zobrist -> entrada que descarta a entrada usada há mais tempo ao encher."""
+
+    def __init__(self, capacidade=200_000):
+        self.capacidade = capacidade
+        self._entradas = OrderedDict()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def obter(self, chave):
+        entrada = self._entradas.get(chave)
+        if entrada is not None:
+            self._entradas.move_to_end(chave)
+        return entrada
+
+    def guardar(self, chave, entrada):
+        self._entradas[chave] = entrada
+        self._entradas.move_to_end(chave)
+        if len(self._entradas) > self.capacidade:
+            self._entradas.popitem(last=False)
+
+
+class Busca:
+    """
+    Estado de busca de um processo: tabelas do tabuleiro, chaves Zobrist e a
+    tabela de transposição. As peças são a lista [0, máscara_p1, máscara_p2],
+    alterada e desfeita no lugar durante a busca.
+    """
+
+    def __init__(self, layout=LAYOUT_PADRAO, capacidade_tt=200_000, seed=0x4A1A):
+        self.layout = obter_layout(layout)
+        if self.layout.jogadores != 2:
+            raise ValueError(f"A busca só joga layouts de dois jogadores, não {self.layout.nome!r}.")
+        n = self.board_size = self.layout.board_size
+        self._vizinhos, self._saltos, _, self.destino = tabelas(self.layout)
+        rng = random.Random(seed)
+        casas = n * n
+        self.zobrist = (None, [rng.getrandbits(64) for _ in range(casas)],
+                        [rng.getrandbits(64) for _ in range(casas)])
+        self.zobrist_vez = rng.getrandbits(64)
+        # Distância de cada casa ao canto de destino de cada jogador (Manhattan, penalizada fora do campo)
+        self.distancia = (None,) + tuple(
+            [abs(i // n - alvo[0]) + abs(i % n - alvo[1]) + (0 if destino >> i & 1 else FORA_DO_CAMPO)
+             for i in range(casas)]
+            for alvo, destino in zip(self.layout.alvos[1:], self.destino[1:]))
+        self.tt = TabelaTransposicao(capacidade_tt)
+        self.nos = 0
+        self.prazo = float("inf")
+
+    def pecas_do_board(self, board):
+        n = self.board_size
+        pecas = [0, 0, 0]
+        for r, linha in enumerate(board):
+            for c, valor in enumerate(linha):
+                if valor:
+                    pecas[valor] |= 1 << (r * n + c)
+        return pecas
+
+    def hash(self, pecas, jogador):
+        h = self.zobrist_vez if jogador == 2 else 0
+        for p in (1, 2):
+            for i in _bits(pecas[p]):
+                h ^= self.zobrist[p][i]
+        return h
+
+    def avaliar(self, pecas, jogador):
+        """Valor da posição do ponto de vista de `jogador` (maior é melhor)."""
+        d1 = self.distancia[1]
+        d2 = self.distancia[2]
+        soma1 = sum(d1[i] for i in _bits(pecas[1]))
+        soma2 = sum(d2[i] for i in _bits(pecas[2]))
+        return soma2 - soma1 if jogador == 1 else soma1 - soma2
+
+    def gerar(self, pecas, jogador, primeira=None):
+        """Jogadas (origem, destino) de `jogador`, das que mais avançam para as que menos avançam."""
+        ocupadas = pecas[1] | pecas[2]
+        distancia = self.distancia[jogador]
+        jogadas = []
+        for origem in _bits(pecas[jogador]):
+            antes = distancia[origem]
+            for destino in _bits(alcance_da_peca(origem, ocupadas, self._vizinhos, self._saltos)):
+                jogadas.append((antes - distancia[destino], origem, destino))
+        jogadas.sort(reverse=True)
+        ordenadas = [(o, d) for _, o, d in jogadas]
+        if primeira is not None and primeira in ordenadas:
+            ordenadas.remove(primeira)
+            ordenadas.insert(0, primeira)
+        return ordenadas
+
+    def negamax(self, pecas, jogador, profundidade, alfa, beta, h):
+        self.nos += 1
+        if not self.nos & 1023 and time.monotonic() > self.prazo:
+            raise TempoEsgotado
+        outro = 3 - jogador
+        if pecas[outro] & self.destino[outro] == self.destino[outro]:
+            # O adversário acabou de vencer; quanto mais cedo, pior
+            return -(VITORIA + profundidade)
+        if profundidade == 0:
+            return self.avaliar(pecas, jogador)
+
+        alfa_original = alfa
+        melhor_tt = None
+        entrada = self.tt.obter(h)
+        if entrada is not None:
+            prof_tt, valor, tipo, melhor_tt = entrada
+            if prof_tt >= profundidade:
+                if tipo == _EXATO:
+                    return valor
+                if tipo == _INFERIOR:
+                    alfa = max(alfa, valor)
+                else:
+                    beta = min(beta, valor)
+                if alfa >= beta:
+                    return valor
+
+        jogadas = self.gerar(pecas, jogador, melhor_tt)
+        if not jogadas:
+            return self.avaliar(pecas, jogador)
+        chaves = self.zobrist[jogador]
+        melhor, melhor_jogada = -float("inf"), None
+        for jogada in jogadas:
+            origem, destino = jogada
+            troca = (1 << origem) | (1 << destino)
+            pecas[jogador] ^= troca
+            try:
+                valor = -self.negamax(pecas, outro, profundidade - 1, -beta, -alfa,
+                                      h ^ chaves[origem] ^ chaves[destino] ^ self.zobrist_vez)
+            finally:
+                pecas[jogador] ^= troca
+            if valor > melhor:
+                melhor, melhor_jogada = valor, jogada
+                if valor > alfa:
+                    alfa = valor
+                    if alfa >= beta:
+                        break
+
+        tipo = _SUPERIOR if melhor <= alfa_original else _INFERIOR if melhor >= beta else _EXATO
+        self.tt.guardar(h, (profundidade, melhor, tipo, melhor_jogada))
+        return melhor
+
+    def avaliar_raiz(self, pecas, jogador, jogadas, profundidade, prazo):
+        """
+        Valor de cada jogada da raiz em `profundidade`, na ordem dada, ou None se o prazo
+        passou antes do fim. Valores depois da melhor são só limites superiores (janela alpha-beta).
+        """
+        self.prazo = prazo
+        h = self.hash(pecas, jogador)
+        chaves = self.zobrist[jogador]
+        alfa = -float("inf")
+        resultados = []
+        try:
+            for origem, destino in jogadas:
+                troca = (1 << origem) | (1 << destino)
+                pecas[jogador] ^= troca
+                try:
+                    valor = -self.negamax(pecas, 3 - jogador, profundidade - 1, -float("inf"), -alfa,
+                                          h ^ chaves[origem] ^ chaves[destino] ^ self.zobrist_vez)
+                finally:
+                    pecas[jogador] ^= troca
+                resultados.append(((origem, destino), valor))
+                alfa = max(alfa, valor)
+        except TempoEsgotado:
+            return None
+        return resultados
+
+
+def _bits(mascara):
+    while mascara:
+        menor = mascara & -mascara
+        yield menor.bit_length() - 1
+        mascara ^= menor
+
+
+# Busca de cada processo do pool, criada na primeira tarefa e mantida (com a tabela de transposição) entre tarefas
+_busca_do_processo = None
+
+
+def _avaliar_em_processo(layout, pecas, jogador, jogadas, profundidade, tempo_restante):
+    global _busca_do_processo
+    if _busca_do_processo is None or _busca_do_processo.layout.nome != layout:
+        _busca_do_processo = Busca(layout)
+    busca = _busca_do_processo
+    busca.nos = 0
+    resultados = busca.avaliar_raiz(list(pecas), jogador, jogadas, profundidade,
+                                    time.monotonic() + tempo_restante)
+    return resultados, busca.nos
+
+
+class MotorIA:
+    """
+    Escolhe jogadas dentro de um prazo. Com `processos` > 1, divide as jogadas da
+    raiz entre um pool de processos; com 1, busca no próprio processo.
+    Thread-safe: cada chamada usa uma Busca só dela, tirada de uma reserva por
+    layout e devolvida no fim (com a tabela de transposição, como nos processos do
+    pool), então bots de partidas diferentes buscam ao mesmo tempo. O pool de
+    processos é compartilhado; o ProcessPoolExecutor já aceita envios de várias threads.
+    """
+
+    def __init__(self, processos=1, layout=LAYOUT_PADRAO, capacidade_tt=200_000):
+        self.processos = max(1, processos)
+        self.layout = obter_layout(layout)
+        self.capacidade_tt = capacidade_tt
+        # {nome do layout: [Busca livre, ...]}
+        self._buscas = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        if self.processos > 1:
+            # spawn: o servidor tem várias threads, e fork com threads ativas não é seguro
+            self._pool = ProcessPoolExecutor(self.processos, mp_context=multiprocessing.get_context("spawn"))
+
+    def fechar(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def escolher_jogada(self, board, jogador, tempo, layout=None):
+        """
+        Retorna ((origem), (destino), info) para `jogador` no `board` (lista de listas),
+        ou (None, None, info) se ele não tem jogada. info traz profundidade, nós e valor.
+        Sem `layout`, usa o do motor.
+        """
+        layout = self.layout if layout is None else obter_layout(layout)
+        with self._lock:
+            livres = self._buscas.setdefault(layout.nome, [])
+            busca = livres.pop() if livres else None
+        if busca is None:
+            busca = Busca(layout, self.capacidade_tt)
+        try:
+            return self._escolher(busca, board, jogador, tempo)
+        finally:
+            with self._lock:
+                livres.append(busca)
+
+    def _escolher(self, busca, board, jogador, tempo):
+        pecas = busca.pecas_do_board(board)
+        inicio = time.monotonic()
+        prazo = inicio + tempo
+        raiz = busca.gerar(pecas, jogador)
+        info = {"profundidade": 0, "nos": 0, "valor": 0, "segundos": 0.0}
+        if not raiz:
+            return None, None, info
+        melhor = raiz[0]
+
+        for profundidade in range(1, PROFUNDIDADE_MAXIMA + 1):
+            if len(raiz) == 1:
+                break
+            if self._pool is None:
+                busca.nos = 0
+                resultados = busca.avaliar_raiz(pecas, jogador, raiz, profundidade, prazo)
+                info["nos"] += busca.nos
+            else:
+                resultados = self._avaliar_em_paralelo(busca.layout, pecas, jogador, raiz, profundidade, prazo,
+                                                       info)
+            if resultados is None:
+                break
+            # Estável: empates mantêm a ordem anterior, então a melhor da iteração passada vem antes
+            resultados.sort(key=lambda item: item[1], reverse=True)
+            raiz = [jogada for jogada, _ in resultados]
+            melhor = raiz[0]
+            info["profundidade"] = profundidade
+            info["valor"] = resultados[0][1]
+            if abs(info["valor"]) >= VITORIA or time.monotonic() >= prazo:
+                break
+
+        info["segundos"] = time.monotonic() - inicio
+        n = busca.board_size
+        origem, destino = melhor
+        return divmod(origem, n), divmod(destino, n), info
+
+    def _avaliar_em_paralelo(self, layout, pecas, jogador, raiz, profundidade, prazo, info):
+        # Fatias intercaladas: cada processo recebe algumas das jogadas mais promissoras
+        fatias = [raiz[i::self.processos] for i in range(self.processos)]
+        restante = prazo - time.monotonic()
+        # Vai só o nome do layout: cada processo monta (uma vez) as próprias tabelas
+        futuros = [self._pool.submit(_avaliar_em_processo, layout.nome, pecas, jogador, fatia,
+                                     profundidade, restante)
+                   for fatia in fatias if fatia]
+        resultados = []
+        completo = True
+        for futuro in futuros:
+            parcial, nos = futuro.result()
+            info["nos"] += nos
+            if parcial is None:
+                completo = False
+            else:
+                resultados.extend(parcial)
+        return resultados if completo else None
@@ -1,58 +1,75 @@
 # jogador_rpc.py
-import xmlrpc.client
 import threading
 import time
 import tkinter as tk
 from tkinter import simpledialog, scrolledtext, messagebox
 from PIL import Image, ImageTk
 import argparse # <-- Importa argparse
+from sincronizacao import SessaoJogador
+from desenho import DesenhoTabuleiro
 
-# Constantes do tabuleiro (mesmas de antes)
-BOARD_SIZE = 10
+# Tamanho do tabuleiro e campos vêm do layout da partida (get_layout no servidor)
 CELL_SIZE = 40
-P1_INITIAL_POSITIONS = [
-    (0, 0), (1, 0), (2, 0), (3, 0), (0, 1), (1, 1), (2, 1), (0, 2), (1, 2), (0, 3)
-]
-P2_INITIAL_POSITIONS = [
-    (BOARD_SIZE - 1 - r, BOARD_SIZE - 1 - c) for r, c in P1_INITIAL_POSITIONS
-]
+# Segundos que cada long-poll pode ficar esperando no servidor
+ESPERA_MAXIMA = 25
+# Depois de uma queda, por quanto tempo (e a cada quantos segundos) tentar voltar ao assento
+TEMPO_RECONEXAO = 30
+INTERVALO_RECONEXAO = 2
+
+def trocar_vermelho_azul(imagem):
+    r, g, b, a = imagem.convert("RGBA").split()
+    return Image.merge("RGBA", (b, g, r, a))
+
 
 class HalmaClient:
-    def __init__(self, master, host, port):
+    def __init__(self, master, host, port, partida_id=None, protocolo="xmlrpc", espectador=False, otimista=True):
         self.master = master
         self.master.protocol("WM_DELETE_WINDOW", self.on_closing)
-        self.board = [[0] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        # Conexão, espelho do estado (o servidor envia só as jogadas novas), jogadas legais e chat
+        self.sessao = SessaoJogador(host, port, protocolo)
+        # As respostas chegam nas threads de rede; o redesenho é feito na thread do Tkinter
+        self.sessao.ao_atualizar = self.agendar_resposta
+        self.board = self.sessao.espelho.board
+        self.partida_id = partida_id
         self.player_id = 0
         self.is_my_turn = False
         self.selected_piece = None
         self.possible_moves = []
         self.jogo_ativo = True
-
-        # Variáveis para sincronização de estado
-        self.ultimo_estado_id = -1
-        self.ultimo_chat_id = -1
+        # Espectador só assiste: sem jogadas, chat ou desistência
+        self.espectador = espectador
+        # Otimista: a jogada aparece no clique e o envio vai por uma thread; senão o clique espera o servidor
+        self.otimista = otimista
 
         self.carrega_imagens()
         self._setup_ui()
         
         # Conecta-se ao servidor RPC
         try:
-            self.servidor = xmlrpc.client.ServerProxy(f"http://{host}:{port}", allow_none=True)
-            self.player_id = self.servidor.registrar_jogador()
-            if self.player_id == 0:
-                messagebox.showerror("Erro", "Sala cheia. Não foi possível conectar.")
-                self.master.destroy()
-                return
-            self.master.title(f"Halma RPC - Jogador {self.player_id}")
-            self.set_status("Aguardando oponente...")
+            if self.espectador:
+                espectador_id = self.sessao.assistir(self.partida_id)
+                self.master.title(f"Halma RPC - Partida {self.partida_id} - Espectador {espectador_id}")
+                self.set_status("Assistindo...")
+            else:
+                self.player_id = self.sessao.entrar(self.partida_id)
+                self.partida_id = self.sessao.partida_id
+                if self.player_id == 0:
+                    messagebox.showerror("Erro", "Sala cheia. Não foi possível conectar.")
+                    self.master.destroy()
+                    return
+                self.master.title(f"Halma RPC - Partida {self.partida_id} - Jogador {self.player_id}")
+                self.set_status("Aguardando oponente...")
+            self.servidor = self.sessao.servidor
         except Exception as e:
             messagebox.showerror("Erro de Conexão", f"Não foi possível conectar ao servidor em {host}:{port}\n{e}")
             self.master.destroy()
             return
-            
+
+        self.board = self.sessao.espelho.board
+        self._montar_tabuleiro()
         self.dispor_pecas()
         
-        # Inicia o loop que verifica por atualizações do servidor
+        # Inicia o loop que espera por atualizações do servidor
         self.update_thread = threading.Thread(target=self.loop_de_atualizacao, daemon=True)
         self.update_thread.start()
 
@@ -64,8 +81,9 @@ class HalmaClient:
         try:
             planeta1 = Image.open("assets/planeta1.png").resize((32,32), Image.LANCZOS)
             planeta2 = Image.open("assets/planeta2.png").resize((32,32), Image.LANCZOS)
-            self.planeta1_peca = ImageTk.PhotoImage(planeta1)
-            self.planeta2_peca = ImageTk.PhotoImage(planeta2)
+            # Jogadores 3 e 4 (layouts de 3 e 4 jogadores) usam os mesmos planetas com vermelho e azul trocados
+            planetas = [planeta1, planeta2] + [trocar_vermelho_azul(p) for p in (planeta1, planeta2)]
+            self.imagens = {player: ImageTk.PhotoImage(p) for player, p in enumerate(planetas, 1)}
         except FileNotFoundError:
             messagebox.showerror("Erro de Imagem", "Poxa, aparentemente os arquivos de imagens não foram encontrados na pasta 'assets'. Verifique se estão nomeados corretamente.")
             self.master.destroy()
@@ -73,7 +91,8 @@ class HalmaClient:
     def _setup_ui(self):
         self.status_label = tk.Label(self.master, text="Conectando...", font=("Arial", 12))
         self.status_label.pack(pady=5)
-        self.canvas = tk.Canvas(self.master, width=BOARD_SIZE*CELL_SIZE, height=BOARD_SIZE*CELL_SIZE, bg='beige')
+        # Dimensionado em _montar_tabuleiro, quando o layout da partida chega do servidor
+        self.canvas = tk.Canvas(self.master, width=0, height=0, bg='beige')
         self.canvas.pack()
         self.canvas.bind("<Button-1>", self.on_canvas_click)
         self.chat_display = scrolledtext.ScrolledText(self.master, height=6, state='disabled')
@@ -88,81 +107,99 @@ class HalmaClient:
         self.forfeit_button = tk.Button(self.master, text="Desistir da Partida", command=self.forfeit_game, bg="red", fg="white", activebackground="darkred")
         self.forfeit_button.pack(pady=5)
 
+    def _montar_tabuleiro(self):
+        layout = self.sessao.layout
+        lado = layout["board_size"] * CELL_SIZE
+        self.canvas.config(width=lado, height=lado)
+        # Grade desenhada uma vez; draw_board só altera as casas que mudaram
+        self.desenho = DesenhoTabuleiro(self.canvas, self.imagens, layout["board_size"], CELL_SIZE, layout["campos"])
+
     def dispor_pecas(self):
-        for r, c in P1_INITIAL_POSITIONS: self.board[r][c] = 1
-        for r, c in P2_INITIAL_POSITIONS: self.board[r][c] = 2
+        for player, campo in enumerate(self.sessao.layout["campos"], 1):
+            for r, c in campo: self.board[r][c] = player
         self.draw_board()
 
     def draw_board(self):
-        self.canvas.delete("all")
-        for r in range(BOARD_SIZE):
-            for c in range(BOARD_SIZE):
-                x1, y1 = c * CELL_SIZE, r * CELL_SIZE
-                fill_color = "#f2e396"
-                if (r, c) in P1_INITIAL_POSITIONS: fill_color = "#E0E8FF"
-                elif (r, c) in P2_INITIAL_POSITIONS: fill_color = "#FFE0E0"
-                self.canvas.create_rectangle(x1, y1, x1 + CELL_SIZE, y1 + CELL_SIZE, outline="black", fill=fill_color)
-        for r, c in self.possible_moves:
-            x1, y1 = c * CELL_SIZE, r * CELL_SIZE
-            self.canvas.create_oval(x1 + 15, y1 + 15, x1 + CELL_SIZE - 15, y1 + CELL_SIZE - 15, fill="#90EE90", outline="")
-        for r in range(BOARD_SIZE):
-            for c in range(BOARD_SIZE):
-                player = self.board[r][c]
-                if player != 0:
-                    x_center = (c * CELL_SIZE) + (CELL_SIZE // 2)
-                    y_center = (r * CELL_SIZE) + (CELL_SIZE // 2)
-                    # Sua lógica de jogador 1 ser sempre planeta 1
-                    image_to_draw = self.planeta1_peca if player == 1 else self.planeta2_peca
-                    self.canvas.create_image(x_center, y_center, image=image_to_draw)
-        if self.selected_piece:
-            r, c = self.selected_piece
-            x1, y1 = c * CELL_SIZE, r * CELL_SIZE
-            self.canvas.create_oval(x1 + 2, y1 + 2, x1 + CELL_SIZE - 2, y1 + CELL_SIZE - 2, outline="red", width=3)
+        # Jogador N é sempre o planeta N (as imagens foram passadas ao DesenhoTabuleiro)
+        self.desenho.desenhar(self.board, self.possible_moves, self.selected_piece)
 
     def set_status(self, message, color="black"):
         self.status_label.config(text=message, fg=color)
     
     def loop_de_atualizacao(self):
-        """Thread que pergunta ao servidor por atualizações (Polling)."""
+        """Thread que espera o servidor avisar de mudanças (long-poll via `sync`)."""
+        # Proxy próprio: a requisição fica presa no servidor e os proxies não são thread-safe
+        servidor_espera = self.sessao.conectar()
         while self.jogo_ativo:
             try:
-                # Pede o estado do jogo
-                estado = self.servidor.get_estado_do_jogo()
-                
-                # Verifica se algo mudou 
-                if estado["estado_id"] != self.ultimo_estado_id:
-                    self.ultimo_estado_id = estado["estado_id"]
-                    
-                    self.board = estado["board"]
-                    self.is_my_turn = (estado["turn"] == self.player_id) and (estado["winner"] is None)
-                    self.draw_board() 
-                    
-                    if estado["winner"]:
-                        self.jogo_ativo = False
-                        if estado["winner"] == self.player_id:
-                            self.set_status("Você Venceu!", "blue")
-                        else:
-                            self.set_status("Você Perdeu.", "black")
-                    elif estado["jogadores_conectados"] < 2:
-                        self.set_status("Aguardando oponente...")
-                    elif self.is_my_turn:
-                        self.set_status("É a sua vez!", "green")
-                    else:
-                        self.set_status("Vez do oponente.", "darkred")
-
-                novas_mensagens = self.servidor.get_novas_mensagens_chat(self.ultimo_chat_id)
-                if novas_mensagens:
-                    for msg in novas_mensagens:
-                        self.display_message(msg)
-                    self.ultimo_chat_id += len(novas_mensagens)
-
+                # Só retorna quando o estado ou o chat mudarem (ou após ESPERA_MAXIMA segundos)
+                self.sessao.sincronizar(servidor_espera, timeout=ESPERA_MAXIMA)
             except Exception as e:
-                if self.jogo_ativo:
-                    print(f"Erro no loop de atualização: {e}")
-                    self.set_status("Erro de conexão com o servidor...", "red")
-                break
+                if not self.jogo_ativo:
+                    break
+                print(f"Erro no loop de atualização: {e}")
+                self.master.after(0, self.set_status, "Erro de conexão com o servidor...", "red")
+                if not self.voltar_ao_assento():
+                    break
+                servidor_espera = self.sessao.conectar()
+
+    def voltar_ao_assento(self):
+        """Tenta reconectar com o token da sessão enquanto o servidor ainda guarda o assento."""
+        if self.espectador:
+            return False
+        prazo = time.monotonic() + TEMPO_RECONEXAO
+        while self.jogo_ativo and time.monotonic() < prazo:
+            time.sleep(INTERVALO_RECONEXAO)
+            try:
+                if not self.sessao.reconectar():
+                    self.master.after(0, self.set_status, "Sessão expirada no servidor.", "red")
+                    return False
+            except Exception:
+                continue
+            self.servidor = self.sessao.servidor
+            self.master.after(0, self.set_status, "Reconectado.")
+            return True
+        return False
+
+    def agendar_resposta(self, mudou, mensagens, lacuna):
+        """Chamado pela sessão na thread do long-poll ou da fila de envio: repassa à thread da interface."""
+        self.master.after(0, self.redesenhar, mudou, mensagens, lacuna)
+
+    def redesenhar(self, mudou=True, mensagens=(), lacuna=False):
+        with self.sessao.lock:
+            self.processar_resposta(mudou, mensagens, lacuna)
+
+    def processar_resposta(self, mudou, mensagens, lacuna):
+        """Atualiza a janela com o espelho da sessão. Só na thread da interface e sob o lock da sessão."""
+        if mudou:
+            estado = self.sessao.espelho
+            # Espelho do servidor com as jogadas ainda a caminho por cima
+            self.board = self.sessao.tabuleiro()
+            self.is_my_turn = self.sessao.minha_vez
+            self.draw_board() 
             
-            time.sleep(1) # atualiza a cada um segundo
+            if estado.winner:
+                self.jogo_ativo = False
+                if self.espectador:
+                    self.set_status(f"Jogador {estado.winner} venceu.", "blue")
+                elif estado.winner == self.player_id:
+                    self.set_status("Você Venceu!", "blue")
+                else:
+                    self.set_status("Você Perdeu.", "black")
+            elif estado.jogadores_conectados < self.sessao.layout["jogadores"]:
+                self.set_status("Aguardando oponente...")
+            elif self.espectador:
+                self.set_status(f"Vez do jogador {estado.turn}.")
+            elif self.is_my_turn:
+                self.set_status("É a sua vez!", "green")
+            else:
+                self.set_status("Vez do oponente.", "darkred")
+
+        if lacuna:
+            self.display_message("(algumas mensagens antigas não estão mais disponíveis)")
+        for msg in mensagens:
+            autor = "Eu" if msg["jogador"] == self.player_id else f"Jogador {msg['jogador']}"
+            self.display_message(f"{autor}: {msg['texto']}")
 
     def on_canvas_click(self, event):
         """Chamado quando o jogador clica no tabuleiro."""
@@ -172,13 +209,20 @@ class HalmaClient:
         c, r = event.x // CELL_SIZE, event.y // CELL_SIZE
         clicked_pos = (r, c)
 
-        if self.selected_piece and clicked_pos in self.possible_moves:
+        if self.selected_piece and clicked_pos in self.possible_moves and self.otimista:
+            # A jogada entra já no tabuleiro; a resposta do servidor chega pela fila de envio
+            self.sessao.jogar(self.selected_piece, clicked_pos, self.resposta_da_jogada)
+            self.selected_piece = None
+            self.possible_moves = []
+            self.redesenhar()
+
+        elif self.selected_piece and clicked_pos in self.possible_moves:
             from_pos = self.selected_piece
             
             # --- CHAMADA RPC PARA O SERVIDOR ---
             try:
-                # Chama a função remota como se fosse local
-                sucesso, mensagem = self.servidor.fazer_jogada(self.player_id, from_pos, clicked_pos)
+                # Envia a jogada e já recebe o estado novo na mesma resposta
+                [(sucesso, mensagem)] = self.sessao.sincronizar(self.servidor, [["jogada", from_pos, clicked_pos]])
                 if not sucesso:
                     messagebox.showwarning("Movimento Inválido", mensagem)
             except Exception as e:
@@ -186,30 +230,53 @@ class HalmaClient:
 
             self.selected_piece = None
             self.possible_moves = []
-            # O loop_de_atualizacao vai pegar a mudança e redesenhar.
+            self.draw_board()
             
         elif self.board[r][c] == self.player_id:
             self.selected_piece = clicked_pos
-            self.possible_moves = self.calculate_possible_moves(r, c)
+            self.possible_moves = self.sessao.jogadas_legais.get(clicked_pos, [])
             self.draw_board()
         else:
             self.selected_piece = None
             self.possible_moves = []
             self.draw_board()
 
+    def resposta_da_jogada(self, resultados, erro):
+        """
+        Chamado pela fila de envio (fora da thread da interface) quando a jogada otimista
+        tem resposta. O Tkinter só pode ser usado da thread dele: tudo o que mexe na
+        janela vai por `master.after`.
+        """
+        if erro is not None:
+            # Sem resposta a jogada sai da tela; o long-poll traz o que o servidor de fato tem
+            self.master.after(0, self.redesenhar)
+            self.master.after(0, messagebox.showerror, "Erro de Conexão", f"Falha ao enviar jogada: {erro}")
+            return
+        [(sucesso, mensagem)] = resultados
+        if not sucesso:
+            # A sessão já desfez a jogada e agendou o redesenho; só falta avisar
+            self.master.after(0, messagebox.showwarning, "Movimento Inválido", mensagem)
+
+    def resposta_do_chat(self, resultados, erro):
+        if erro is not None:
+            self.master.after(0, messagebox.showerror, "Erro de Chat", f"Não foi possível enviar a mensagem: {erro}")
+        elif resultados[0] < 0:
+            self.master.after(0, messagebox.showwarning, "Chat", "Muitas mensagens seguidas. Aguarde um pouco.")
+
     def send_chat_message(self, event=None):
         """Envia uma mensagem de chat via RPC."""
         message = self.chat_input.get()
-        if message:
+        if message and not self.espectador and self.otimista:
+            # Vai pela fila de envio, junto com uma jogada que ainda esteja a caminho
+            self.chat_input.delete(0, tk.END)
+            self.sessao.fila.enviar([["chat", message]], self.resposta_do_chat)
+        elif message and not self.espectador:
             try:
-                # Chame o servidor E guarde o ID da nova mensagem
-                novo_id = self.servidor.enviar_chat(self.player_id, message)
-                
-                # Atualize o seu "último ID" localmente
-                self.ultimo_chat_id = novo_id 
-                
-                # Exiba a sua mensagem local
-                self.display_message(f"Eu: {message}")
+                # A própria mensagem volta na resposta do sync e é exibida como "Eu: ..."
+                [seq] = self.sessao.sincronizar(self.servidor, [["chat", message]])
+                if seq < 0:
+                    messagebox.showwarning("Chat", "Muitas mensagens seguidas. Aguarde um pouco.")
+                    return
                 self.chat_input.delete(0, tk.END)
                 
             except Exception as e:
@@ -217,15 +284,22 @@ class HalmaClient:
 
     def forfeit_game(self):
         """Envia um comando de desistência via RPC."""
-        if not self.jogo_ativo: return
+        if not self.jogo_ativo or self.espectador: return
         if messagebox.askyesno("Confirmar", "Você tem certeza que deseja desistir?"):
             try:
-                self.servidor.desistir(self.player_id)
+                self.sessao.sincronizar(self.servidor, [["desistir"]])
             except Exception as e:
                 messagebox.showerror("Erro", f"Falha ao desistir: {e}")
 
     def on_closing(self):
         self.jogo_ativo = False # Para a thread de atualização
+        self.sessao.fila.fechar()
+        if not self.espectador:
+            try:
+                # Libera o assento (ou desiste) já, em vez de o servidor esperar o timeout da sessão
+                self.sessao.sair()
+            except Exception:
+                pass
         self.master.destroy()
         
     def display_message(self, message):
@@ -233,33 +307,6 @@ class HalmaClient:
         self.chat_display.insert(tk.END, message + "\n")
         self.chat_display.config(state='disabled')
         self.chat_display.yview(tk.END)
-        
-    def calculate_possible_moves(self, r, c):
-        moves = set()
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0: continue
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < BOARD_SIZE and 0 <= nc < BOARD_SIZE and self.board[nr][nc] == 0:
-                    moves.add((nr, nc))
-        self._find_jumps_recursive((r, c), moves, set())
-        return list(moves)
-
-    def _find_jumps_recursive(self, current_pos, all_moves, visited_path):
-        r, c = current_pos
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0: continue
-                jump_over_r, jump_over_c = r + dr, c + dc
-                dest_r, dest_c = r + 2*dr, c + 2*dc
-                if (0 <= dest_r < BOARD_SIZE and 0 <= dest_c < BOARD_SIZE and
-                        self.board[dest_r][dest_c] == 0 and
-                        self.board[jump_over_r][jump_over_c] != 0):
-                    if (dest_r, dest_c) not in visited_path:
-                        all_moves.add((dest_r, dest_c))
-                        new_path = visited_path.copy()
-                        new_path.add((dest_r, dest_c))
-                        self._find_jumps_recursive((dest_r, dest_c), all_moves, new_path)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Inicia o cliente RMI/RPC do jogo Halma.")
@@ -273,8 +320,30 @@ if __name__ == "__main__":
                         default=8000, # Porta padrão para RPC
                         help='Número da PORTA do servidor para conectar (padrão: 8000).')
     
+    parser.add_argument('--partida',
+                        type=int,
+                        default=None,
+                        help='ID da partida para entrar (padrão: primeira partida aguardando oponente).')
+
+    parser.add_argument('--protocol',
+                        choices=['xmlrpc', 'binario'],
+                        default='xmlrpc',
+                        help='Transporte: xmlrpc (HTTP) ou binario (TCP; use a --porta-binaria do servidor em --port).')
+
+    parser.add_argument('--espectador',
+                        action='store_true',
+                        help='Só assiste à partida informada em --partida (sem assento, sem limite de espectadores).')
+
+    parser.add_argument('--bloqueante',
+                        action='store_true',
+                        help='Envia jogadas e chat na thread da interface, esperando a resposta do servidor '
+                             '(padrão: a jogada aparece no clique e o envio segue em segundo plano).')
+
     args = parser.parse_args()
+    if args.espectador and args.partida is None:
+        parser.error("--espectador precisa de --partida.")
 
     root = tk.Tk()
-    app = HalmaClient(root, args.host, args.port)
+    app = HalmaClient(root, args.host, args.port, args.partida, args.protocol, args.espectador,
+                      otimista=not args.bloqueante)
     root.mainloop()
\ No newline at end of file
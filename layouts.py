@@ -0,0 +1,124 @@
+# layouts.py
+"""
+Layouts de tabuleiro: lado, número de jogadores e formato dos campos.
+
+Cada campo é uma "escada" num canto do tabuleiro, descrita pelo número de
+casas de cada linha a partir do canto: (4, 3, 2, 1) é o campo de 10 peças do
+tabuleiro 10x10; (5, 5, 4, 3, 2) o de 19 peças do 16x16. Cada jogador começa
+num canto e precisa ocupar todo o campo do canto oposto.
+
+As tabelas que os motores consultam a cada jogada (vizinhos e pulos de cada
+casa, e de que jogador é o campo de destino que contém cada casa) são
+calculadas uma única vez, quando o layout é criado, e compartilhadas por todas
+as partidas que o usam.
+"""
+from functools import lru_cache
+
+# As 8 direções de movimento (e de pulo, com o dobro da distância)
+DIRECOES = [(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc]
+
+# Canto de destino de quem começa em cada canto
+OPOSTO = {"NO": "SE", "SE": "NO", "NE": "SO", "SO": "NE"}
+
+
+def casa_do_canto(canto, r, c, n):
+    """A casa `r` linhas e `c` colunas para dentro do tabuleiro a partir de `canto`."""
+    return (r if canto[0] == "N" else n - 1 - r, c if canto[1] == "O" else n - 1 - c)
+
+
+def campo_de_canto(linhas, canto, n):
+    """Casas do campo em escada no `canto`, com linhas[k] casas na k-ésima linha a partir dele."""
+    return tuple(casa_do_canto(canto, r, c, n) for r, largura in enumerate(linhas) for c in range(largura))
+
+
+class Layout:
+    """
+    Definição imutável de um tabuleiro. Listas indexadas pelo número do jogador
+    têm a posição 0 sem uso, como no resto do jogo.
+
+    - campos[p]: casas iniciais do jogador p; destinos[p]: casas que ele precisa ocupar;
+    - alvos[p]: canto de destino do jogador p (referência para heurísticas de distância);
+    - vizinhos[r][c]: casas adjacentes a (r, c) dentro do tabuleiro;
+    - saltos[r][c]: pares (casa pulada, casa de destino) dos pulos a partir de (r, c);
+    - dono_destino[r][c]: jogador cujo campo de destino contém (r, c), ou 0.
+    """
+
+    def __init__(self, nome, board_size, linhas, cantos):
+        n = board_size
+        self.nome = nome
+        self.board_size = n
+        self.linhas = tuple(linhas)
+        self.cantos = tuple(cantos)
+        self.jogadores = len(cantos)
+        if not 2 <= self.jogadores <= 4 or len(set(cantos)) != self.jogadores:
+            raise ValueError(f"Layout {nome!r}: de 2 a 4 jogadores, cada um num canto diferente.")
+        if len(self.linhas) > n or max(self.linhas) > n:
+            raise ValueError(f"Layout {nome!r}: campo maior que o tabuleiro {n}x{n}.")
+
+        self.campos = [()] + [campo_de_canto(self.linhas, canto, n) for canto in cantos]
+        self.destinos = [()] + [campo_de_canto(self.linhas, OPOSTO[canto], n) for canto in cantos]
+        self.alvos = [None] + [casa_do_canto(OPOSTO[canto], 0, 0, n) for canto in cantos]
+        todas = [casa for campo in self.campos for casa in campo]
+        if len(todas) != len(set(todas)):
+            raise ValueError(f"Layout {nome!r}: campos se sobrepõem num tabuleiro {n}x{n}.")
+        self.pecas_por_jogador = len(self.campos[1])
+
+        dentro = range(n).__contains__
+        self.vizinhos = [[tuple((r + dr, c + dc) for dr, dc in DIRECOES if dentro(r + dr) and dentro(c + dc))
+                          for c in range(n)] for r in range(n)]
+        self.saltos = [[tuple(((r + dr, c + dc), (r + 2 * dr, c + 2 * dc)) for dr, dc in DIRECOES
+                              if dentro(r + 2 * dr) and dentro(c + 2 * dc))
+                        for c in range(n)] for r in range(n)]
+        self.dono_destino = [[0] * n for _ in range(n)]
+        for player in range(1, self.jogadores + 1):
+            for r, c in self.destinos[player]:
+                self.dono_destino[r][c] = player
+
+    def __repr__(self):
+        return f"Layout({self.nome!r}, {self.board_size}x{self.board_size}, {self.jogadores} jogadores)"
+
+    def descrever(self):
+        """Dados do layout para os clientes (RPC get_layout), só com tipos que o XML-RPC transporta."""
+        return {
+            "nome": self.nome,
+            "board_size": self.board_size,
+            "jogadores": self.jogadores,
+            "campos": [[list(casa) for casa in campo] for campo in self.campos[1:]],
+        }
+
+
+CAMPO_10 = (4, 3, 2, 1)
+CAMPO_13 = (4, 4, 3, 2)
+CAMPO_19 = (5, 5, 4, 3, 2)
+
+LAYOUTS = {
+    layout.nome: layout for layout in (
+        Layout("classico", 10, CAMPO_10, ("NO", "SE")),
+        Layout("grande", 16, CAMPO_19, ("NO", "SE")),
+        Layout("tres", 16, CAMPO_13, ("NO", "SE", "NE")),
+        Layout("quatro", 16, CAMPO_13, ("NO", "SE", "NE", "SO")),
+    )
+}
+LAYOUT_PADRAO = "classico"
+
+
+@lru_cache(maxsize=None)
+def _classico_de_lado(board_size):
+    return Layout(f"classico-{board_size}", board_size, CAMPO_10, ("NO", "SE"))
+
+
+def obter_layout(layout=LAYOUT_PADRAO):
+    """
+    Aceita um Layout, o nome de um layout registrado ou um lado de tabuleiro
+    (campos de 10 peças, dois jogadores). Sempre devolve a mesma instância para
+    o mesmo pedido, então as tabelas são compartilhadas.
+    """
+    if isinstance(layout, Layout):
+        return layout
+    if isinstance(layout, int):
+        return LAYOUTS[LAYOUT_PADRAO] if layout == LAYOUTS[LAYOUT_PADRAO].board_size else _classico_de_lado(layout)
+    if layout in LAYOUTS:
+        return LAYOUTS[layout]
+    if isinstance(layout, str) and layout.startswith("classico-") and layout[9:].isdigit():
+        return _classico_de_lado(int(layout[9:]))
+    raise ValueError(f"Layout desconhecido: {layout!r} (opções: {', '.join(LAYOUTS)})")
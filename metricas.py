@@ -0,0 +1,253 @@
+# metricas.py
+"""
+Métricas do servidor e profiler por amostragem.
+
+MetricasServidor é alimentada pelos transportes (XML-RPC e binário) em volta
+do despacho de cada chamada: contadores, erros, histograma de latência e bytes
+de requisição/resposta por método, chamadas em andamento e taxa de polls. Os
+medidores (partidas e jogadores ativos) são funções consultadas só na hora da
+leitura. A leitura sai como dict (RPC get_metrics) ou como texto no formato de
+exposição do Prometheus (GET /metrics).
+"""
+import collections
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+# Limites superiores (ms) das faixas do histograma de latência; a última faixa é "acima de 10 s"
+FAIXAS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+# Funções onde uma thread parada esperando (lock, socket, fila) aparece no topo da pilha;
+# o profiler não conta essas amostras
+_ESPERAS = frozenset({
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("selectors.py", "select"),
+    ("socket.py", "accept"), ("socket.py", "readinto"), ("queue.py", "get"), ("handlers.py", "dequeue"),
+})
+
+# Chamadas que só consultam estado (inclusive o long-poll `assistir` dos espectadores); `sync` conta como poll quando vem sem ações
+METODOS_POLL = frozenset({"aguardar_mudanca", "assistir", "get_estado_do_jogo", "get_novas_mensagens_chat"})
+
+
+class Histograma:
+    """Contagem de latências por faixa fixa; dois histogramas se somam faixa a faixa."""
+
+    def __init__(self, contagens=None):
+        self.contagens = list(contagens) if contagens else [0] * (len(FAIXAS_MS) + 1)
+
+    def registrar(self, segundos):
+        self.contagens[bisect_left(FAIXAS_MS, segundos * 1000)] += 1
+
+    def somar(self, outro):
+        self.contagens = [a + b for a, b in zip(self.contagens, outro.contagens)]
+
+    @property
+    def total(self):
+        return sum(self.contagens)
+
+    def percentil(self, p):
+        """Limite superior (ms) da faixa que contém o percentil `p`; inf para a última faixa."""
+        alvo = p / 100.0 * self.total
+        acumulado = 0
+        for faixa, contagem in enumerate(self.contagens):
+            acumulado += contagem
+            if contagem and acumulado >= alvo:
+                return FAIXAS_MS[faixa] if faixa < len(FAIXAS_MS) else float("inf")
+        return 0.0
+
+
+class TaxaJanela:
+    """Eventos por segundo na última janela de `segundos`, com um balde por segundo."""
+
+    def __init__(self, segundos=60):
+        self.segundos = segundos
+        self._baldes = [0] * segundos
+        self._segundo = [0] * segundos
+
+    def marcar(self, agora=None):
+        segundo = int(time.monotonic() if agora is None else agora)
+        i = segundo % self.segundos
+        if self._segundo[i] != segundo:
+            self._segundo[i] = segundo
+            self._baldes[i] = 0
+        self._baldes[i] += 1
+
+    def taxa(self, agora=None):
+        segundo = int(time.monotonic() if agora is None else agora)
+        total = sum(n for n, s in zip(self._baldes, self._segundo) if segundo - s < self.segundos)
+        return total / self.segundos
+
+
+class _Metodo:
+    __slots__ = ("chamadas", "erros", "em_andamento", "bytes_entrada", "bytes_saida", "segundos", "latencia")
+
+    def __init__(self):
+        self.chamadas = 0
+        self.erros = 0
+        self.em_andamento = 0
+        self.bytes_entrada = 0
+        self.bytes_saida = 0
+        self.segundos = 0.0
+        self.latencia = Histograma()
+
+
+class MetricasServidor:
+    def __init__(self):
+        self.inicio = time.time()
+        self._metodos = collections.defaultdict(_Metodo)
+        self._polls = TaxaJanela()
+        self._medidores = {}
+        self._lock = threading.Lock()
+
+    def medidor(self, nome, funcao):
+        """Registra um valor instantâneo (ex.: partidas ativas), lido por `funcao` a cada consulta."""
+        self._medidores[nome] = funcao
+
+    @staticmethod
+    def eh_poll(metodo, parametros):
+        if metodo == "sync":
+            return len(parametros) < 5 or not parametros[4]
+        return metodo in METODOS_POLL
+
+    def comecar(self, metodo, parametros=()):
+        """Chamado antes de despachar `metodo`; retorna o instante de início para `terminar`."""
+        with self._lock:
+            self._metodos[metodo].em_andamento += 1
+            if self.eh_poll(metodo, parametros):
+                self._polls.marcar()
+        return time.perf_counter()
+
+    def terminar(self, metodo, inicio, erro=False, bytes_entrada=0, bytes_saida=0):
+        duracao = time.perf_counter() - inicio
+        with self._lock:
+            m = self._metodos[metodo]
+            m.em_andamento -= 1
+            m.chamadas += 1
+            if erro:
+                m.erros += 1
+            m.bytes_entrada += bytes_entrada
+            m.bytes_saida += bytes_saida
+            m.segundos += duracao
+            m.latencia.registrar(duracao)
+
+    def exportar(self):
+        """
+        Leitura para o RPC get_metrics. Totais de bytes vão como float: o XML-RPC
+        só transporta inteiros de 32 bits e eles passam disso num servidor de longa duração.
+        """
+        with self._lock:
+            metodos = {
+                nome: {
+                    "chamadas": m.chamadas,
+                    "erros": m.erros,
+                    "em_andamento": m.em_andamento,
+                    "bytes_entrada": float(m.bytes_entrada),
+                    "bytes_saida": float(m.bytes_saida),
+                    "segundos": m.segundos,
+                    "latencia_ms": {"faixas": list(FAIXAS_MS), "contagens": list(m.latencia.contagens)},
+                }
+                for nome, m in self._metodos.items()
+            }
+            polls = self._polls.taxa()
+        return {
+            "tempo_no_ar": time.time() - self.inicio,
+            "polls_por_segundo": polls,
+            "medidores": {nome: funcao() for nome, funcao in self._medidores.items()},
+            "metodos": metodos,
+        }
+
+    def texto(self):
+        """As mesmas métricas no formato de texto do Prometheus."""
+        dados = self.exportar()
+        linhas = [
+            "# TYPE halma_tempo_no_ar_segundos gauge",
+            f"halma_tempo_no_ar_segundos {dados['tempo_no_ar']:.3f}",
+            "# TYPE halma_polls_por_segundo gauge",
+            f"halma_polls_por_segundo {dados['polls_por_segundo']:.3f}",
+        ]
+        for nome, valor in dados["medidores"].items():
+            linhas.append(f"# TYPE halma_{nome} gauge")
+            linhas.append(f"halma_{nome} {valor}")
+        for campo, tipo in (("chamadas", "counter"), ("erros", "counter"), ("em_andamento", "gauge"),
+                            ("bytes_entrada", "counter"), ("bytes_saida", "counter")):
+            linhas.append(f"# TYPE halma_rpc_{campo} {tipo}")
+            for metodo, m in dados["metodos"].items():
+                linhas.append(f'halma_rpc_{campo}{{metodo="{metodo}"}} {m[campo]:.0f}')
+        linhas.append("# TYPE halma_rpc_latencia_segundos histogram")
+        for metodo, m in dados["metodos"].items():
+            acumulado = 0
+            for limite, contagem in zip(FAIXAS_MS + (None,), m["latencia_ms"]["contagens"]):
+                acumulado += contagem
+                le = "+Inf" if limite is None else f"{limite / 1000:g}"
+                linhas.append(f'halma_rpc_latencia_segundos_bucket{{metodo="{metodo}",le="{le}"}} {acumulado}')
+            linhas.append(f'halma_rpc_latencia_segundos_sum{{metodo="{metodo}"}} {m["segundos"]:.6f}')
+            linhas.append(f'halma_rpc_latencia_segundos_count{{metodo="{metodo}"}} {acumulado}')
+        return "\n".join(linhas) + "\n"
+
+
+class ProfilerAmostragem:
+    """
+    Profiler por amostragem: uma thread olha a pilha de todas as outras a cada
+    `intervalo` segundos (sys._current_frames) e conta, por função, as amostras em
+    que ela estava executando (próprias) ou em qualquer ponto da pilha (inclusivas).
+    Threads paradas esperando não contam. Custo proporcional à frequência de
+    amostragem, não ao número de chamadas.
+    """
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.amostras = 0
+        self._proprias = collections.Counter()
+        self._inclusivas = collections.Counter()
+        # Protege os contadores: `relatorio` os percorre enquanto a thread de amostragem insere
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    @property
+    def ativo(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def iniciar(self):
+        if self.ativo:
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="profiler", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _loop(self):
+        propria_thread = threading.get_ident()
+        while not self._parar.wait(self.intervalo):
+            with self._lock:
+                self._amostrar(propria_thread)
+
+    def _amostrar(self, propria_thread):
+        for ident, frame in sys._current_frames().items():
+            if ident == propria_thread:
+                continue
+            codigo = frame.f_code
+            if (os.path.basename(codigo.co_filename), codigo.co_name) in _ESPERAS:
+                continue
+            self.amostras += 1
+            self._proprias[(codigo.co_filename, codigo.co_firstlineno, codigo.co_name)] += 1
+            vistas = set()
+            while frame is not None:
+                codigo = frame.f_code
+                chave = (codigo.co_filename, codigo.co_firstlineno, codigo.co_name)
+                if chave not in vistas:
+                    vistas.add(chave)
+                    self._inclusivas[chave] += 1
+                frame = frame.f_back
+
+    def relatorio(self, top=25):
+        """[[função, amostras próprias, amostras inclusivas], ...] das funções com mais amostras próprias."""
+        with self._lock:
+            return [[f"{nome} ({arquivo}:{linha})", n, self._inclusivas[(arquivo, linha, nome)]]
+                    for (arquivo, linha, nome), n in self._proprias.most_common(top)]
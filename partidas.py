@@ -0,0 +1,495 @@
+# partidas.py
+import threading
+import time
+from collections import deque
+
+from chat import TAMANHO_MAXIMO, LimitadorTaxa, RegistroChat
+from respostas import RespostaPronta
+from layouts import LAYOUT_PADRAO, obter_layout
+from tabuleiro import criar_jogo
+
+
+class PartidaNaoEncontrada(LookupError):
+    """Levantada quando um cliente referencia uma partida que não existe (ou já foi limpa)."""
+
+
+class Partida:
+    """Estado isolado de uma partida: tabuleiro, jogadores, chat e contador de estado.
+
+    Cada partida tem o seu próprio lock, então jogadas em partidas diferentes
+    nunca disputam o mesmo estado global.
+    """
+
+    # Quantas transições de estado ficam guardadas para responder com deltas
+    HISTORICO = 64
+
+    def __init__(self, partida_id, ao_encerrar=None, motor="lista", capacidade_chat=256, layout=LAYOUT_PADRAO):
+        self.partida_id = partida_id
+        self.ao_encerrar = ao_encerrar
+        # O layout define tamanho do tabuleiro, campos e quantos assentos a partida tem
+        self.layout = obter_layout(layout)
+        self.jogo = criar_jogo(motor, layout=self.layout)
+        self.jogadores = []
+        # player_id -> nível dos assentos ocupados pelo bot do servidor
+        self.bots = {}
+        # player_id -> token da sessão do jogador humano (vai para o diário, para as sessões
+        # voltarem com o mesmo token depois de um reinício do servidor)
+        self.tokens = {}
+        # Espectadores não ocupam assento; o contador só numera quem entra para assistir
+        self.espectadores = 0
+        # Chamadas de `assistir` esperando agora: os espectadores de fato assistindo
+        self.assistindo = 0
+        # Respostas de `assistir` para o (estado_id, último chat) atual, por ponto de partida do espectador
+        self._cache_espectadores = {}
+        self._cache_versao = None
+        # Chat com memória limitada e limite de mensagens por jogador
+        self.chat = RegistroChat(capacidade_chat, LimitadorTaxa())
+        # Contador de estado para o cliente saber se algo mudou
+        self.estado_id = 0
+        # (estado_id, jogada) de cada transição recente; jogada é None quando o tabuleiro não mudou
+        self.historico = deque(maxlen=self.HISTORICO)
+        self.encerrada_em = None
+        # Diário (diario.Diario.registrar) e versão da partida: cada evento registrado incrementa a versão
+        self.diario = None
+        self.versao = 0
+        self.lock = threading.Lock()
+        # Acorda quem está em `aguardar_mudanca` sempre que estado ou chat avançam
+        self.mudou = threading.Condition(self.lock)
+
+    @property
+    def cheia(self):
+        return len(self.jogadores) >= self.layout.jogadores
+
+    def registrar_jogador(self, bot=None, token=None):
+        """
+        Ocupa o próximo assento livre. Retorna 0 se a partida estiver cheia.
+        Com `bot` (nível), o assento fica marcado como do bot do servidor; uma
+        partida aceita um bot só (dois jogariam entre si sem fim). `token` é o
+        da sessão do jogador humano que ocupa o assento.
+        """
+        with self.lock:
+            if self.cheia or self.encerrada_em is not None:
+                return 0
+            if bot is not None and self.bots:
+                raise ValueError("A partida já tem um bot.")
+            # O menor assento livre: pode ser um que alguém liberou antes de a partida começar
+            player_id = min(set(range(1, self.layout.jogadores + 1)) - set(self.jogadores))
+            self.jogadores.append(player_id)
+            evento = {"t": "entrar", "j": player_id}
+            if bot is not None:
+                self.bots[player_id] = bot
+                evento["bot"] = bot
+            if token:
+                self.tokens[player_id] = token
+                evento["tk"] = token
+            self._registrar(evento)
+            if self.cheia:
+                self._avancar_estado()  # Informa que o jogo começou
+            return player_id
+
+    def liberar_assento(self, player_id):
+        """
+        Devolve o assento de quem saiu antes de a partida começar, para o próximo
+        jogador ocupar. Retorna False se a partida já começou (aí só cabe desistir).
+        """
+        with self.lock:
+            if self.cheia or player_id not in self.jogadores:
+                return False
+            self.jogadores.remove(player_id)
+            self.bots.pop(player_id, None)
+            self.tokens.pop(player_id, None)
+            self._registrar({"t": "sair", "j": player_id})
+            self._avancar_estado()  # Quem está esperando vê o assento vago
+            return True
+
+    def fazer_jogada(self, player_id, from_pos, to_pos):
+        with self.lock:
+            if not self.cheia:
+                return False, "Aguardando oponente."
+            sucesso, mensagem = self.jogo.move_piece(player_id, from_pos, to_pos)
+            if sucesso:
+                self._registrar({"t": "jogada", "j": player_id, "de": list(from_pos), "para": list(to_pos)})
+                # Atualiza o estado se a jogada foi válida
+                self._avancar_estado([player_id, list(from_pos), list(to_pos)])
+            return sucesso, mensagem
+
+    def get_estado(self, estado_id_conhecido=-1):
+        with self.lock:
+            return self._estado(estado_id_conhecido)
+
+    def _estado(self, estado_id_conhecido=-1):
+        """
+        Monta a resposta de estado para quem já conhece `estado_id_conhecido`:
+        - "igual": nada mudou, só o marcador;
+        - "delta": as jogadas aplicadas desde então, em ordem;
+        - "completo": o tabuleiro inteiro (id desconhecido ou antigo demais).
+        """
+        if estado_id_conhecido == self.estado_id:
+            return {"tipo": "igual", "partida_id": self.partida_id, "estado_id": self.estado_id}
+        estado = {
+            "partida_id": self.partida_id,
+            "turn": self.jogo.current_turn,
+            "winner": self.jogo.winner,
+            "estado_id": self.estado_id,
+            "jogadores_conectados": len(self.jogadores)
+        }
+        if self._tem_delta(estado_id_conhecido):
+            estado["tipo"] = "delta"
+            estado["desde"] = estado_id_conhecido
+            estado["jogadas"] = [jogada for eid, jogada in self.historico
+                                 if eid > estado_id_conhecido and jogada is not None]
+        else:
+            estado["tipo"] = "completo"
+            estado["board"] = [linha[:] for linha in self.jogo.get_board()]
+        return estado
+
+    def _tem_delta(self, estado_id_conhecido):
+        # As jogadas desde `estado_id_conhecido` ainda estão no histórico?
+        primeiro = self.historico[0][0] if self.historico else None
+        return (primeiro is not None and 0 <= estado_id_conhecido
+                and primeiro <= estado_id_conhecido + 1 <= self.estado_id)
+
+    def get_jogadas_legais(self, player_id):
+        """Lista [origem, [destinos...]] de cada peça do jogador que pode se mover."""
+        with self.lock:
+            return self._jogadas_legais(player_id)
+
+    def _jogadas_legais(self, player_id):
+        return [[list(origem), [list(d) for d in destinos]]
+                for origem, destinos in self.jogo.all_legal_moves(player_id).items()]
+
+    def enviar_chat(self, player_id, mensagem):
+        """
+        Retorna a sequência da mensagem, ou -1 se o jogador excedeu o limite de taxa
+        ou não ocupa um assento da partida.
+        """
+        with self.lock:
+            if player_id not in self.jogadores:
+                return -1
+            # O buffer só guarda este tanto; o diário grava o mesmo texto, não a mensagem inteira
+            texto = mensagem[:TAMANHO_MAXIMO]
+            hora = time.time()
+            seq = self.chat.adicionar(player_id, texto, hora)
+            if seq >= 0:
+                self._registrar({"t": "chat", "j": player_id, "h": hora, "x": texto})
+                self.mudou.notify_all()
+            return seq
+
+    def get_novas_mensagens_chat(self, ultimo_id_conhecido):
+        with self.lock:
+            mensagens, lacuna = self.chat.desde(ultimo_id_conhecido)
+            return {"mensagens": mensagens, "lacuna_chat": lacuna}
+
+    def aguardar_mudanca(self, estado_id, chat_id, timeout, player_id=None):
+        """
+        Bloqueia até o estado passar de `estado_id` ou o chat passar de `chat_id`,
+        ou até `timeout` segundos. Retorna o estado (relativo a `estado_id`) e as mensagens novas.
+        Com `player_id`, inclui as jogadas legais quando o estado mudou e é a vez dele.
+        """
+        with self.mudou:
+            self.mudou.wait_for(
+                lambda: self.estado_id != estado_id or self.chat.ultimo_seq > chat_id,
+                timeout)
+            mensagens, lacuna = self.chat.desde(chat_id)
+            resposta = {"estado": self._estado(estado_id), "mensagens": mensagens, "lacuna_chat": lacuna}
+            if (player_id is not None and self.estado_id != estado_id
+                    and self.jogo.current_turn == player_id and not self.jogo.winner):
+                resposta["jogadas_legais"] = self._jogadas_legais(player_id)
+            return resposta
+
+    def registrar_espectador(self):
+        """Retorna o número do novo espectador (sem limite e sem assento)."""
+        with self.lock:
+            self.espectadores += 1
+            return self.espectadores
+
+    def assistir(self, estado_id, chat_id, timeout):
+        """
+        Long-poll dos espectadores, com a resposta de `aguardar_mudanca` sem jogadas legais.
+        Espectadores no mesmo ponto (mesmo estado_id e chat conhecidos) recebem a
+        mesma RespostaPronta: o dict é montado e serializado uma vez por estado.
+        """
+        with self.mudou:
+            self.assistindo += 1
+            try:
+                self.mudou.wait_for(
+                    lambda: self.estado_id != estado_id or self.chat.ultimo_seq > chat_id,
+                    timeout)
+            finally:
+                self.assistindo -= 1
+            versao = (self.estado_id, self.chat.ultimo_seq)
+            if versao != self._cache_versao:
+                self._cache_espectadores = {}
+                self._cache_versao = versao
+            # Quem não tem delta recebe o mesmo "completo", seja qual for o id que mandou
+            base = estado_id if estado_id == self.estado_id or self._tem_delta(estado_id) else -1
+            # Ids de chat abaixo do buffer dão todos a mesma resposta (com lacuna)
+            piso = max(-1, self.chat.ultimo_seq - self.chat.capacidade - 1)
+            chave = (base, max(piso, min(chat_id, self.chat.ultimo_seq)))
+            pronta = self._cache_espectadores.get(chave)
+            if pronta is None:
+                mensagens, lacuna = self.chat.desde(chave[1])
+                pronta = self._cache_espectadores[chave] = RespostaPronta(
+                    {"estado": self._estado(base), "mensagens": mensagens, "lacuna_chat": lacuna})
+            return pronta
+
+    def desistir(self, player_id):
+        with self.lock:
+            if not self.cheia:
+                return False
+            if self.jogo.winner:  # Se o jogo já acabou, não faz nada
+                return True
+            # Só quem está sentado e ainda na rotação pode desistir (como no chat)
+            if player_id not in self.jogadores or player_id in self.jogo.eliminados:
+                return False
+            self.jogo.forfeit(player_id)
+            self._registrar({"t": "desistir", "j": player_id})
+            self._avancar_estado(reiniciar=True)
+            return True
+
+    def aplicar_evento(self, evento):
+        """Reaplica um evento do diário durante a recuperação (sem validar limites nem registrar de novo)."""
+        with self.lock:
+            if evento["v"] <= self.versao:
+                return  # Já incluído no snapshot
+            tipo = evento["t"]
+            if tipo == "entrar":
+                self.jogadores.append(evento["j"])
+                if "bot" in evento:
+                    self.bots[evento["j"]] = evento["bot"]
+                if "tk" in evento:
+                    self.tokens[evento["j"]] = evento["tk"]
+                if self.cheia:
+                    self._avancar_estado()
+            elif tipo == "sair":
+                self.jogadores.remove(evento["j"])
+                self.bots.pop(evento["j"], None)
+                self.tokens.pop(evento["j"], None)
+                self._avancar_estado()
+            elif tipo == "jogada":
+                self.jogo.move_piece(evento["j"], evento["de"], evento["para"])
+                self._avancar_estado([evento["j"], evento["de"], evento["para"]])
+            elif tipo == "desistir":
+                self.jogo.forfeit(evento["j"])
+                self._avancar_estado(reiniciar=True)
+            elif tipo == "chat":
+                self.chat.adicionar(evento["j"], evento["x"], evento["h"], limitar=False)
+            self.versao = evento["v"]
+
+    def exportar(self):
+        """Estado completo da partida, serializável em JSON (para o snapshot do diário)."""
+        with self.lock:
+            return {
+                "partida_id": self.partida_id,
+                "layout": self.layout.nome,
+                "versao": self.versao,
+                "estado_id": self.estado_id,
+                "jogadores": self.jogadores,
+                "bots": [[player_id, nivel] for player_id, nivel in self.bots.items()],
+                "tokens": [[player_id, token] for player_id, token in self.tokens.items()],
+                "board": self.jogo.get_board(),
+                "turn": self.jogo.current_turn,
+                "winner": self.jogo.winner,
+                "eliminados": sorted(self.jogo.eliminados),
+                "chat": self.chat.exportar(),
+                "chat_proximo": self.chat.ultimo_seq + 1
+            }
+
+    def carregar(self, dados):
+        """Inverso de `exportar`."""
+        with self.lock:
+            self.versao = dados["versao"]
+            self.estado_id = dados["estado_id"]
+            self.jogadores = list(dados["jogadores"])
+            self.bots = {player_id: nivel for player_id, nivel in dados.get("bots", [])}
+            self.tokens = {player_id: token for player_id, token in dados.get("tokens", [])}
+            self.jogo.restaurar(dados["board"], dados["turn"], dados["winner"], dados.get("eliminados", ()))
+            self.chat.carregar(dados["chat"], dados["chat_proximo"])
+            self._marcar_se_encerrada()
+
+    def resumo(self):
+        with self.lock:
+            return {
+                "partida_id": self.partida_id,
+                "layout": self.layout.nome,
+                "jogadores_conectados": len(self.jogadores),
+                "winner": self.jogo.winner,
+                "estado_id": self.estado_id
+            }
+
+    def _registrar(self, evento):
+        # Chamado com o lock da partida, então a ordem no diário é a ordem em que os eventos aconteceram
+        self.versao += 1
+        if self.diario is not None:
+            evento["p"] = self.partida_id
+            evento["v"] = self.versao
+            self.diario(evento)
+
+    def _avancar_estado(self, jogada=None, reiniciar=False):
+        # Chamado com o lock da partida: registra a transição e acorda os long-polls.
+        # `reiniciar` é para mudanças que um delta de jogadas não descreve (peças
+        # removidas numa desistência): esvazia o histórico e quem estava antes
+        # recebe o tabuleiro completo.
+        self.estado_id += 1
+        if reiniciar:
+            self.historico.clear()
+        else:
+            self.historico.append((self.estado_id, jogada))
+        self._marcar_se_encerrada()
+        self.mudou.notify_all()
+
+    def _marcar_se_encerrada(self):
+        if self.jogo.winner and self.encerrada_em is None:
+            self.encerrada_em = time.monotonic()
+            if self.ao_encerrar:
+                self.ao_encerrar(self)
+
+
+class RegistroPartidas:
+    """Guarda todas as partidas ativas de um processo servidor.
+
+    O lock do registro protege apenas o dicionário de partidas e a fila de
+    partidas aguardando oponente; o estado de cada partida fica sob o lock dela.
+    Partidas encerradas continuam consultáveis por `retencao` segundos (para
+    os clientes verem o resultado) e depois são removidas por `limpar_encerradas`.
+    """
+
+    def __init__(self, retencao=30.0, motor="lista", layout=LAYOUT_PADRAO):
+        self.retencao = retencao
+        self.motor = motor
+        # Layout das partidas criadas sem layout explícito (e das que o matchmaking cria)
+        self.layout = obter_layout(layout).nome
+        self.diario = None
+        # Chamado quando surge uma remoção agendada que pode ser a mais próxima
+        self.ao_agendar = None
+        self._partidas = {}
+        self._aguardando = deque()
+        self._encerradas = deque()
+        self._ultimo_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._partidas)
+
+    def criar(self, layout=None):
+        layout = obter_layout(layout or self.layout).nome  # Valida antes de ocupar um ID
+        with self._lock:
+            self._ultimo_id += 1
+            partida = self._nova_partida(self._ultimo_id, layout)
+            self._aguardando.append(partida)
+            if self.diario is not None:
+                self.diario.registrar({"t": "criar", "p": partida.partida_id, "layout": layout})
+            return partida
+
+    def _nova_partida(self, partida_id, layout=LAYOUT_PADRAO):
+        partida = Partida(partida_id, ao_encerrar=self._agendar_remocao, motor=self.motor, layout=layout)
+        partida.diario = self.diario.registrar if self.diario is not None else None
+        self._partidas[partida_id] = partida
+        return partida
+
+    def obter(self, partida_id):
+        partida = self._partidas.get(partida_id)
+        if partida is None:
+            raise PartidaNaoEncontrada(f"Partida {partida_id} não encontrada.")
+        return partida
+
+    def todas(self):
+        with self._lock:
+            return list(self._partidas.values())
+
+    def espectadores(self):
+        """Espectadores com um long-poll `assistir` em curso (não os que já entraram e saíram)."""
+        return sum(p.assistindo for p in self.todas())
+
+    def jogadores_ativos(self):
+        """Jogadores sentados em partidas que ainda não terminaram."""
+        return sum(len(p.jogadores) for p in self.todas() if p.encerrada_em is None)
+
+    def listar(self, apenas_abertas=False):
+        with self._lock:
+            partidas = list(self._aguardando if apenas_abertas else self._partidas.values())
+        return [p.resumo() for p in partidas if not (apenas_abertas and p.cheia)]
+
+    def entrar(self, partida_id=None, layout=None, token=None):
+        """Coloca um jogador (com o `token` da sessão dele) numa partida.
+
+        Sem `partida_id`, reaproveita a partida mais antiga do `layout` (padrão:
+        o do registro) que ainda espera oponente ou cria uma nova. Retorna
+        `(partida, player_id)`; `player_id` é 0 quando a partida pedida está cheia.
+        """
+        if partida_id is not None:
+            partida = self.obter(partida_id)
+            return partida, partida.registrar_jogador(token=token)
+
+        layout = obter_layout(layout or self.layout).nome
+        while True:
+            with self._lock:
+                while self._aguardando and self._aguardando[0].cheia:
+                    self._aguardando.popleft()
+                partida = next((p for p in self._aguardando if p.layout.nome == layout and not p.cheia), None)
+            if partida is None:
+                partida = self.criar(layout)
+            player_id = partida.registrar_jogador(token=token)
+            if player_id:
+                return partida, player_id
+
+    def _agendar_remocao(self, partida):
+        # Chamado pela própria partida (com o lock dela) quando surge um vencedor.
+        with self._lock:
+            primeira = not self._encerradas
+            self._encerradas.append((partida.encerrada_em + self.retencao, partida.partida_id))
+        if primeira and self.ao_agendar is not None:
+            self.ao_agendar()
+
+    def proxima_remocao(self):
+        """Instante em que vence a retenção da próxima partida encerrada, ou None."""
+        encerradas = self._encerradas
+        return encerradas[0][0] if encerradas else None
+
+    def limpar_encerradas(self, agora=None):
+        """Remove partidas cujo prazo de retenção já passou. Retorna quantas saíram."""
+        agora = time.monotonic() if agora is None else agora
+        removidas = 0
+        with self._lock:
+            while self._encerradas and self._encerradas[0][0] <= agora:
+                _, partida_id = self._encerradas.popleft()
+                if self._partidas.pop(partida_id, None) is not None:
+                    removidas += 1
+                    if self.diario is not None:
+                        self.diario.registrar({"t": "remover", "p": partida_id})
+        return removidas
+
+    def exportar(self):
+        """Estado de todas as partidas, serializável em JSON (para o snapshot do diário)."""
+        with self._lock:
+            partidas = list(self._partidas.values())
+            ultimo_id = self._ultimo_id
+        return {"ultimo_id": ultimo_id, "partidas": [p.exportar() for p in partidas]}
+
+    def recuperar(self, diario):
+        """
+        Reconstrói as partidas a partir do snapshot e dos segmentos do `diario`
+        e passa a registrar nele todas as mudanças seguintes.
+        Deve ser chamado com o registro vazio, antes de atender clientes.
+        """
+        snapshot, eventos = diario.carregar()
+        self.diario = diario
+        if snapshot is not None:
+            self._ultimo_id = snapshot["ultimo_id"]
+            for dados in snapshot["partidas"]:
+                self._nova_partida(dados["partida_id"], dados.get("layout", LAYOUT_PADRAO)).carregar(dados)
+        for evento in eventos:
+            tipo, partida_id = evento["t"], evento["p"]
+            if tipo == "criar":
+                self._ultimo_id = max(self._ultimo_id, partida_id)
+                if partida_id not in self._partidas:
+                    self._nova_partida(partida_id, evento.get("layout", LAYOUT_PADRAO))
+            elif tipo == "remover":
+                self._partidas.pop(partida_id, None)
+            elif partida_id in self._partidas:
+                self._partidas[partida_id].aplicar_evento(evento)
+        self._aguardando.extend(p for p in sorted(self._partidas.values(), key=lambda p: p.partida_id)
+                                if not p.cheia and p.encerrada_em is None)
+        diario.capturar = self.exportar
+        diario.iniciar(snapshot_inicial=bool(eventos))
+        return len(eventos)
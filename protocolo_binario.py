@@ -0,0 +1,299 @@
+# protocolo_binario.py
+"""
+Transporte binário alternativo ao XML-RPC para os mesmos métodos de HalmaServerLogic.
+
+Cada mensagem vai num quadro [tamanho uint32][payload] sobre TCP puro, numa
+conexão persistente. O payload é um valor codificado com tags de 1 byte (no
+estilo do msgpack); listas de listas de inteiros pequenos, como o `board`,
+viram uma matriz de bytes (100 bytes para o tabuleiro 10x10).
+
+Requisição: [metodo, [parametros...]]
+Resposta:   [0, resultado] ou [1, "mensagem de erro"]
+"""
+import socket
+import socketserver
+import struct
+import threading
+import xmlrpc.client
+
+from respostas import RespostaPronta
+
+_NONE, _FALSE, _TRUE, _INT8, _INT32, _INT64, _FLOAT, _STR, _BYTES, _LIST, _DICT, _MATRIZ = range(12)
+
+_U32 = struct.Struct(">I")
+_I32 = struct.Struct(">i")
+_I64 = struct.Struct(">q")
+_F64 = struct.Struct(">d")
+
+# Maior quadro aceito; protege o servidor de tamanhos absurdos vindos da rede
+TAMANHO_MAXIMO = 16 * 1024 * 1024
+
+
+class ErroProtocolo(ValueError):
+    """Quadro ou valor malformado no protocolo binário."""
+
+
+def _eh_matriz(valor):
+    # Lista não vazia de linhas do mesmo tamanho, só com inteiros 0..255
+    primeira = valor[0]
+    if type(primeira) is not list or not primeira or len(valor) > 255 or len(primeira) > 255:
+        return False
+    largura = len(primeira)
+    for linha in valor:
+        if type(linha) is not list or len(linha) != largura:
+            return False
+        for x in linha:
+            if type(x) is not int or not 0 <= x <= 255:
+                return False
+    return True
+
+
+def _codificar(valor, saida):
+    tipo = type(valor)
+    if valor is None:
+        saida.append(_NONE)
+    elif tipo is bool:
+        saida.append(_TRUE if valor else _FALSE)
+    elif tipo is int:
+        if -128 <= valor <= 127:
+            saida.append(_INT8)
+            saida.append(valor & 0xFF)
+        elif -2**31 <= valor < 2**31:
+            saida.append(_INT32)
+            saida += _I32.pack(valor)
+        else:
+            saida.append(_INT64)
+            saida += _I64.pack(valor)
+    elif tipo is float:
+        saida.append(_FLOAT)
+        saida += _F64.pack(valor)
+    elif tipo is str:
+        dados = valor.encode("utf-8")
+        saida.append(_STR)
+        saida += _U32.pack(len(dados))
+        saida += dados
+    elif tipo is bytes or tipo is bytearray:
+        saida.append(_BYTES)
+        saida += _U32.pack(len(valor))
+        saida += valor
+    elif tipo is list or tipo is tuple:
+        if valor and tipo is list and _eh_matriz(valor):
+            saida.append(_MATRIZ)
+            saida.append(len(valor))
+            saida.append(len(valor[0]))
+            saida += bytes(x for linha in valor for x in linha)
+        else:
+            saida.append(_LIST)
+            saida += _U32.pack(len(valor))
+            for item in valor:
+                _codificar(item, saida)
+    elif tipo is dict:
+        saida.append(_DICT)
+        saida += _U32.pack(len(valor))
+        for chave, item in valor.items():
+            _codificar(chave, saida)
+            _codificar(item, saida)
+    else:
+        raise TypeError(f"Tipo não suportado pelo protocolo binário: {tipo.__name__}")
+
+
+def codificar(valor):
+    """Codifica um valor (None, bool, int, float, str, bytes, list, tuple, dict) em bytes."""
+    saida = bytearray()
+    _codificar(valor, saida)
+    return bytes(saida)
+
+
+def _decodificar(dados, pos):
+    tag = dados[pos]
+    pos += 1
+    if tag == _NONE:
+        return None, pos
+    if tag == _FALSE:
+        return False, pos
+    if tag == _TRUE:
+        return True, pos
+    if tag == _INT8:
+        x = dados[pos]
+        return (x - 256 if x > 127 else x), pos + 1
+    if tag == _INT32:
+        return _I32.unpack_from(dados, pos)[0], pos + 4
+    if tag == _INT64:
+        return _I64.unpack_from(dados, pos)[0], pos + 8
+    if tag == _FLOAT:
+        return _F64.unpack_from(dados, pos)[0], pos + 8
+    if tag == _STR or tag == _BYTES:
+        n = _U32.unpack_from(dados, pos)[0]
+        pos += 4
+        bruto = bytes(dados[pos:pos + n])
+        return (bruto.decode("utf-8") if tag == _STR else bruto), pos + n
+    if tag == _LIST:
+        n = _U32.unpack_from(dados, pos)[0]
+        pos += 4
+        itens = []
+        for _ in range(n):
+            item, pos = _decodificar(dados, pos)
+            itens.append(item)
+        return itens, pos
+    if tag == _DICT:
+        n = _U32.unpack_from(dados, pos)[0]
+        pos += 4
+        resultado = {}
+        for _ in range(n):
+            chave, pos = _decodificar(dados, pos)
+            resultado[chave], pos = _decodificar(dados, pos)
+        return resultado, pos
+    if tag == _MATRIZ:
+        linhas, colunas = dados[pos], dados[pos + 1]
+        pos += 2
+        return [list(dados[pos + r * colunas:pos + (r + 1) * colunas]) for r in range(linhas)], pos + linhas * colunas
+    raise ErroProtocolo(f"Tag desconhecida: {tag}")
+
+
+def decodificar(dados):
+    """Inverso de `codificar`."""
+    try:
+        valor, pos = _decodificar(dados, 0)
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise ErroProtocolo(f"Payload malformado: {e}") from e
+    if pos != len(dados):
+        raise ErroProtocolo("Bytes sobrando depois do valor.")
+    return valor
+
+
+def enviar_quadro(sock, payload):
+    sock.sendall(_U32.pack(len(payload)) + payload)
+
+
+def _ler_exato(arquivo, n):
+    dados = arquivo.read(n)
+    if len(dados) != n:
+        raise ConnectionError("Conexão encerrada no meio de um quadro.")
+    return dados
+
+
+def ler_quadro(arquivo):
+    """Lê um quadro de um arquivo de socket. Retorna None se a conexão fechou entre quadros."""
+    cabecalho = arquivo.read(4)
+    if not cabecalho:
+        return None
+    if len(cabecalho) != 4:
+        raise ConnectionError("Conexão encerrada no meio de um quadro.")
+    tamanho = _U32.unpack(cabecalho)[0]
+    if tamanho > TAMANHO_MAXIMO:
+        raise ErroProtocolo(f"Quadro de {tamanho} bytes excede o limite.")
+    return _ler_exato(arquivo, tamanho)
+
+
+class _HandlerBinario(socketserver.StreamRequestHandler):
+    # Mesmo prazo do handler XML-RPC para clientes travados ou conexões ociosas
+    timeout = 15
+
+    def handle(self):
+        while True:
+            try:
+                payload = ler_quadro(self.rfile)
+            except (OSError, ConnectionError, ErroProtocolo):
+                return
+            if payload is None:
+                return
+            enviar_quadro(self.connection, self.server.despachar(payload))
+
+
+class ServidorBinario(socketserver.ThreadingTCPServer):
+    """
+    Expõe os métodos públicos de `instancia` pelo protocolo binário (uma thread por conexão).
+    Com `metricas` (metricas.MetricasServidor), mede cada chamada a um método existente.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 256
+
+    def __init__(self, endereco, instancia, metricas=None):
+        super().__init__(endereco, _HandlerBinario)
+        self.instancia = instancia
+        self.metricas = metricas
+
+    def despachar(self, payload):
+        inicio = None
+        try:
+            metodo, parametros = decodificar(payload)
+            if not isinstance(metodo, str) or metodo.startswith("_"):
+                raise AttributeError(f"Método {metodo!r} não é suportado.")
+            funcao = getattr(self.instancia, metodo)
+            if self.metricas is not None:
+                inicio = self.metricas.comecar(metodo, parametros)
+            resultado = funcao(*parametros)
+            if type(resultado) is RespostaPronta:
+                resposta = resultado.bytes_para("binario", _codificar_sucesso)
+            else:
+                resposta = _codificar_sucesso(resultado)
+            erro = False
+        except Exception as e:
+            resposta = codificar([1, f"{type(e).__name__}: {e}"])
+            erro = True
+        if inicio is not None:
+            self.metricas.terminar(metodo, inicio, erro, len(payload), len(resposta))
+        return resposta
+
+
+def _codificar_sucesso(resultado):
+    return codificar([0, resultado])
+
+
+class ClienteBinario:
+    """
+    Proxy no estilo de xmlrpc.client.ServerProxy: `cliente.metodo(*args)`.
+    Usa uma conexão TCP persistente e, como o ServerProxy, não é thread-safe.
+    Erros do servidor viram xmlrpc.client.Fault, para o chamador tratar os dois transportes igual.
+    """
+
+    def __init__(self, host, port, timeout=None):
+        self._endereco = (host, port)
+        self._timeout = timeout
+        self._sock = None
+        self._arquivo = None
+
+    def _conectar(self):
+        self._sock = socket.create_connection(self._endereco, timeout=self._timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._arquivo = self._sock.makefile("rb")
+
+    def close(self):
+        if self._sock is not None:
+            self._arquivo.close()
+            self._sock.close()
+            self._sock = self._arquivo = None
+
+    def chamar(self, metodo, *parametros):
+        payload = codificar([metodo, list(parametros)])
+        for tentativa in (0, 1):
+            if self._sock is None:
+                self._conectar()
+            try:
+                enviar_quadro(self._sock, payload)
+                resposta = ler_quadro(self._arquivo)
+                if resposta is None:
+                    raise ConnectionResetError("Servidor fechou a conexão.")
+                break
+            except (ConnectionError, BrokenPipeError):
+                # Conexão ociosa que o servidor já encerrou: reconecta uma vez
+                self.close()
+                if tentativa:
+                    raise
+        erro, resultado = decodificar(resposta)
+        if erro:
+            raise xmlrpc.client.Fault(1, resultado)
+        return resultado
+
+    def __getattr__(self, nome):
+        if nome.startswith("_"):
+            raise AttributeError(nome)
+        return lambda *parametros: self.chamar(nome, *parametros)
+
+
+def iniciar_em_thread(host, port, instancia, metricas=None):
+    """Sobe o ServidorBinario numa thread daemon e o retorna."""
+    servidor = ServidorBinario((host, port), instancia, metricas)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
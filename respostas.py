@@ -0,0 +1,23 @@
+# respostas.py
+
+
+class RespostaPronta:
+    """
+    Resultado de RPC que muitos clientes recebem igual (o estado visto pelos
+    espectadores). Cada transporte serializa o valor uma única vez, na primeira
+    vez que precisa, e envia os mesmos bytes a todos os clientes seguintes.
+    Em chamadas diretas (sem transporte), o valor está em `valor`.
+    """
+    __slots__ = ("valor", "_serializado")
+
+    def __init__(self, valor):
+        self.valor = valor
+        self._serializado = {}
+
+    def bytes_para(self, transporte, serializar):
+        """Bytes de `serializar(valor)` para `transporte`, calculados só na primeira chamada."""
+        dados = self._serializado.get(transporte)
+        if dados is None:
+            # Duas threads podem serializar ao mesmo tempo na primeira vez; o resultado é o mesmo
+            dados = self._serializado[transporte] = serializar(self.valor)
+        return dados
@@ -1,97 +1,562 @@
 # servidor_rpc.py
-from xmlrpc.server import SimpleXMLRPCServer
-from tabuleiro import HalmaGame # Usa o mesmo tabuleiro.py
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from diario import Diario
+from ia import MotorIA, TEMPO_POR_NIVEL
+from layouts import LAYOUT_PADRAO, LAYOUTS
+from metricas import MetricasServidor, ProfilerAmostragem
+from partidas import PartidaNaoEncontrada, RegistroPartidas
+from respostas import RespostaPronta
+from sessoes import AUSENTE, RegistroSessoes
+from tabuleiro import MOTORES
+import protocolo_binario
 import argparse
+import logging
+import logging.handlers
+import queue
+import socketserver
+import sys
 import time
 import threading
+import xmlrpc.client
+
+log = logging.getLogger("halma")
 
 class HalmaServerLogic:
-    def __init__(self):
-        self.jogo = HalmaGame()
-        self.jogadores = []
-        self.chat_messages = []
-        # Contador de estado para o cliente saber se algo mudou
-        self.estado_id = 0
-        print("[INFO] Instância do jogo e lógica do servidor iniciadas.")
-
-    def registrar_jogador(self):
-        """Chamado por um cliente para entrar no jogo."""
-        if len(self.jogadores) >= 2:
-            return 0  # Retorna 0 como ID de erro (sala cheia)
-        
-        player_id = len(self.jogadores) + 1
-        self.jogadores.append(player_id)
-        print(f"[INFO] Jogador {player_id} registrado.")
-        
-        if len(self.jogadores) == 2:
-            print("[INFO] Ambos os jogadores conectados. O jogo vai começar.")
-            self.estado_id += 1 # Informa que o jogo começou
-            
-        return player_id
+    # Limite de espera de um long-poll, abaixo do timeout típico de proxies HTTP
+    MAX_ESPERA = 30
+    # O bot confere a cada INTERVALO_BOT segundos se a partida ainda existe; sem nenhuma
+    # mudança nela em OCIOSIDADE_BOT segundos, ele sai
+    INTERVALO_BOT = 5.0
+    OCIOSIDADE_BOT = 600.0
 
-    def fazer_jogada(self, player_id, from_pos, to_pos):
-        """Cliente chama esta função para tentar mover uma peça."""
+    def __init__(self, retencao=30.0, motor="lista", diretorio_diario=None, snapshot_a_cada=50000,
+                 processos_ia=1, layout=LAYOUT_PADRAO, timeout_sessao=60.0, carencia=30.0, profiler=False):
+        # Cada partida tem seu próprio tabuleiro, chat e lock
+        self.partidas = RegistroPartidas(retencao=retencao, motor=motor, layout=layout)
+        self.diario = None
+        # Sessões dos jogadores humanos. A thread zeladora (iniciar_zelador) expira as
+        # abandonadas e remove as partidas encerradas, dormindo até o próximo prazo
+        self.sessoes = RegistroSessoes(timeout_sessao, carencia)
+        self._acordar_zelador = threading.Event()
+        self._parar_zelador = threading.Event()
+        self._zelador = None
+        self._lock_zelador = threading.Lock()
+        self.sessoes.ao_agendar = self.partidas.ao_agendar = self._acordar_zelador.set
+        # Motor do bot, criado na primeira partida contra ele (o pool de processos é caro de subir)
+        self.processos_ia = processos_ia
+        self._ia = None
+        self._lock_ia = threading.Lock()
+        # Alimentadas pelos transportes em volta de cada chamada (ver MedicaoXMLRPC e ServidorBinario)
+        self.metricas = MetricasServidor()
+        self.metricas.medidor("partidas_ativas", lambda: len(self.partidas))
+        self.metricas.medidor("jogadores_ativos", self.partidas.jogadores_ativos)
+        self.metricas.medidor("espectadores", self.partidas.espectadores)
+        self.metricas.medidor("sessoes", lambda: len(self.sessoes))
+        self.metricas.medidor("sessoes_ausentes", lambda: self.sessoes.ausentes)
+        # Profiler por amostragem: só com `profiler` (--profiler) ele liga e o RPC pode
+        # ligá-lo e desligá-lo; senão qualquer cliente poderia pôr uma thread amostrando o servidor
+        self.perfil = ProfilerAmostragem()
+        self._profiler_liberado = profiler
+        if profiler:
+            self.perfil.iniciar()
+        if diretorio_diario:
+            # Recupera as partidas do diário antes de atender qualquer cliente
+            self.diario = Diario(diretorio_diario, snapshot_a_cada)
+            # Eventos esperando o disco e se a escritora está falhando (disco cheio, erro de E/S)
+            self.metricas.medidor("diario_pendentes", lambda: self.diario.pendentes)
+            self.metricas.medidor("diario_falha", lambda: int(self.diario.falha is not None))
+            inicio = time.perf_counter()
+            eventos = self.partidas.recuperar(self.diario)
+            log.info("Diário em %s: %d partida(s) recuperada(s), %d evento(s) reaplicado(s) em %.2fs.",
+                     diretorio_diario, len(self.partidas), eventos, time.perf_counter() - inicio)
+            # Bots de partidas em andamento voltam a jogar; os humanos ganham sessões com o
+            # token que o diário guardou e o prazo normal para dar sinal de vida
+            for partida in self.partidas.todas():
+                if partida.jogo.winner is None:
+                    for player_id, nivel in partida.bots.items():
+                        self._iniciar_bot(partida, player_id, nivel)
+                    for player_id in partida.jogadores:
+                        if player_id not in partida.bots:
+                            self.sessoes.abrir(partida.partida_id, player_id,
+                                               token=partida.tokens.get(player_id))
+        log.info("Registro de partidas e lógica do servidor iniciados.")
 
-        if len(self.jogadores) < 2:
-            return False
-        
-        print(f"[JOGADA] Jogador {player_id} tentando mover de {from_pos} para {to_pos}")
-        sucesso, mensagem = self.jogo.move_piece(player_id, from_pos, to_pos)
-        if sucesso:
-            self.estado_id += 1 # Atualiza o estado se a jogada foi válida
-        return sucesso, mensagem
-
-    def get_estado_do_jogo(self):
-        """
-        Cliente chama esta função (em loop) para pegar o estado completo do jogo.
-        Isso é o coração da arquitetura de polling (sondagem).
-        """
-        return {
-            "board": self.jogo.get_board(),
-            "turn": self.jogo.current_turn,
-            "winner": self.jogo.winner,
-            "estado_id": self.estado_id,
-            "jogadores_conectados": len(self.jogadores)
-        }
-        
-    def enviar_chat(self, player_id, mensagem):
-        """Cliente chama para enviar uma mensagem de chat."""
-        print(f"[CHAT] Jogador {player_id}: {mensagem}")
-        self.chat_messages.append(f"Jogador {player_id}: {mensagem}")
-        # Retorna o ID da última mensagem (o índice dela)
-        return len(self.chat_messages) - 1
-        
-    def get_novas_mensagens_chat(self, ultimo_id_conhecido):
-        """Cliente chama para pegar apenas as mensagens que ele ainda não viu."""
-        if ultimo_id_conhecido < len(self.chat_messages) - 1:
-            return self.chat_messages[ultimo_id_conhecido + 1:]
-        return []
-
-    def desistir(self, player_id):
-        """Cliente chama para desistir."""
+    def _fechar(self):
+        """
+        Grava o que estiver pendente no diário (se houver) antes de o processo sair.
+        Privado: a instância é registrada nos transportes, que só escondem nomes com "_".
+        """
+        self._parar_zelador.set()
+        self._acordar_zelador.set()
+        if self.diario is not None:
+            self.diario.fechar()
+        if self._ia is not None:
+            self._ia.fechar()
+        self.perfil.parar()
 
-        if len(self.jogadores) < 2:
+    def get_metrics(self):
+        """
+        Métricas do servidor: por método (chamadas, erros, em andamento, bytes, histograma
+        de latência), polls por segundo no último minuto e partidas/jogadores ativos.
+        O mesmo conteúdo sai em texto no GET /metrics da porta XML-RPC.
+        """
+        return self.metricas.exportar()
+
+    def profiler(self, ligar=None, top=25):
+        """
+        Liga (True) ou desliga (False) o profiler por amostragem; sem argumento só consulta.
+        Ligar e desligar só são aceitos em servidores iniciados com --profiler.
+        Retorna {"ativo", "amostras", "funcoes": [[função, amostras próprias, inclusivas], ...]}.
+        """
+        if ligar is not None and not self._profiler_liberado:
+            raise PermissionError("Profiler desabilitado: inicie o servidor com --profiler.")
+        if ligar:
+            self.perfil.iniciar()
+        elif ligar is not None:
+            self.perfil.parar()
+        return {"ativo": self.perfil.ativo, "amostras": self.perfil.amostras,
+                "funcoes": self.perfil.relatorio(top)}
+
+    def criar_partida(self, layout=None):
+        """Cria uma partida vazia (com o layout pedido ou o padrão do servidor) e retorna o ID dela."""
+        partida = self.partidas.criar(layout)
+        log.info("Partida %d criada (layout %s).", partida.partida_id, partida.layout.nome)
+        return partida.partida_id
+
+    def get_layout(self, partida_id):
+        """
+        Layout da partida: {"nome", "board_size", "jogadores", "campos"}, com
+        campos[p - 1] = casas iniciais do jogador p.
+        """
+        return self.partidas.obter(partida_id).layout.descrever()
+
+    def listar_partidas(self, apenas_abertas=False):
+        """Lista as partidas ativas (ou só as que ainda aguardam oponente)."""
+        return self.partidas.listar(apenas_abertas)
+
+    def registrar_jogador(self, partida_id=None, layout=None):
+        """
+        Chamado por um cliente para entrar no jogo.
+        Sem partida_id, entra na primeira partida do `layout` (padrão: o do servidor)
+        aguardando oponente, ou cria uma.
+        Retorna [partida_id, player_id, token]; player_id 0 (e token vazio) indica
+        partida cheia. O token vai nas chamadas seguintes (é o que mantém a sessão
+        viva) e serve para voltar ao assento com `reconectar`.
+        """
+        token = self.sessoes.novo_token()
+        partida, player_id = self.partidas.entrar(partida_id, layout, token)
+        if not player_id:
+            token = ""
+        else:
+            self.sessoes.abrir(partida.partida_id, player_id, token=token)
+            log.info("Jogador %d registrado na partida %d.", player_id, partida.partida_id)
+            if partida.cheia:
+                log.info("Partida %d: todos os jogadores conectados. O jogo vai começar.", partida.partida_id)
+        return [partida.partida_id, player_id, token]
+
+    def reconectar(self, token):
+        """
+        Volta ao assento da sessão `token` (por exemplo, depois de o cliente reiniciar).
+        Retorna [partida_id, player_id], ou [0, 0] se a sessão já expirou.
+        """
+        sessao = self.sessoes.reconectar(token)
+        if sessao is None:
+            return [0, 0]
+        log.info("Partida %d: jogador %d reconectou.", sessao.partida_id, sessao.player_id)
+        return [sessao.partida_id, sessao.player_id]
+
+    def sair(self, token):
+        """
+        Encerra a sessão `token` na hora, como se ela tivesse expirado: antes de a
+        partida começar, o assento fica livre; depois, o jogador desiste.
+        """
+        sessao = self.sessoes.encerrar(token)
+        if sessao is None:
             return False
-        
-        if self.jogo.winner: # Se o jogo já acabou, não faz nada
+        log.info("Partida %d: jogador %d saiu.", sessao.partida_id, sessao.player_id)
+        self._abandonar(sessao)
+        return True
+
+    def _visto(self, partida_id, player_id, token):
+        # Só o token da sessão conta como sinal de vida; o número do assento qualquer um adivinha
+        if token and self.sessoes.tocar(token, partida_id, player_id):
+            log.info("Partida %s: jogador %s voltou a tempo.", partida_id, player_id)
+
+    def _abandonar(self, sessao):
+        try:
+            partida = self.partidas.obter(sessao.partida_id)
+        except PartidaNaoEncontrada:
+            return
+        if partida.liberar_assento(sessao.player_id):
+            log.info("Partida %d: assento %d liberado.", sessao.partida_id, sessao.player_id)
+        elif partida.jogo.winner is None and partida.desistir(sessao.player_id):
+            log.info("Partida %d: jogador %d desistiu por abandono.", sessao.partida_id, sessao.player_id)
+
+    def _iniciar_zelador(self):
+        """Inicia (uma única vez) a thread que expira sessões e remove partidas encerradas."""
+        with self._lock_zelador:
+            if self._zelador is None:
+                self._zelador = threading.Thread(target=self._zelar, name="zelador", daemon=True)
+                self._zelador.start()
+
+    def _zelar(self):
+        # Sem prazo pendente, dorme até ser acordada (ao_agendar) em vez de olhar a cada segundo
+        while not self._parar_zelador.is_set():
+            self._acordar_zelador.clear()
+            for sessao, evento in self.sessoes.varrer():
+                if evento == AUSENTE:
+                    log.info("Partida %d: jogador %d sem contato; %gs para voltar.",
+                             sessao.partida_id, sessao.player_id, self.sessoes.carencia)
+                else:
+                    log.info("Partida %d: sessão do jogador %d expirou.", sessao.partida_id, sessao.player_id)
+                    self._abandonar(sessao)
+            self._limpar_partidas_encerradas()
+            prazos = [p for p in (self.sessoes.proximo_prazo(), self.partidas.proxima_remocao()) if p is not None]
+            self._acordar_zelador.wait(max(0.0, min(prazos) - time.monotonic()) if prazos else None)
+
+    def registrar_bot(self, partida_id, nivel=3):
+        """
+        Coloca o bot do servidor no assento livre da partida (nível 1 a 5: mais tempo
+        de busca por jogada). Retorna [partida_id, player_id]; player_id 0 indica partida cheia.
+        Uma partida aceita um único bot: o segundo é recusado com ValueError.
+        """
+        if nivel not in TEMPO_POR_NIVEL:
+            raise ValueError(f"Nível do bot deve ser de 1 a {len(TEMPO_POR_NIVEL)}.")
+        partida = self.partidas.obter(partida_id)
+        if partida.layout.jogadores != 2:
+            raise ValueError("O bot só joga partidas de dois jogadores.")
+        player_id = partida.registrar_jogador(bot=nivel)
+        if player_id:
+            log.info("Bot nível %d entrou na partida %d como jogador %d.", nivel, partida_id, player_id)
+            self._iniciar_bot(partida, player_id, nivel)
+        return [partida_id, player_id]
+
+    def _iniciar_bot(self, partida, player_id, nivel):
+        threading.Thread(target=self._jogar_bot, args=(partida, player_id, nivel),
+                         name=f"bot-{partida.partida_id}", daemon=True).start()
+
+    def _motor_ia(self):
+        with self._lock_ia:
+            if self._ia is None:
+                self._ia = MotorIA(self.processos_ia)
+            return self._ia
+
+    def _esperar_vez_do_bot(self, partida, player_id):
+        """
+        Espera a vez do bot e retorna uma cópia do tabuleiro, ou None se ele deve parar:
+        partida encerrada ou removida, assento que não é mais do bot, ou nada mudou na
+        partida em OCIOSIDADE_BOT segundos (aí o bot libera o assento ou desiste).
+        """
+        estado_id, desde = None, time.monotonic()
+        while True:
+            try:
+                if self.partidas.obter(partida.partida_id) is not partida:
+                    return None
+            except PartidaNaoEncontrada:
+                return None
+            with partida.mudou:
+                if partida.jogo.winner or player_id not in partida.bots:
+                    return None
+                if partida.cheia and partida.jogo.current_turn == player_id:
+                    return [linha[:] for linha in partida.jogo.get_board()]
+                if partida.estado_id != estado_id:
+                    estado_id, desde = partida.estado_id, time.monotonic()
+                ocioso = time.monotonic() - desde >= self.OCIOSIDADE_BOT
+                if not ocioso:
+                    partida.mudou.wait(self.INTERVALO_BOT)
+            if ocioso:
+                if partida.liberar_assento(player_id):
+                    log.info("Partida %d: ninguém entrou em %gs; bot saiu.", partida.partida_id, self.OCIOSIDADE_BOT)
+                elif partida.desistir(player_id):
+                    log.info("Partida %d: nenhuma jogada em %gs; bot desistiu.", partida.partida_id,
+                             self.OCIOSIDADE_BOT)
+                return None
+
+    def _jogar_bot(self, partida, player_id, nivel):
+        # Espera a vez do bot, busca fora do lock da partida e joga como um cliente qualquer
+        while True:
+            board = self._esperar_vez_do_bot(partida, player_id)
+            if board is None:
+                return
+            tempo = TEMPO_POR_NIVEL[nivel]
+            origem, destino, info = self._motor_ia().escolher_jogada(board, player_id, tempo, partida.layout)
+            sucesso = False
+            if origem is not None:
+                sucesso, mensagem = partida.fazer_jogada(player_id, origem, destino)
+            if not sucesso:
+                log.warning("Partida %d: bot sem jogada válida, desistindo.", partida.partida_id)
+                partida.desistir(player_id)
+                return
+            log.debug("Partida %d: bot (jogador %d) moveu de %s para %s (profundidade %d, %d nós em %.2fs)",
+                      partida.partida_id, player_id, origem, destino, info["profundidade"], info["nos"],
+                      info["segundos"])
+
+    def registrar_espectador(self, partida_id):
+        """
+        Entra numa partida só para assistir: não ocupa assento nem tem limite.
+        Retorna [partida_id, espectador_id]; o estado vem pelo long-poll `assistir`.
+        """
+        espectador_id = self.partidas.obter(partida_id).registrar_espectador()
+        log.info("Espectador %d assistindo à partida %d.", espectador_id, partida_id)
+        return [partida_id, espectador_id]
+
+    def assistir(self, partida_id, estado_id, chat_id, timeout=25):
+        """
+        Long-poll dos espectadores: mesma resposta de aguardar_mudanca ({"estado",
+        "mensagens", "lacuna_chat"}), montada e serializada uma vez por estado e
+        entregue pronta a todos os espectadores que estão no mesmo ponto.
+        """
+        timeout = max(0, min(timeout, self.MAX_ESPERA))
+        return self.partidas.obter(partida_id).assistir(estado_id, chat_id, timeout)
+
+    def fazer_jogada(self, partida_id, player_id, from_pos, to_pos, token=""):
+        """
+        Cliente chama esta função para tentar mover uma peça. Com o `token` da sessão
+        (como em enviar_chat, desistir, get_jogadas_legais, sync e aguardar_mudanca),
+        a chamada também conta como sinal de vida do jogador.
+        """
+        log.debug("Partida %s: jogador %s tentando mover de %s para %s", partida_id, player_id, from_pos, to_pos)
+        self._visto(partida_id, player_id, token)
+        return self.partidas.obter(partida_id).fazer_jogada(player_id, from_pos, to_pos)
+
+    def get_estado_do_jogo(self, partida_id, estado_id_conhecido=-1):
+        """
+        Cliente chama esta função para pegar o estado do jogo.
+        Informando o último estado_id conhecido, recebe só as jogadas feitas desde
+        então ("delta") ou um marcador "igual"; sem ele, recebe o tabuleiro completo.
+        """
+        return self.partidas.obter(partida_id).get_estado(estado_id_conhecido)
+
+    def aguardar_mudanca(self, partida_id, estado_id, chat_id, timeout=25, token=""):
+        """
+        Long-poll: segura a requisição até o estado da partida passar de `estado_id`
+        ou chegar mensagem depois de `chat_id` (no máximo MAX_ESPERA segundos).
+        Retorna {"estado": ..., "mensagens": [...]}.
+        """
+        partida = self.partidas.obter(partida_id)
+        self._visto(partida_id, None, token)
+        timeout = max(0, min(timeout, self.MAX_ESPERA))
+        resposta = partida.aguardar_mudanca(estado_id, chat_id, timeout)
+        self._visto(partida_id, None, token)
+        return resposta
+
+    def get_jogadas_legais(self, partida_id, player_id, token=""):
+        """
+        Retorna as jogadas legais do jogador (incluindo cadeias de pulos),
+        no formato [[origem, [destino, ...]], ...].
+        """
+        self._visto(partida_id, player_id, token)
+        return self.partidas.obter(partida_id).get_jogadas_legais(player_id)
+
+    def sync(self, partida_id, player_id, estado_id, chat_id, acoes=(), timeout=0, token=""):
+        """
+        Uma ida e volta com tudo o que o cliente precisa: aplica as `acoes` em ordem
+        (["jogada", origem, destino], ["chat", texto] ou ["desistir"]) e devolve o
+        resultado de cada uma junto com o delta de estado, as mensagens novas e, se for
+        a vez do jogador, as jogadas legais. Sem ações, espera até `timeout` segundos
+        por uma mudança, como aguardar_mudanca.
+        """
+        partida = self.partidas.obter(partida_id)
+        self._visto(partida_id, player_id, token)
+        resultados = [self._executar_acao(partida_id, player_id, acao, token) for acao in acoes]
+        espera = 0 if acoes else max(0, min(timeout, self.MAX_ESPERA))
+        resposta = partida.aguardar_mudanca(estado_id, chat_id, espera, player_id)
+        # Quem estava preso no long-poll também conta como presente
+        self._visto(partida_id, player_id, token)
+        resposta["resultados"] = resultados
+        return resposta
+
+    def _executar_acao(self, partida_id, player_id, acao, token):
+        tipo, argumentos = acao[0], acao[1:]
+        if tipo == "jogada":
+            return self.fazer_jogada(partida_id, player_id, *argumentos[:2], token=token)
+        if tipo == "chat":
+            return self.enviar_chat(partida_id, player_id, *argumentos[:1], token=token)
+        if tipo == "desistir":
+            return self.desistir(partida_id, player_id, token)
+        return [False, f"Ação desconhecida: {tipo}"]
+
+    def enviar_chat(self, partida_id, player_id, mensagem, token=""):
+        """
+        Cliente chama para enviar uma mensagem de chat.
+        Retorna a sequência da mensagem, ou -1 se o jogador excedeu o limite de taxa
+        ou não ocupa um assento da partida.
+        """
+        log.debug("Chat da partida %s, jogador %s: %s", partida_id, player_id, mensagem)
+        self._visto(partida_id, player_id, token)
+        return self.partidas.obter(partida_id).enviar_chat(player_id, mensagem)
+
+    def get_novas_mensagens_chat(self, partida_id, ultimo_id_conhecido):
+        """
+        Cliente chama para pegar apenas as mensagens que ele ainda não viu.
+        Retorna {"mensagens": [{"seq", "jogador", "hora", "texto"}, ...], "lacuna_chat": bool};
+        lacuna_chat indica que parte das mensagens não vistas já saiu do buffer do servidor.
+        """
+        return self.partidas.obter(partida_id).get_novas_mensagens_chat(ultimo_id_conhecido)
+
+    def desistir(self, partida_id, player_id, token=""):
+        """Cliente chama para desistir."""
+        self._visto(partida_id, player_id, token)
+        if self.partidas.obter(partida_id).desistir(player_id):
+            log.info("Partida %s: jogador %s desistiu.", partida_id, player_id)
             return True
+        return False
+
+    def _limpar_partidas_encerradas(self):
+        """Remove as partidas que terminaram há mais de `retencao` segundos."""
+        removidas = self.partidas.limpar_encerradas()
+        if removidas:
+            log.info("%d partida(s) encerrada(s) removida(s). Ativas: %d.", removidas, len(self.partidas))
+        return removidas
+
+class HalmaRequestHandler(SimpleXMLRPCRequestHandler):
+    # HTTP/1.1 mantém a conexão aberta entre chamadas (keep-alive) em vez de uma por chamada
+    protocol_version = "HTTP/1.1"
+    # Um cliente que trava no meio de uma requisição (ou some com a conexão ociosa) libera a thread após este prazo
+    timeout = 15
+
+    def do_GET(self):
+        """GET /metrics: as métricas do servidor em texto, para um coletor (Prometheus) raspar."""
+        metricas = getattr(self.server, "metricas", None)
+        if self.path != "/metrics" or metricas is None:
+            self.report_404()
+            return
+        corpo = metricas.texto().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+class HalmaRequestHandlerSemKeepAlive(HalmaRequestHandler):
+    # Nos modos serial e pool, uma conexão aberta prende a thread que a atende:
+    # com keep-alive, N clientes ociosos esgotariam um pool de N threads. Fecha a
+    # conexão a cada resposta e a thread volta logo para atender outro cliente.
+    protocol_version = "HTTP/1.0"
+
+
+class MedicaoXMLRPC:
+    """
+    Mixin dos servidores XML-RPC: mede em `self.metricas` (metricas.MetricasServidor)
+    cada chamada a um método existente, com o tempo de decodificar, executar e
+    codificar a resposta e o tamanho da requisição e da resposta.
+    """
+    metricas = None
+    _chamada = threading.local()
+
+    def _marshaled_dispatch(self, data, dispatch_method=None, path=None):
+        self._chamada.atual = None
+        resposta = super()._marshaled_dispatch(data, dispatch_method, path)
+        atual = self._chamada.atual
+        if atual is not None:
+            metodo, inicio, erro = atual
+            self.metricas.terminar(metodo, inicio, erro, len(data), len(resposta))
+        return resposta
+
+    def _dispatch(self, method, params):
+        if self.metricas is None or method.startswith("_") or not hasattr(self.instance, method):
+            return super()._dispatch(method, params)
+        # Marcada como erro até o método retornar; o próprio dispatcher converte a exceção em Fault
+        self._chamada.atual = atual = [method, self.metricas.comecar(method, params), True]
+        resultado = super()._dispatch(method, params)
+        atual[2] = False
+        return resultado
+
+
+class RespostaProntaXMLRPC:
+    """
+    Mixin dos servidores XML-RPC: quando o método devolve uma RespostaPronta,
+    envia o XML já serializado dela em vez de serializar o valor de novo.
+    """
+    _pronta = threading.local()
+
+    def _marshaled_dispatch(self, data, dispatch_method=None, path=None):
+        self._pronta.atual = None
+        resposta = super()._marshaled_dispatch(data, dispatch_method, path)
+        pronta = self._pronta.atual
+        if pronta is not None:
+            self._pronta.atual = None
+            return pronta.bytes_para("xmlrpc", self._serializar)
+        return resposta
+
+    def _dispatch(self, method, params):
+        resultado = super()._dispatch(method, params)
+        if type(resultado) is RespostaPronta:
+            self._pronta.atual = resultado
+            return None  # O dispatcher serializa só este None; a resposta enviada é a pronta
+        return resultado
+
+    def _serializar(self, valor):
+        return xmlrpc.client.dumps((valor,), methodresponse=1, allow_none=self.allow_none,
+                                   encoding=self.encoding).encode(self.encoding, "xmlcharrefreplace")
 
-        print(f"[INFO] Jogador {player_id} desistiu.")
-        self.jogo.forfeit(player_id)
-        self.estado_id += 1
-        return True
-    
-    def reset_game_se_necessario(self):
-        """Verifica se o jogo acabou e, se sim, reinicia."""
-        if self.jogo.winner and len(self.jogadores) > 0:
-            print("\n[INFO] Fim de jogo detectado. Reiniciando o servidor em 5 segundos...")
-            time.sleep(5)
-            self.jogo = HalmaGame()
-            self.jogadores = []
-            self.chat_messages = []
-            self.estado_id = 0
-            print("[INFO] Servidor pronto para aceitar novas conexões.\n")
-        return True
+
+class ServidorXMLRPCSerial(MedicaoXMLRPC, RespostaProntaXMLRPC, SimpleXMLRPCServer):
+    """Atende uma requisição por vez, como o servidor original."""
+
+
+class ServidorXMLRPCThreads(MedicaoXMLRPC, RespostaProntaXMLRPC, socketserver.ThreadingMixIn, SimpleXMLRPCServer):
+    """Atende cada conexão em uma thread própria."""
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class ServidorXMLRPCPool(MedicaoXMLRPC, RespostaProntaXMLRPC, SimpleXMLRPCServer):
+    """Atende as conexões num pool fixo de threads; a thread do accept só enfileira."""
+    request_queue_size = 256
+
+    def __init__(self, addr, workers, **kwargs):
+        super().__init__(addr, **kwargs)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rpc")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._processar, request, client_address)
+
+    def _processar(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def criar_servidor(host, port, workers=0):
+    """
+    Monta o servidor XML-RPC no modo de concorrência pedido:
+    workers=0 cria uma thread por conexão (com keep-alive), workers=1 mantém o
+    atendimento serial original e workers>1 usa um pool com esse número de
+    threads; nesses dois, cada conexão atende uma requisição só.
+    """
+    opcoes = dict(requestHandler=HalmaRequestHandler, allow_none=True, logRequests=False)
+    if workers == 0:
+        return ServidorXMLRPCThreads((host, port), **opcoes)
+    opcoes["requestHandler"] = HalmaRequestHandlerSemKeepAlive
+    if workers == 1:
+        return ServidorXMLRPCSerial((host, port), **opcoes)
+    return ServidorXMLRPCPool((host, port), workers, **opcoes)
+
+def configurar_log(nivel):
+    """
+    Log com nível e em buffer: quem registra só põe o registro numa fila, e uma
+    thread (QueueListener) escreve no stdout, fora do caminho das requisições.
+    Retorna o listener, para ser parado (e esvaziar a fila) no encerramento.
+    """
+    fila = queue.SimpleQueue()
+    saida = logging.StreamHandler(sys.stdout)
+    saida.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    ouvinte = logging.handlers.QueueListener(fila, saida)
+    raiz = logging.getLogger()
+    raiz.setLevel(nivel)
+    raiz.addHandler(logging.handlers.QueueHandler(fila))
+    ouvinte.start()
+    return ouvinte
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Inicia o servidor RMI/RPC do jogo Halma.")
@@ -105,26 +570,107 @@ if __name__ == "__main__":
                         default=8000,  # Porta padrão para RPC
                         help='Número da PORTA para o servidor escutar (padrão: 8000).')
     
+    parser.add_argument('--retencao',
+                        type=float,
+                        default=30.0,
+                        help='Segundos que uma partida encerrada continua visível antes de ser removida (padrão: 30).')
+
+    parser.add_argument('--motor',
+                        choices=MOTORES,
+                        default='lista',
+                        help='Motor do tabuleiro: lista (listas de listas) ou bits (máscaras de bits) (padrão: lista).')
+
+    parser.add_argument('--layout',
+                        choices=sorted(LAYOUTS),
+                        default=LAYOUT_PADRAO,
+                        help='Layout das partidas criadas sem layout explícito: classico (10x10), grande (16x16, '
+                             'campos de 19), tres e quatro (16x16, 3 ou 4 jogadores) (padrão: classico).')
+
+    parser.add_argument('--timeout-sessao',
+                        type=float,
+                        default=60.0,
+                        help='Segundos sem nenhuma chamada de um jogador até ele ser considerado ausente; '
+                             'precisa ser maior que a espera do long-poll (padrão: 60).')
+
+    parser.add_argument('--carencia',
+                        type=float,
+                        default=30.0,
+                        help='Segundos que um jogador ausente tem para voltar antes de perder o assento '
+                             '(ou desistir, se a partida já começou); 0 = na hora (padrão: 30).')
+
+    parser.add_argument('--porta-binaria',
+                        type=int,
+                        default=None,
+                        help='Se informada, também atende o protocolo binário (protocolo_binario.py) nesta PORTA.')
+
+    parser.add_argument('--journal',
+                        metavar='DIR',
+                        default=None,
+                        help='Liga o diário de partidas em DIR: as partidas sobrevivem a um reinício do servidor.')
+
+    parser.add_argument('--snapshot-a-cada',
+                        type=int,
+                        default=50000,
+                        help='Eventos do diário entre dois snapshots (padrão: 50000).')
+
+    parser.add_argument('--workers',
+                        type=int,
+                        default=0,
+                        help='Threads para atender requisições: 0 = uma por conexão, com keep-alive; 1 = serial; '
+                             'N = pool fixo (padrão: 0). No serial e no pool a conexão fecha a cada resposta, para '
+                             'um cliente ocioso não prender uma thread; um long-poll ainda ocupa uma enquanto espera.')
+
+    parser.add_argument('--log-level',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        default='INFO',
+                        help='Nível do log; DEBUG inclui cada jogada e mensagem de chat (padrão: INFO).')
+
+    parser.add_argument('--profiler',
+                        action='store_true',
+                        help='Liga o profiler por amostragem desde o início e deixa o RPC profiler ligá-lo e '
+                             'desligá-lo (sem esta opção, o RPC só consulta).')
+
+    parser.add_argument('--processos-ia',
+                        type=int,
+                        default=1,
+                        help='Processos usados pela busca do bot (registrar_bot). Com 1, a busca (até 4 s de '
+                             'Python puro por jogada no nível 5) roda na thread do bot e disputa o GIL com as '
+                             'threads do RPC; com mais, ela vai para processos separados (padrão: 1).')
+
     args = parser.parse_args()
+    if args.timeout_sessao <= HalmaServerLogic.MAX_ESPERA:
+        parser.error(f"--timeout-sessao precisa ser maior que a espera máxima do long-poll "
+                     f"({HalmaServerLogic.MAX_ESPERA}s).")
+    ouvinte_log = configurar_log(args.log_level)
 
     # Configuração e inicialização do servidor RPC
+    logica = None
     try:
-        with SimpleXMLRPCServer((args.host, args.port), allow_none=True) as server:
-            server.register_instance(HalmaServerLogic())
-            print(f"[ESCUTANDO] Servidor RMI/RPC pronto em {args.host}:{args.port}...")
-            
-            # Verifica se o jogo acabou para reiniciar
-            def game_reset_loop():
-                while True:
-                    server.instance.reset_game_se_necessario()
-                    time.sleep(1)
-            
-            reset_thread = threading.Thread(target=game_reset_loop, daemon=True)
-            reset_thread.start()
+        with criar_servidor(args.host, args.port, args.workers) as server:
+            logica = HalmaServerLogic(retencao=args.retencao, motor=args.motor,
+                                      diretorio_diario=args.journal, snapshot_a_cada=args.snapshot_a_cada,
+                                      processos_ia=args.processos_ia, layout=args.layout,
+                                      timeout_sessao=args.timeout_sessao, carencia=args.carencia,
+                                      profiler=args.profiler)
+            server.register_instance(logica)
+            server.metricas = logica.metricas
+            log.info("Servidor RMI/RPC pronto em %s:%d (métricas em GET /metrics)...", args.host, args.port)
+
+            # Segundo transporte, binário, sobre a mesma instância de HalmaServerLogic
+            if args.porta_binaria:
+                protocolo_binario.iniciar_em_thread(args.host, args.porta_binaria, server.instance, logica.metricas)
+                log.info("Protocolo binário pronto em %s:%d...", args.host, args.porta_binaria)
+
+            # Expira sessões abandonadas e remove as partidas que já terminaram
+            logica._iniciar_zelador()
 
             server.serve_forever()
             
     except OSError as e:
-        print(f"Erro ao iniciar servidor: {e}. A porta {args.port} já pode estar em uso.")
+        log.error("Erro ao iniciar servidor: %s. A porta %d (ou a binária) já pode estar em uso.", e, args.port)
     except KeyboardInterrupt:
-        print("\n[INFO] Servidor encerrado.")
\ No newline at end of file
+        log.info("Servidor encerrado.")
+    finally:
+        if logica is not None:
+            logica._fechar()
+        ouvinte_log.stop()
\ No newline at end of file
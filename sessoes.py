@@ -0,0 +1,155 @@
+# sessoes.py
+"""
+Sessões dos jogadores humanos: quem ainda está falando com o servidor.
+
+Cada assento ocupado por `registrar_jogador` ganha uma sessão com um token
+e o instante da última chamada do jogador. O cliente manda o token nas
+chamadas (e em `reconectar`): só ele conta como sinal de vida, então quem só
+conhece o número do assento não mantém viva a sessão de outro jogador.
+Marcar uma chamada só grava esse instante: nada de reordenar estruturas no
+caminho quente.
+
+Os prazos ficam num heap com no máximo uma entrada por sessão. Quando a
+entrada do topo vence, a varredura confere o prazo de verdade (último contato
++ timeout): se o jogador falou nesse meio-tempo, a sessão volta ao heap com o
+prazo novo ("re-push preguiçoso"); se não, ela fica ausente e ganha mais
+`carencia` segundos para voltar, e só então expira. O custo de uma varredura
+é proporcional às entradas vencidas, não ao total de sessões, e quem espera
+pela próxima varredura sabe exatamente quando ela será (`proximo_prazo`).
+"""
+import heapq
+import itertools
+import secrets
+import threading
+import time
+
+AUSENTE, EXPIRADA = "ausente", "expirada"
+
+
+class Sessao:
+    __slots__ = ("token", "partida_id", "player_id", "visto", "ausente_desde")
+
+    def __init__(self, token, partida_id, player_id, visto):
+        self.token = token
+        self.partida_id = partida_id
+        self.player_id = player_id
+        self.visto = visto
+        # Instante em que o timeout venceu sem contato; None enquanto o jogador está presente
+        self.ausente_desde = None
+
+
+class RegistroSessoes:
+    """
+    Sessões por token e por (partida_id, player_id), com os prazos num heap.
+    `timeout`: segundos sem nenhuma chamada até a sessão ficar ausente (precisa
+    ser maior que a espera máxima de um long-poll); `carencia`: segundos de
+    ausência até ela expirar (0 expira direto, sem período de reconexão).
+    """
+
+    def __init__(self, timeout=60.0, carencia=30.0):
+        self.timeout = timeout
+        self.carencia = carencia
+        # Chamado quando surge um prazo que pode ser o mais próximo (ex.: acordar a thread que varre)
+        self.ao_agendar = None
+        self._por_token = {}
+        self._por_jogador = {}
+        self._prazos = []
+        # Desempata prazos iguais no heap sem comparar tokens
+        self._sequencia = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._por_token)
+
+    @property
+    def ausentes(self):
+        return sum(1 for s in list(self._por_token.values()) if s.ausente_desde is not None)
+
+    @staticmethod
+    def novo_token():
+        return secrets.token_hex(16)
+
+    def abrir(self, partida_id, player_id, agora=None, token=None):
+        """Cria a sessão do assento (com `token`, ou um novo) e retorna o token dela."""
+        agora = time.monotonic() if agora is None else agora
+        token = token or self.novo_token()
+        sessao = Sessao(token, partida_id, player_id, agora)
+        with self._lock:
+            anterior = self._por_jogador.get((partida_id, player_id))
+            if anterior is not None:
+                del self._por_token[anterior.token]  # A entrada dela no heap some na varredura
+            self._por_token[token] = sessao
+            self._por_jogador[(partida_id, player_id)] = sessao
+            primeiro = not self._prazos
+            heapq.heappush(self._prazos, (agora + self.timeout, next(self._sequencia), token))
+        if primeiro and self.ao_agendar is not None:
+            self.ao_agendar()
+        return token
+
+    def tocar(self, token, partida_id=None, player_id=None, agora=None):
+        """
+        Registra uma chamada com o `token`. Retorna True se o jogador estava ausente
+        (voltou dentro da carência). Token desconhecido, ou de outra partida/assento
+        que os informados, não conta.
+        """
+        sessao = self._por_token.get(token)
+        if (sessao is None or partida_id is not None and sessao.partida_id != partida_id
+                or player_id is not None and sessao.player_id != player_id):
+            return False
+        sessao.visto = time.monotonic() if agora is None else agora
+        if sessao.ausente_desde is None:
+            return False
+        with self._lock:
+            voltou = sessao.ausente_desde is not None
+            sessao.ausente_desde = None
+        return voltou
+
+    def reconectar(self, token, agora=None):
+        """Sessão do `token` (que passa a contar como presente), ou None se ele não existe mais."""
+        sessao = self._por_token.get(token)
+        if sessao is not None:
+            self.tocar(token, agora=agora)
+        return sessao
+
+    def encerrar(self, token):
+        """Remove a sessão do `token` (o jogador saiu). Retorna a sessão, ou None se ela não existe mais."""
+        with self._lock:
+            sessao = self._por_token.pop(token, None)
+            if sessao is not None:
+                del self._por_jogador[(sessao.partida_id, sessao.player_id)]
+        return sessao
+
+    def proximo_prazo(self):
+        """Instante da próxima entrada do heap (pode ser só um re-push), ou None sem sessões."""
+        prazos = self._prazos
+        return prazos[0][0] if prazos else None
+
+    def varrer(self, agora=None):
+        """
+        Processa as entradas vencidas do heap. Retorna [(sessao, AUSENTE | EXPIRADA), ...]
+        na ordem dos prazos; sessões expiradas já saíram do registro.
+        """
+        agora = time.monotonic() if agora is None else agora
+        eventos = []
+        with self._lock:
+            prazos = self._prazos
+            while prazos and prazos[0][0] <= agora:
+                _, _, token = heapq.heappop(prazos)
+                sessao = self._por_token.get(token)
+                if sessao is None:
+                    continue  # Encerrada ou substituída depois de entrar no heap
+                limite = sessao.visto + self.timeout
+                if limite > agora:
+                    # Falou depois que a entrada foi criada: volta ao heap com o prazo atual
+                    heapq.heappush(prazos, (limite, next(self._sequencia), token))
+                elif sessao.ausente_desde is None and self.carencia > 0:
+                    sessao.ausente_desde = limite
+                    heapq.heappush(prazos, (limite + self.carencia, next(self._sequencia), token))
+                    eventos.append((sessao, AUSENTE))
+                elif sessao.ausente_desde is None or sessao.ausente_desde + self.carencia <= agora:
+                    del self._por_token[token]
+                    del self._por_jogador[(sessao.partida_id, sessao.player_id)]
+                    eventos.append((sessao, EXPIRADA))
+                else:
+                    heapq.heappush(prazos, (sessao.ausente_desde + self.carencia, next(self._sequencia), token))
+        return eventos
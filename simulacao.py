@@ -0,0 +1,313 @@
+# simulacao.py
+"""
+Simulação em lote: partidas de HalmaGame jogadas pelo próprio programa, sem servidor nem interface.
+
+Serve para conferir mudanças de regra e de motor em muitas partidas e como
+benchmark de vazão do motor. As partidas são divididas em lotes entre um pool
+de processos; cada lote volta como colunas (vencedor, jogadas, duração) que o
+processo principal grava no arquivo de saída assim que chegam, na ordem das
+partidas, e soma nas estatísticas.
+
+Cada partida tem o próprio gerador aleatório, derivado de --seed e do índice
+dela, então o resultado não depende de quantos processos jogaram nem de como
+as partidas foram divididas: --reproduzir I joga de novo só a partida I e
+mostra as jogadas. Estratégias:
+- aleatoria: qualquer jogada legal, com a mesma chance (raramente termina:
+  quase todas param no limite de jogadas);
+- gulosa: a jogada que mais aproxima a peça do canto de destino (distância de
+  Manhattan), com sorteio nos empates e, com chance --ruido, uma jogada aleatória.
+
+Formato do arquivo (inteiros little-endian): cabeçalho b"HSIM", versão (u16),
+tamanho (u32) e um JSON com os parâmetros da simulação; depois blocos, cada um
+com o número de partidas n (u32), o índice da primeira delas (u64) e as colunas
+inteiras do bloco: vencedor (u8 × n, 0 = limite de jogadas), jogadas (u16 × n)
+e duração em µs (u32 × n).
+
+    python simulacao.py --partidas 1000000 --processos 8 --estrategia gulosa --saida gulosa.hsim
+    python simulacao.py --ler gulosa.hsim
+    python simulacao.py --reproduzir 123 --estrategia gulosa --seed 0
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import struct
+import sys
+import time
+from array import array
+from collections import Counter
+
+from layouts import LAYOUT_PADRAO, LAYOUTS, obter_layout
+from tabuleiro import MOTORES, criar_jogo
+
+ESTRATEGIAS = ("aleatoria", "gulosa")
+MAGICO = b"HSIM"
+VERSAO = 1
+# Tipos das colunas de cada bloco, na ordem em que são gravadas
+COLUNAS = (("vencedor", "B"), ("jogadas", "H"), ("duracao_us", "I"))
+
+
+def gerador_da_partida(seed, indice):
+    """Gerador aleatório da partida `indice`: depende só da seed e do índice."""
+    return random.Random(seed * 1_000_000_007 + indice)
+
+
+def escolher(jogo, estrategia, rng, ruido):
+    """Uma jogada (origem, destino) do jogador da vez, ou None se ele não tem jogada."""
+    player = jogo.current_turn
+    legais = jogo.all_legal_moves(player)
+    if not legais:
+        return None
+    if estrategia == "aleatoria" or rng.random() < ruido:
+        return rng.choice([(origem, destino) for origem, destinos in legais.items() for destino in destinos])
+    alvo_r, alvo_c = jogo.layout.alvos[player]
+    melhor, jogadas = None, []
+    for (r, c), destinos in legais.items():
+        antes = abs(r - alvo_r) + abs(c - alvo_c)
+        for destino in destinos:
+            avanco = antes - abs(destino[0] - alvo_r) - abs(destino[1] - alvo_c)
+            if melhor is None or avanco > melhor:
+                melhor, jogadas = avanco, [((r, c), destino)]
+            elif avanco == melhor:
+                jogadas.append(((r, c), destino))
+    return rng.choice(jogadas)
+
+
+def jogar(indice, parametros, registrar=None):
+    """
+    Joga a partida `indice` até alguém vencer ou até o limite de jogadas.
+    Retorna (vencedor ou 0, jogadas). `registrar(player, origem, destino)` recebe cada jogada.
+    """
+    rng = gerador_da_partida(parametros["seed"], indice)
+    jogo = criar_jogo(parametros["motor"], layout=parametros["layout"])
+    jogadas = 0
+    while not jogo.winner and jogadas < parametros["max_jogadas"]:
+        jogada = escolher(jogo, parametros["estrategia"], rng, parametros["ruido"])
+        if jogada is None:
+            break
+        player = jogo.current_turn
+        jogo.move_piece(player, *jogada)
+        jogadas += 1
+        if registrar is not None:
+            registrar(player, *jogada)
+    return jogo.winner or 0, jogadas
+
+
+def jogar_lote(lote):
+    """Joga as partidas [inicio, fim) e devolve (inicio, colunas); roda nos processos do pool."""
+    inicio, fim, parametros = lote
+    colunas = tuple(array(tipo) for _, tipo in COLUNAS)
+    vencedores, jogadas, duracoes = colunas
+    for indice in range(inicio, fim):
+        comeco = time.perf_counter()
+        vencedor, n = jogar(indice, parametros)
+        duracoes.append(min(int((time.perf_counter() - comeco) * 1e6), 0xFFFFFFFF))
+        vencedores.append(vencedor)
+        jogadas.append(n)
+    return inicio, colunas
+
+
+class ArquivoColunas:
+    """Escrita e leitura do arquivo de resultados (formato na documentação do módulo)."""
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+
+    @classmethod
+    def criar(cls, caminho, parametros):
+        arquivo = open(caminho, "wb")
+        cabecalho = json.dumps(parametros).encode()
+        arquivo.write(MAGICO + struct.pack("<HI", VERSAO, len(cabecalho)) + cabecalho)
+        return cls(arquivo)
+
+    def gravar(self, inicio, colunas):
+        self.arquivo.write(struct.pack("<IQ", len(colunas[0]), inicio))
+        for coluna in colunas:
+            if sys.byteorder == "big":
+                coluna = array(coluna.typecode, coluna)
+                coluna.byteswap()
+            self.arquivo.write(coluna.tobytes())
+
+    def fechar(self):
+        self.arquivo.close()
+
+    @staticmethod
+    def ler(caminho):
+        """Retorna (parametros, blocos), onde blocos gera (inicio, colunas) na ordem gravada."""
+        arquivo = open(caminho, "rb")
+        if arquivo.read(4) != MAGICO:
+            arquivo.close()
+            raise ValueError(f"{caminho} não é um arquivo de simulação.")
+        versao, tamanho = struct.unpack("<HI", arquivo.read(6))
+        if versao != VERSAO:
+            arquivo.close()
+            raise ValueError(f"{caminho}: versão {versao} do formato não suportada.")
+        parametros = json.loads(arquivo.read(tamanho))
+
+        def blocos():
+            with arquivo:
+                while True:
+                    cabecalho = arquivo.read(12)
+                    if len(cabecalho) < 12:
+                        return
+                    n, inicio = struct.unpack("<IQ", cabecalho)
+                    colunas = []
+                    for _, tipo in COLUNAS:
+                        coluna = array(tipo)
+                        coluna.frombytes(arquivo.read(n * coluna.itemsize))
+                        if sys.byteorder == "big":
+                            coluna.byteswap()
+                        colunas.append(coluna)
+                    yield inicio, tuple(colunas)
+
+        return parametros, blocos()
+
+
+class Estatisticas:
+    """Agregados das partidas, somados bloco a bloco (memória limitada pelo número de valores distintos)."""
+
+    def __init__(self, jogadores):
+        self.partidas = 0
+        self.vitorias = [0] * (jogadores + 1)  # Posição 0: partidas que pararam no limite
+        self.jogadas = Counter()
+        self.total_jogadas = 0
+        self.total_us = 0
+
+    def somar(self, colunas):
+        vencedores, jogadas, duracoes = colunas
+        self.partidas += len(vencedores)
+        for vencedor in vencedores:
+            self.vitorias[vencedor] += 1
+        self.jogadas.update(jogadas)
+        self.total_jogadas += sum(jogadas)
+        self.total_us += sum(duracoes)
+
+    def percentil_jogadas(self, p):
+        alvo = p / 100.0 * self.partidas
+        acumulado = 0
+        for valor in sorted(self.jogadas):
+            acumulado += self.jogadas[valor]
+            if acumulado >= alvo:
+                return valor
+        return 0
+
+    def imprimir(self, segundos=None):
+        if not self.partidas:
+            print("Nenhuma partida.")
+            return
+        print(f"{self.partidas} partida(s), {self.total_jogadas} jogada(s).")
+        if segundos:
+            print(f"Vazão: {self.partidas / segundos:.1f} partidas/s, {self.total_jogadas / segundos:.0f} jogadas/s "
+                  f"em {segundos:.1f}s de relógio.")
+        print(f"Motor: {self.total_jogadas / (self.total_us / 1e6 or 1):.0f} jogadas/s por processo, "
+              f"{self.total_us / self.partidas / 1000:.2f} ms por partida.")
+        print("\nResultado:")
+        for player, vitorias in enumerate(self.vitorias):
+            rotulo = f"jogador {player}" if player else "limite de jogadas"
+            print(f"{rotulo:>18} {vitorias:>10} {100.0 * vitorias / self.partidas:>7.2f}%")
+        print("\nJogadas por partida: " + ", ".join(
+            f"p{p} {self.percentil_jogadas(p)}" for p in (5, 50, 95, 99)) +
+            f", média {self.total_jogadas / self.partidas:.1f}, máximo {max(self.jogadas)}")
+
+
+def lotes(parametros, tamanho_lote):
+    for inicio in range(0, parametros["partidas"], tamanho_lote):
+        yield inicio, min(inicio + tamanho_lote, parametros["partidas"]), parametros
+
+
+def simular(parametros, processos, tamanho_lote, saida):
+    arquivo = ArquivoColunas.criar(saida, parametros) if saida else None
+    estatisticas = Estatisticas(obter_layout(parametros["layout"]).jogadores)
+    inicio = time.monotonic()
+    proximo_aviso = inicio + 10
+    pool = multiprocessing.Pool(processos) if processos > 1 else None
+    try:
+        # imap devolve os lotes na ordem, à medida que ficam prontos
+        resultados = pool.imap(jogar_lote, lotes(parametros, tamanho_lote)) if pool else \
+            map(jogar_lote, lotes(parametros, tamanho_lote))
+        for primeira, colunas in resultados:
+            if arquivo is not None:
+                arquivo.gravar(primeira, colunas)
+            estatisticas.somar(colunas)
+            if time.monotonic() >= proximo_aviso:
+                proximo_aviso += 10
+                print(f"... {estatisticas.partidas}/{parametros['partidas']} partidas", file=sys.stderr)
+    finally:
+        if pool is not None:
+            pool.terminate()
+        if arquivo is not None:
+            arquivo.fechar()
+    return estatisticas, time.monotonic() - inicio
+
+
+def reproduzir(indice, parametros, esperado=None):
+    """Joga de novo a partida `indice`, mostrando as jogadas, e confere com o resultado gravado (se houver)."""
+    def mostrar(player, origem, destino):
+        print(f"jogador {player}: {origem} -> {destino}")
+
+    vencedor, jogadas = jogar(indice, parametros, mostrar)
+    print(f"\nPartida {indice}: {'vencedor jogador ' + str(vencedor) if vencedor else 'limite de jogadas'}, "
+          f"{jogadas} jogadas.")
+    if esperado is not None and esperado != (vencedor, jogadas):
+        raise SystemExit(f"Diverge do arquivo: vencedor {esperado[0]}, {esperado[1]} jogadas.")
+
+
+def resultado_gravado(caminho, indice):
+    _, blocos = ArquivoColunas.ler(caminho)
+    for inicio, (vencedores, jogadas, _) in blocos:
+        if inicio <= indice < inicio + len(vencedores):
+            return vencedores[indice - inicio], jogadas[indice - inicio]
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--partidas', type=int, default=10000, help='Partidas a jogar (padrão: 10000).')
+    parser.add_argument('--processos', type=int, default=multiprocessing.cpu_count(),
+                        help='Processos do pool; 1 joga no próprio processo (padrão: número de CPUs).')
+    parser.add_argument('--lote', type=int, default=200, help='Partidas por tarefa do pool (padrão: 200).')
+    parser.add_argument('--estrategia', choices=ESTRATEGIAS, default='gulosa', help='Como as jogadas são escolhidas.')
+    parser.add_argument('--ruido', type=float, default=0.05,
+                        help='Chance de a estratégia gulosa fazer uma jogada aleatória (padrão: 0.05).')
+    parser.add_argument('--layout', default=LAYOUT_PADRAO,
+                        help=f'Layout do tabuleiro: {", ".join(LAYOUTS)} ou classico-N (padrão: {LAYOUT_PADRAO}).')
+    parser.add_argument('--motor', choices=MOTORES, default='lista', help='Motor do tabuleiro (padrão: lista).')
+    parser.add_argument('--max-jogadas', type=int, default=1000,
+                        help='Jogadas (somando todos os jogadores) antes de desistir da partida (padrão: 1000).')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--saida', default='simulacao.hsim',
+                        help='Arquivo de resultados em colunas; vazio para não gravar (padrão: simulacao.hsim).')
+    parser.add_argument('--ler', metavar='ARQUIVO', help='Só mostra as estatísticas de um arquivo já gravado.')
+    parser.add_argument('--reproduzir', type=int, metavar='I',
+                        help='Joga de novo só a partida I (com os parâmetros de --ler, se informado).')
+    args = parser.parse_args()
+
+    if args.ler:
+        parametros, blocos = ArquivoColunas.ler(args.ler)
+        if args.reproduzir is not None:
+            reproduzir(args.reproduzir, parametros, resultado_gravado(args.ler, args.reproduzir))
+            sys.exit()
+        print("Parâmetros: " + json.dumps(parametros))
+        estatisticas = Estatisticas(obter_layout(parametros["layout"]).jogadores)
+        for _, colunas in blocos:
+            estatisticas.somar(colunas)
+        estatisticas.imprimir()
+        sys.exit()
+
+    if args.max_jogadas > 0xFFFF:
+        parser.error("--max-jogadas vai até 65535 (a coluna de jogadas tem 16 bits).")
+    try:
+        layout = obter_layout(args.layout)
+    except ValueError as e:
+        parser.error(str(e))
+    parametros = {"partidas": args.partidas, "seed": args.seed, "estrategia": args.estrategia,
+                  "ruido": args.ruido, "layout": layout.nome, "motor": args.motor, "max_jogadas": args.max_jogadas}
+    if args.reproduzir is not None:
+        reproduzir(args.reproduzir, parametros)
+        sys.exit()
+
+    print("Parâmetros: " + json.dumps(parametros))
+    estatisticas, segundos = simular(parametros, max(1, args.processos), max(1, args.lote), args.saida)
+    estatisticas.imprimir(segundos)
+    if args.saida:
+        print(f"\nResultados em {args.saida}.")
@@ -0,0 +1,265 @@
+# sincronizacao.py
+import logging
+import queue
+import threading
+import xmlrpc.client
+
+from protocolo_binario import ClienteBinario
+
+log = logging.getLogger("halma")
+
+
+class EspelhoEstado:
+    """Cópia local do estado de uma partida, mantida a partir das respostas do servidor.
+
+    Entende os três tipos de resposta de `get_estado_do_jogo`/`aguardar_mudanca`:
+    "completo" substitui o tabuleiro, "delta" reaplica as jogadas recebidas e
+    "igual" não altera nada.
+    """
+
+    def __init__(self, board_size=10):
+        self.board = [[0] * board_size for _ in range(board_size)]
+        self.estado_id = -1
+        self.turn = None
+        self.winner = None
+        self.jogadores_conectados = 0
+
+    def aplicar(self, estado):
+        """
+        Incorpora uma resposta do servidor. Retorna True se o estado local mudou.
+        Respostas atrasadas (de uma requisição feita antes da última aplicada) são ignoradas.
+        """
+        if estado["tipo"] == "igual" or estado["estado_id"] <= self.estado_id:
+            return False
+        if estado["tipo"] == "completo":
+            self.board = estado["board"]
+        elif estado["desde"] != self.estado_id:
+            return False  # Delta sobre uma base que não é a nossa; a próxima consulta traz o que falta
+        else:
+            for player, (from_r, from_c), (to_r, to_c) in estado["jogadas"]:
+                self.board[from_r][from_c] = 0
+                self.board[to_r][to_c] = player
+        self.estado_id = estado["estado_id"]
+        self.turn = estado["turn"]
+        self.winner = estado["winner"]
+        self.jogadores_conectados = estado["jogadores_conectados"]
+        return True
+
+
+class FilaDeEnvio:
+    """
+    Envia as ações de uma sessão numa thread própria, com um proxy só dela, na
+    ordem em que foram enfileiradas: quem enfileira (a interface) não espera a
+    ida e volta. O que se acumular enquanto uma chamada está em curso segue junto
+    na próxima, num único `sync` com várias ações.
+    """
+
+    def __init__(self, sessao):
+        self.sessao = sessao
+        self._fila = queue.Queue()
+        self._thread = None
+
+    def enviar(self, acoes, ao_responder=None):
+        """
+        Enfileira `acoes` e retorna na hora. `ao_responder(resultados, erro)` é chamado
+        na thread de envio (não na da interface): os resultados dessas ações, ou None e
+        a exceção da chamada. Uma exceção dele é registrada e não para a fila.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._trabalhar, daemon=True)
+            self._thread.start()
+        self._fila.put((list(acoes), ao_responder))
+
+    def fechar(self):
+        """Para a thread depois de enviar o que já estava na fila."""
+        if self._thread is not None:
+            self._fila.put(None)
+
+    def _trabalhar(self):
+        servidor = None
+        while True:
+            lote = [self._fila.get()]
+            while True:
+                try:
+                    lote.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            pedidos = [pedido for pedido in lote if pedido is not None]
+            if pedidos:
+                resultados, erro = None, None
+                try:
+                    servidor = servidor or self.sessao.conectar()
+                    resultados = self.sessao.sincronizar(servidor, [acao for acoes, _ in pedidos for acao in acoes])
+                except Exception as e:
+                    servidor, erro = None, e  # A próxima chamada abre uma conexão nova
+                inicio = 0
+                for acoes, ao_responder in pedidos:
+                    if ao_responder is not None:
+                        # Um callback com defeito não pode matar a thread: o que vier
+                        # depois na fila ficaria preso em `pendentes` para sempre
+                        try:
+                            ao_responder(None if erro else resultados[inicio:inicio + len(acoes)], erro)
+                        except Exception:
+                            log.exception("Erro no retorno de uma ação enviada pela fila")
+                    inicio += len(acoes)
+            if len(pedidos) < len(lote):
+                return
+
+
+class SessaoJogador:
+    """
+    Lado do jogador de uma partida, sem interface: conexão, registro e a chamada
+    `sync` com o estado local (espelho, jogadas legais e chat) que ela mantém.
+    Usada pela janela do jogador.py e pelo gerador de carga (carga.py).
+    Como espectador (`assistir`), só lê: o long-poll é o `assistir` do servidor.
+    Ao entrar, busca o layout da partida (`layout`: lado, jogadores e campos) e
+    dimensiona o espelho por ele.
+
+    Jogadas feitas com `jogar` são otimistas: entram em `pendentes`, aparecem já em
+    `tabuleiro()` e seguem para o servidor pela `fila` de envio. A resposta do
+    servidor decide: aceita, a jogada chega ao espelho no delta; recusada (ou sem
+    resposta), ela simplesmente deixa de ser aplicada por cima do espelho.
+
+    `ao_atualizar(mudou, mensagens, lacuna)`, se definido, é chamado a cada resposta
+    aplicada (ainda sob o lock), com as mensagens de chat ainda não vistas.
+    """
+
+    def __init__(self, host, port, protocolo="xmlrpc"):
+        self.host, self.port, self.protocolo = host, port, protocolo
+        self.espelho = EspelhoEstado()
+        self.layout = None
+        self.partida_id = None
+        self.player_id = 0
+        # Token da sessão no servidor, para voltar ao assento (reconectar) ou liberá-lo (sair)
+        self.token = ""
+        self.espectador = False
+        # Jogadas legais calculadas pelo servidor para o turno atual: {origem: [destinos]}
+        self.jogadas_legais = {}
+        self.ultimo_chat_id = -1
+        self.ao_atualizar = None
+        # A thread de atualização e a da interface podem receber respostas ao mesmo tempo
+        self.lock = threading.Lock()
+        self.servidor = None
+        # Jogadas enviadas pela fila e ainda sem resposta: [(origem, destino)]
+        self.pendentes = []
+        self.fila = FilaDeEnvio(self)
+
+    def conectar(self):
+        """Cria um proxy para o servidor no protocolo escolhido (mesmos métodos nos dois)."""
+        if self.protocolo == "binario":
+            return ClienteBinario(self.host, self.port)
+        return xmlrpc.client.ServerProxy(f"http://{self.host}:{self.port}", allow_none=True)
+
+    def entrar(self, partida_id=None):
+        """Conecta e ocupa um assento. Retorna o player_id (0 se a partida estava cheia)."""
+        if self.servidor is None:
+            self.servidor = self.conectar()
+        self.partida_id, self.player_id, self.token = self.servidor.registrar_jogador(partida_id)
+        if self.player_id:
+            self._carregar_layout()
+        return self.player_id
+
+    def reconectar(self):
+        """
+        Volta ao assento da sessão atual (ex.: com uma conexão nova, depois de uma queda).
+        Retorna False se o servidor já deu a sessão por expirada.
+        """
+        self.servidor = self.conectar()
+        partida_id, player_id = self.servidor.reconectar(self.token)
+        return bool(player_id) and (partida_id, player_id) == (self.partida_id, self.player_id)
+
+    def sair(self):
+        """Avisa o servidor que o jogador foi embora: libera o assento ou desiste, sem esperar o timeout."""
+        if self.token and self.servidor is not None:
+            self.servidor.sair(self.token)
+            self.token = ""
+
+    def assistir(self, partida_id):
+        """Conecta como espectador da partida. Retorna o espectador_id."""
+        if self.servidor is None:
+            self.servidor = self.conectar()
+        self.partida_id, espectador_id = self.servidor.registrar_espectador(partida_id)
+        self.espectador = True
+        self._carregar_layout()
+        return espectador_id
+
+    def _carregar_layout(self):
+        self.layout = self.servidor.get_layout(self.partida_id)
+        self.espelho = EspelhoEstado(self.layout["board_size"])
+
+    @property
+    def minha_vez(self):
+        # Com uma jogada a caminho, a vez já foi usada
+        return self.espelho.turn == self.player_id and self.espelho.winner is None and not self.pendentes
+
+    def tabuleiro(self):
+        """
+        O tabuleiro a mostrar (chamar sob o lock): o do espelho, com as jogadas
+        pendentes aplicadas por cima enquanto ainda couberem nele.
+        """
+        board = self.espelho.board
+        if not self.pendentes:
+            return board
+        board = [linha[:] for linha in board]
+        for (from_r, from_c), (to_r, to_c) in self.pendentes:
+            # Se o espelho já tem a jogada (o long-poll chegou antes da resposta do envio)
+            # ou mudou de um jeito que a impede, vale o que o servidor mandou
+            if board[from_r][from_c] == self.player_id and board[to_r][to_c] == 0:
+                board[from_r][from_c], board[to_r][to_c] = 0, self.player_id
+        return board
+
+    def jogar(self, origem, destino, ao_responder=None):
+        """
+        Jogada otimista: entra em `pendentes` e vai para a fila de envio sem esperar
+        o servidor. `ao_responder(resultados, erro)` como em FilaDeEnvio.enviar; quando
+        ele é chamado, a jogada já saiu de `pendentes`.
+        """
+        with self.lock:
+            self.pendentes.append((tuple(origem), tuple(destino)))
+        self.fila.enviar([["jogada", list(origem), list(destino)]], ao_responder)
+
+    def _resolver(self, jogadas):
+        """Tira de `pendentes` as jogadas que tiveram resposta. Retorna True se havia alguma."""
+        resolvidas = False
+        for jogada in jogadas:
+            if jogada in self.pendentes:
+                self.pendentes.remove(jogada)
+                resolvidas = True
+        return resolvidas
+
+    def sincronizar(self, servidor=None, acoes=(), timeout=0):
+        """
+        Faz uma chamada `sync` (ações + estado + chat numa só ida e volta) e aplica a resposta.
+        Retorna o resultado de cada ação, na ordem enviada. Espectadores não enviam ações.
+        """
+        servidor = servidor or self.servidor
+        chat_id = self.ultimo_chat_id
+        jogadas = [(tuple(acao[1]), tuple(acao[2])) for acao in acoes if acao[0] == "jogada"]
+        try:
+            if self.espectador:
+                resposta = servidor.assistir(self.partida_id, self.espelho.estado_id, chat_id, timeout)
+            else:
+                resposta = servidor.sync(self.partida_id, self.player_id, self.espelho.estado_id,
+                                         chat_id, list(acoes), timeout, self.token)
+        except Exception:
+            if jogadas:
+                with self.lock:
+                    self._resolver(jogadas)
+            raise
+        with self.lock:
+            mudou = self.espelho.aplicar(resposta["estado"])
+            if mudou:
+                legais = resposta.get("jogadas_legais", [])
+                self.jogadas_legais = {tuple(origem): [tuple(d) for d in destinos] for origem, destinos in legais}
+            # Jogada recusada sem mudança no espelho ainda muda o que está na tela
+            if self._resolver(jogadas):
+                mudou = True
+            # Lacuna só interessa se nenhuma outra resposta avançou o chat enquanto esta vinha
+            lacuna = resposta["lacuna_chat"] and chat_id == self.ultimo_chat_id
+            # Pula as mensagens que a outra thread já viu
+            mensagens = [msg for msg in resposta["mensagens"] if msg["seq"] > self.ultimo_chat_id]
+            if mensagens:
+                self.ultimo_chat_id = mensagens[-1]["seq"]
+            if self.ao_atualizar is not None:
+                self.ao_atualizar(mudou, mensagens, lacuna)
+        return resposta.get("resultados", [])
@@ -1,82 +1,191 @@
 # tabuleiro.py
+from collections import deque
 
-class HalmaGame:
-    def __init__(self, board_size=10):
-        self.board_size = board_size
-        self.board = [[0] * board_size for _ in range(board_size)]
+from layouts import obter_layout
+
+
+class RegrasTurno:
+    """
+    Ordem dos turnos, desistência e is_valid_move, iguais em todos os motores. Com dois
+    jogadores, desistir dá a vitória ao outro; com três ou quatro, quem desiste
+    sai da rotação, as peças dele saem do tabuleiro (senão ficariam para sempre
+    no campo de destino de outro jogador) e o último que sobrar vence.
+    """
+
+    def proximo_jogador(self, player):
+        proximo = player % self.jogadores + 1
+        while proximo in self.eliminados and proximo != player:
+            proximo = proximo % self.jogadores + 1
+        return proximo
+
+    def is_valid_move(self, player, from_pos, to_pos, path=None):
+        """
+        True se `to_pos` está entre as jogadas legais da peça em `from_pos` (a mesma
+        regra de move_piece). `path` não é mais usado: a cadeia de pulos é resolvida
+        inteira por legal_moves.
+        """
+        return tuple(to_pos) in self.legal_moves(player, from_pos)
+
+    def forfeit(self, player_id):
+        """
+        Registra a desistência de `player_id` e define o vencedor quando só resta um
+        jogador. Retorna False (sem mudar nada) para um jogador inexistente ou já eliminado.
+        """
+        if not 1 <= player_id <= self.jogadores or player_id in self.eliminados:
+            return False
+        self.eliminados.add(player_id)
+        restantes = [p for p in range(1, self.jogadores + 1) if p not in self.eliminados]
+        if len(restantes) == 1:
+            self.winner = restantes[0]
+            return True
+        self._remover_pecas(player_id)
+        if self.current_turn == player_id:
+            self.current_turn = self.proximo_jogador(player_id)
+        return True
+
+
+class HalmaGame(RegrasTurno):
+    def __init__(self, board_size=10, layout=None):
+        """`layout` (nome ou layouts.Layout) define lado, jogadores e campos; sem ele, vale `board_size`."""
+        self.layout = obter_layout(board_size if layout is None else layout)
+        self.board_size = self.layout.board_size
+        self.jogadores = self.layout.jogadores
+        self.board = [[0] * self.board_size for _ in range(self.board_size)]
         self.current_turn = 1
         self.winner = None
+        self.eliminados = set()
+        # Jogadas legais já calculadas por (jogador, origem); esvaziado a cada movimento
+        self._cache_jogadas = {}
+        # Peças de cada jogador já dentro do campo de destino dele, atualizado a cada movimento
+        self._no_destino = [0] * (self.jogadores + 1)
         self._setup_pieces()
 
     def _setup_pieces(self):
-        initial_positions_p1 = [
-            (0, 0), (1, 0), (2, 0), (3, 0),
-            (0, 1), (1, 1), (2, 1),
-            (0, 2), (1, 2),
-            (0, 3)
-        ]
-        for r, c in initial_positions_p1:
-            self.board[r][c] = 1
-        for r, c in initial_positions_p1:
-            self.board[self.board_size - 1 - r][self.board_size - 1 - c] = 2
+        for player in range(1, self.jogadores + 1):
+            for r, c in self.layout.campos[player]:
+                self.board[r][c] = player
+        self._contar_destinos()
+
+    def _remover_pecas(self, player):
+        for linha in self.board:
+            for c, p in enumerate(linha):
+                if p == player:
+                    linha[c] = 0
+        self._no_destino[player] = 0
+        self._cache_jogadas.clear()
+
+    def _contar_destinos(self):
+        dono = self.layout.dono_destino
+        self._no_destino = [0] * (self.jogadores + 1)
+        for r, linha in enumerate(self.board):
+            for c, player in enumerate(linha):
+                if player and dono[r][c] == player:
+                    self._no_destino[player] += 1
 
     def get_board(self):
         """Retorna o estado atual do tabuleiro."""
         return self.board
 
-    def is_valid_move(self, player, from_pos, to_pos, path):
-        from_r, from_c = from_pos
-        to_r, to_c = to_pos
-        if not (0 <= to_r < self.board_size and 0 <= to_c < self.board_size):
-            return False
-        if self.board[to_r][to_c] != 0:
-            return False
-        if self.board[from_r][from_c] != player:
-            return False
-        
-        is_adjacent = abs(from_r - to_r) <= 1 and abs(from_c - to_c) <= 1
-        if is_adjacent and not path:
-            return True
-        
-        jump_r = from_r + (to_r - from_r) // 2
-        jump_c = from_c + (to_c - from_c) // 2
-        is_jump = abs(from_r - to_r) in [0, 2] and abs(from_c - to_c) in [0, 2]
-        if is_jump and self.board[jump_r][jump_c] != 0:
-            if to_pos not in path:
-                return True
-        return False
+    def legal_moves(self, player, from_pos):
+        """
+        Retorna as casas (ordenadas) que a peça em `from_pos` pode alcançar numa
+        jogada: um passo para uma casa vizinha vazia ou uma cadeia de pulos.
+        As cadeias são exploradas em largura (BFS), visitando cada casa uma vez;
+        durante a cadeia a casa de origem conta como vazia. Vizinhos e pulos de
+        cada casa vêm das tabelas do layout, sem conferir limites do tabuleiro.
+        """
+        chave = (player, tuple(from_pos))
+        destinos = self._cache_jogadas.get(chave)
+        if destinos is not None:
+            return destinos
+
+        n = self.board_size
+        board = self.board
+        r, c = origem = chave[1]
+        destinos = set()
+        if 0 <= r < n and 0 <= c < n and board[r][c] == player:
+            saltos = self.layout.saltos
+            for vr, vc in self.layout.vizinhos[r][c]:
+                if board[vr][vc] == 0:
+                    destinos.add((vr, vc))
+            visitados = {origem}
+            fila = deque([origem])
+            while fila:
+                cr, cc = fila.popleft()
+                for meio, pulo in saltos[cr][cc]:
+                    if (board[pulo[0]][pulo[1]] == 0 and pulo not in visitados
+                            and board[meio[0]][meio[1]] != 0 and meio != origem):
+                        visitados.add(pulo)
+                        fila.append(pulo)
+            visitados.discard(origem)
+            destinos |= visitados
+        destinos = sorted(destinos)
+        self._cache_jogadas[chave] = destinos
+        return destinos
+
+    def all_legal_moves(self, player):
+        """Mapeia cada peça de `player` que pode se mover para a lista de destinos dela."""
+        todas = {}
+        for r in range(self.board_size):
+            for c in range(self.board_size):
+                if self.board[r][c] == player:
+                    destinos = self.legal_moves(player, (r, c))
+                    if destinos:
+                        todas[(r, c)] = destinos
+        return todas
 
     def move_piece(self, player, from_pos, to_pos):
         if self.current_turn != player:
             return False, "Não é o seu turno."
-        
-        if self.is_valid_move(player, from_pos, to_pos, []):
+
+        if tuple(to_pos) in self.legal_moves(player, from_pos):
             from_r, from_c = from_pos
             to_r, to_c = to_pos
             self.board[to_r][to_c] = player
             self.board[from_r][from_c] = 0
-            self.check_win_condition()
+            dono = self.layout.dono_destino
+            self._no_destino[player] += (dono[to_r][to_c] == player) - (dono[from_r][from_c] == player)
+            self._cache_jogadas.clear()
+            self.check_win_condition(player)
             if not self.winner:
-                self.current_turn = 3 - player
+                self.current_turn = self.proximo_jogador(player)
             return True, "Movimento realizado."
         else:
             return False, "Movimento inválido."
 
-    def check_win_condition(self):
-        # (Lógica de verificação de vitória)
-        p1_wins = True
-        destination_p1 = [(9,9), (8,9), (7,9), (6,9), (9,8), (8,8), (7,8), (9,7), (8,7), (9,6)]
-        for r, c in destination_p1:
-             if self.board[r][c] != 1: p1_wins = False; break
-        if p1_wins: self.winner = 1
+    def check_win_condition(self, player=None):
+        """
+        Vence quem tem todas as casas do campo de destino ocupadas por peças suas.
+        Com `player` (depois de uma jogada dele), só compara o contador dele; sem,
+        reconta o tabuleiro inteiro e confere todos os jogadores.
+        """
+        if player is None:
+            self._contar_destinos()
+            jogadores = range(1, self.jogadores + 1)
+        else:
+            jogadores = (player,)
+        for p in jogadores:
+            if self._no_destino[p] == len(self.layout.destinos[p]):
+                self.winner = p
 
-        p2_wins = True
-        destination_p2 = [(0,0), (1,0), (2,0), (3,0), (0,1), (1,1), (2,1), (0,2), (1,2), (0,3)]
-        for r, c in destination_p2:
-            if self.board[r][c] != 2: p2_wins = False; break
-        if p2_wins: self.winner = 2
+    def restaurar(self, board, current_turn, winner, eliminados=()):
+        """Carrega um estado salvo (por exemplo, de um snapshot do diário)."""
+        self.board = [list(linha) for linha in board]
+        self.current_turn = current_turn
+        self.winner = winner
+        self.eliminados = set(eliminados)
+        self._contar_destinos()
+        self._cache_jogadas.clear()
 
-    def forfeit(self, player_id):
-        """Define o vencedor por desistência."""
-        self.winner = 3 - player_id
-        return True
\ No newline at end of file
+
+MOTORES = ("lista", "bits")
+
+
+def criar_jogo(motor="lista", board_size=10, layout=None):
+    """Cria um jogo com o motor escolhido; todos expõem a mesma API de HalmaGame."""
+    if motor == "lista":
+        return HalmaGame(board_size, layout)
+    if motor == "bits":
+        from tabuleiro_bits import HalmaGameBits  # Import tardio: tabuleiro_bits depende deste módulo
+        return HalmaGameBits(board_size, layout)
+    raise ValueError(f"Motor de tabuleiro desconhecido: {motor!r} (opções: {', '.join(MOTORES)})")
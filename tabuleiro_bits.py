@@ -0,0 +1,172 @@
+# tabuleiro_bits.py
+from functools import lru_cache, reduce
+from operator import or_
+
+from layouts import obter_layout
+from tabuleiro import RegrasTurno
+
+
+@lru_cache(maxsize=None)
+def tabelas(layout):
+    """
+    Máscaras usadas pelo motor, calculadas uma vez por layout a partir das
+    tabelas dele: vizinhos[i] tem um bit por casa adjacente a i; saltos[i]
+    mapeia o índice de destino de um pulo a partir de i para o bit da casa
+    pulada; campos[p] e destinos[p] são os campos inicial e de destino do jogador p.
+    Aceita o que layouts.obter_layout aceita (nome, lado do tabuleiro ou Layout).
+    """
+    layout = obter_layout(layout)
+    n = layout.board_size
+    vizinhos = [0] * (n * n)
+    saltos = [dict() for _ in range(n * n)]
+    for r in range(n):
+        for c in range(n):
+            i = r * n + c
+            for vr, vc in layout.vizinhos[r][c]:
+                vizinhos[i] |= 1 << (vr * n + vc)
+            for (mr, mc), (pr, pc) in layout.saltos[r][c]:
+                saltos[i][pr * n + pc] = 1 << (mr * n + mc)
+    campos = [sum(1 << (r * n + c) for r, c in campo) for campo in layout.campos]
+    destinos = [sum(1 << (r * n + c) for r, c in campo) for campo in layout.destinos]
+    return vizinhos, saltos, campos, destinos
+
+
+def alcance_da_peca(origem, ocupadas, vizinhos, saltos):
+    """
+    Máscara das casas que a peça em `origem` alcança numa jogada: um passo para
+    uma vizinha vazia ou qualquer casa de uma cadeia de pulos (BFS sobre máscaras).
+    `ocupadas` inclui a própria peça.
+    """
+    bit_origem = 1 << origem
+    # A peça sai da origem: durante a cadeia de pulos aquela casa está vazia
+    ocupadas &= ~bit_origem
+    visitados = bit_origem
+    fila = [origem]
+    while fila:
+        for destino, pulada in saltos[fila.pop()].items():
+            if ocupadas & pulada and not (ocupadas | visitados) >> destino & 1:
+                visitados |= 1 << destino
+                fila.append(destino)
+    return (vizinhos[origem] & ~ocupadas | visitados) & ~bit_origem
+
+
+class HalmaGameBits(RegrasTurno):
+    """
+    Motor alternativo de HalmaGame: as peças de cada jogador ficam num inteiro
+    usado como máscara de bits (bit r * board_size + c), e adjacência, pulo e
+    vitória viram operações de máscara. Mesma API e mesmas regras de HalmaGame.
+    """
+
+    def __init__(self, board_size=10, layout=None):
+        self.layout = obter_layout(board_size if layout is None else layout)
+        self.board_size = self.layout.board_size
+        self.jogadores = self.layout.jogadores
+        self.current_turn = 1
+        self.winner = None
+        self.eliminados = set()
+        self._vizinhos, self._saltos, campos, destinos = tabelas(self.layout)
+        # Cada jogador começa no próprio campo e precisa ocupar o campo de destino
+        # (listas indexadas pelo número do jogador; a posição 0 não é usada)
+        self.pecas = list(campos)
+        self.destino = destinos
+        self._board_cache = None
+        self._cache_jogadas = {}
+
+    @property
+    def board(self):
+        return self.get_board()
+
+    def get_board(self):
+        """Retorna o estado atual do tabuleiro (lista de listas, como HalmaGame)."""
+        if self._board_cache is None:
+            n = self.board_size
+            board = [[0] * n for _ in range(n)]
+            for player in range(1, self.jogadores + 1):
+                pecas = self.pecas[player]
+                while pecas:
+                    menor = pecas & -pecas
+                    r, c = divmod(menor.bit_length() - 1, n)
+                    board[r][c] = player
+                    pecas ^= menor
+            self._board_cache = board
+        return self._board_cache
+
+    def _remover_pecas(self, player):
+        self.pecas[player] = 0
+        self._board_cache = None
+        self._cache_jogadas.clear()
+
+    def _ocupadas(self):
+        return reduce(or_, self.pecas)
+
+    def legal_moves(self, player, from_pos):
+        """Mesmo contrato de HalmaGame.legal_moves, com a BFS dos pulos feita sobre máscaras."""
+        chave = (player, tuple(from_pos))
+        destinos = self._cache_jogadas.get(chave)
+        if destinos is not None:
+            return destinos
+
+        n = self.board_size
+        r, c = chave[1]
+        destinos = []
+        if 0 <= r < n and 0 <= c < n and self.pecas[player] >> (r * n + c) & 1:
+            alcance = alcance_da_peca(r * n + c, self._ocupadas(), self._vizinhos, self._saltos)
+            while alcance:
+                menor = alcance & -alcance
+                destinos.append(divmod(menor.bit_length() - 1, n))
+                alcance ^= menor
+        self._cache_jogadas[chave] = destinos
+        return destinos
+
+    def all_legal_moves(self, player):
+        """Mapeia cada peça de `player` que pode se mover para a lista de destinos dela."""
+        n = self.board_size
+        todas = {}
+        pecas = self.pecas[player]
+        while pecas:
+            menor = pecas & -pecas
+            posicao = divmod(menor.bit_length() - 1, n)
+            destinos = self.legal_moves(player, posicao)
+            if destinos:
+                todas[posicao] = destinos
+            pecas ^= menor
+        return todas
+
+    def move_piece(self, player, from_pos, to_pos):
+        if self.current_turn != player:
+            return False, "Não é o seu turno."
+
+        if tuple(to_pos) in self.legal_moves(player, from_pos):
+            n = self.board_size
+            self.pecas[player] ^= (1 << (from_pos[0] * n + from_pos[1])) | (1 << (to_pos[0] * n + to_pos[1]))
+            self._board_cache = None
+            self._cache_jogadas.clear()
+            self.check_win_condition(player)
+            if not self.winner:
+                self.current_turn = self.proximo_jogador(player)
+            return True, "Movimento realizado."
+        else:
+            return False, "Movimento inválido."
+
+    def check_win_condition(self, player=None):
+        """Vence quem ocupa todo o campo de destino: uma comparação de máscaras por jogador."""
+        if player is not None:
+            if self.pecas[player] & self.destino[player] == self.destino[player]:
+                self.winner = player
+            return
+        for p in range(1, self.jogadores + 1):
+            self.check_win_condition(p)
+
+    def restaurar(self, board, current_turn, winner, eliminados=()):
+        """Carrega um estado salvo (por exemplo, de um snapshot do diário)."""
+        n = self.board_size
+        self.pecas = [0] * (self.jogadores + 1)
+        for r in range(n):
+            for c in range(n):
+                if board[r][c]:
+                    self.pecas[board[r][c]] |= 1 << (r * n + c)
+        self.current_turn = current_turn
+        self.winner = winner
+        self.eliminados = set(eliminados)
+        self._board_cache = None
+        self._cache_jogadas.clear()